@@ -0,0 +1,13 @@
+# register engine shared by every script: 'int' (plain python ints, the
+# default) or 'bitarray' (the bitstring reference, same results)
+# pick at import with ASWREG_BACKEND=bitarray or per call with backend=
+import os
+
+BACKENDS = ('bitarray','int')
+BACKEND = os.environ.get('ASWREG_BACKEND','int')
+
+def check_backend(backend=None):
+  backend = backend or BACKEND
+  if backend not in BACKENDS:
+    raise ValueError('unknown backend: ' + str(backend))
+  return backend
@@ -0,0 +1,224 @@
+#!/usr/bin/python
+# benchmarks for the hot functions and end-to-end batch throughput
+# every run is appended as one JSON line to a history file, "compare" diffs
+# two runs from it and exits 1 when anything got slower than the threshold
+# inputs come from a fixed seed so runs on different commits time the same work
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from sys import argv, stdout, stderr
+
+import aswreg_backend
+import aswreg_memo
+import aswreg_v1
+import aswreg_v2
+import aswreg_v2core as core
+import aswreg_v2int as fast
+
+
+V2_GAMES = ['EV Nova','Garendall']
+V1_GAMES = aswreg_v1.earlier_games + aswreg_v1.later_games
+NAME_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 .-[]&'
+INPUT_TIMESTAMP = 0x80 # codes are stamped with this, not the current fortnight
+
+# long names, and names under 16 chars that hit the name[k%ln] wraparound in f1/f2
+def make_names(rng,count):
+	names = []
+	for i in range(0,count):
+		length = rng.randint(16,40) if i % 2 else rng.randint(1,15)
+		names.append(''.join(rng.choice(NAME_CHARS) for k in range(0,length)).strip() or 'X')
+	return names
+
+def make_inputs(count=64,seed=2007):
+	rng = random.Random(seed)
+	names = make_names(rng,count)
+	numbers = [rng.choice([1,1,2,5,10,200,rng.randint(1,9999)]) for i in range(0,count)]
+	v2 = [(names[i],numbers[i],V2_GAMES[i % len(V2_GAMES)]) for i in range(0,count)]
+	nova = [(names[i],numbers[i],'EV Nova') for i in range(0,count)]
+	v1 = [(names[i],numbers[i],V1_GAMES[i % len(V1_GAMES)]) for i in range(0,count)]
+	hash2s = [fast.set_hash2_time_valid(fast.get_hash2(*args),INPUT_TIMESTAMP) ^ rng.getrandbits(3) for args in nova] # some with a bad checksum
+	codes = [aswreg_v2.int_to_textcode(fast.get_hash1(*args) ^ hash2) for (args,hash2) in zip(nova,hash2s)]
+	return {'v2': v2,'nova': nova,'v1': v1,'hash2s': hash2s,'codes': codes}
+
+def benchmarks(inputs):
+	from bitstring import BitArray
+	codes = [(code,) for code in inputs['codes']]
+	hash2s = [(hash2,) for hash2 in inputs['hash2s']]
+	bincodes = [(BitArray(uint=aswreg_v2.textcode_to_int(code),length=64),) for (code,) in codes]
+	bithash2s = [(BitArray(uint=hash2,length=64),) for (hash2,) in hash2s]
+	return [
+		('get_hash1[bitarray]',lambda *a: core.get_hash1(*a,backend='bitarray'),inputs['v2']),
+		('get_hash1[int]',fast.get_hash1,inputs['v2']),
+		('make_hash2_f1[bitarray]',core.make_hash2_f1,inputs['nova']),
+		('make_hash2_f1[int]',fast.make_hash2_f1,inputs['nova']),
+		('make_hash2_f2[bitarray]',core.make_hash2_f2,inputs['nova']),
+		('make_hash2_f2[int]',fast.make_hash2_f2,inputs['nova']),
+		('make_hash2_f1+f2[specialized]',fast.specialize('EV Nova',5),[(name,) for (name,number,game) in inputs['nova']]),
+		('check_hash2_valid[bitarray]',core.check_hash2_valid,bithash2s),
+		('check_hash2_valid[int]',fast.check_hash2_valid,hash2s),
+		('textcode_to_bincode',aswreg_v2.textcode_to_bincode,codes),
+		('textcode_to_int',aswreg_v2.textcode_to_int,codes),
+		('bincode_to_textcode',aswreg_v2.bincode_to_textcode,bincodes),
+		('int_to_textcode',aswreg_v2.int_to_textcode,hash2s),
+		('v1.generate_code[bitarray]',lambda *a: aswreg_v1.generate_code(*a,backend='bitarray'),inputs['v1']),
+		('v1.generate_code[int]',aswreg_v1.generate_code,inputs['v1']),
+		('v1.generate_all[int]',aswreg_v1.generate_all,[args[:2] for args in inputs['v1']]),
+	]
+
+# whole records through the batch pipeline, (op, backend, batch sizes)
+THROUGHPUT = [
+	('renew','int',(1,64,1024)),
+	('generate','int',(1,64,1024)),
+	('renew','bitarray',(1,16)),
+	('generate','bitarray',(1,16)),
+]
+
+def batch_records(inputs,op,size):
+	records = []
+	for i in range(0,size):
+		(name,number,game) = inputs['nova'][i % len(inputs['nova'])]
+		code = inputs['codes'][i % len(inputs['codes'])]
+		records.append((i + 1,'csv',{'code': code,'name': name,'number': number,'game': game,'op': op}))
+	return records
+
+def run_batch(records):
+	for result in aswreg_v2.process_batch(records):
+		pass
+
+
+# seconds per call: the loop count grows until a round takes min_time, then
+# the best of repeat rounds is kept (loop overhead is included, it's the same
+# for every run)
+def time_calls(func,args,loops):
+	start = time.perf_counter()
+	for i in range(0,loops):
+		func(*args[i % len(args)])
+	return time.perf_counter() - start
+
+def time_function(func,args,min_time=0.2,repeat=3):
+	loops = 1
+	while True:
+		elapsed = time_calls(func,args,loops)
+		if elapsed >= min_time:
+			break
+		loops = max(loops * 2,int(loops * min_time / max(elapsed,1e-9) * 1.1))
+	best = min([elapsed] + [time_calls(func,args,loops) for i in range(1,repeat)])
+	return best / loops
+
+def git_commit():
+	try:
+		return subprocess.run(['git','rev-parse','--short','HEAD'],capture_output=True,text=True,
+			cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+	except OSError:
+		return None
+
+# the history is kept in an output directory, bench_results/ next to this
+# file unless ASWREG_BENCH_DIR or --output-dir say otherwise
+HISTORY_FILE = 'bench_history.jsonl'
+OUTPUT_DIR = os.environ.get('ASWREG_BENCH_DIR',os.path.join(os.path.dirname(os.path.abspath(__file__)),'bench_results'))
+
+def history_path(output_dir=''):
+	return os.path.join(output_dir or OUTPUT_DIR,HISTORY_FILE)
+
+def run(output_dir='',label='',filter='',quick=False):
+	aswreg_memo.disable() # time the work, not the cache
+	min_time = 0.05 if quick else 0.2
+	inputs = make_inputs()
+	results = {}
+
+	for (name,func,args) in benchmarks(inputs):
+		if filter in name:
+			results[name] = {'us': time_function(func,args,min_time) * 1e6}
+			print('%-32s %12.2f us/call' % (name,results[name]['us']))
+
+	saved_backend = aswreg_backend.BACKEND
+	try:
+		for (op,backend,sizes) in THROUGHPUT:
+			aswreg_backend.BACKEND = backend # what every engine reads when no backend= is given
+			for size in sizes:
+				name = '%s[%s] batch=%d' % (op,backend,size)
+				if filter in name:
+					records = batch_records(inputs,op,size)
+					per_batch = time_function(run_batch,[(records,)],min_time,repeat=1 if backend == 'bitarray' else 3)
+					results[name] = {'us': per_batch / size * 1e6,'records_per_s': size / per_batch}
+					print('%-32s %12.2f us/record %10.0f records/s' % (name,results[name]['us'],results[name]['records_per_s']))
+	finally:
+		aswreg_backend.BACKEND = saved_backend
+
+	entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'),'label': label,'commit': git_commit(),
+		'python': platform.python_version(),'machine': platform.machine(),'results': results}
+	history = history_path(output_dir)
+	os.makedirs(os.path.dirname(history),exist_ok=True)
+	with open(history,'a') as f:
+		f.write(json.dumps(entry) + '\n')
+	print('saved to %s' % history)
+
+def load_history(history):
+	with open(history) as f:
+		return [json.loads(line) for line in f if line.strip()]
+
+def find_run(runs,ref):
+	# a run is picked by position (-1 is the latest) or by label/commit
+	try:
+		return runs[int(ref)]
+	except ValueError:
+		matches = [r for r in runs if ref in (r.get('label'),r.get('commit'))]
+		if not matches:
+			raise ValueError('no run labelled ' + ref)
+		return matches[-1]
+
+# lower is better for every result ('us' per call or per record)
+def compare(output_dir='',base='-2',head='-1',threshold=10.0):
+	runs = load_history(history_path(output_dir))
+	(old,new) = (find_run(runs,base),find_run(runs,head))
+	print('base %s %s   head %s %s   threshold %.1f%%\n' % (old['time'],old.get('commit') or '',new['time'],new.get('commit') or '',threshold))
+	regressions = 0
+	for name in new['results']:
+		if name not in old['results']:
+			print('%-32s %12s %12.2f  new' % (name,'',new['results'][name]['us']))
+			continue
+		(before,after) = (old['results'][name]['us'],new['results'][name]['us'])
+		change = (after - before) / before * 100
+		flag = ''
+		if change > threshold:
+			flag = 'REGRESSION'
+			regressions += 1
+		elif change < -threshold:
+			flag = 'faster'
+		print('%-32s %12.2f %12.2f %+8.1f%%  %s' % (name,before,after,change,flag))
+	print('\n%d regression(s)' % regressions)
+	return regressions == 0
+
+
+usage = """Usage\n-----\n
+Run the benchmarks and append the results to the history file:
+run (optional: --output-dir <dir> --label <text> --filter <substring> --quick)
+  the history is <dir>/bench_history.jsonl, <dir> defaults to $ASWREG_BENCH_DIR or bench_results/\n
+Compare two runs from the history (exit status 1 on a regression):
+compare (optional: --output-dir <dir> --base -2 --head -1 --threshold 10)
+  runs are picked by position (-1 is the latest), label or commit\n"""
+
+if __name__ == '__main__':
+	status = 0
+	command = argv[1] if len(argv) > 1 else ''
+	try:
+		if command == 'run':
+			(args,options) = aswreg_v2.parse_options(argv[2:],{'output_dir': '','label': '','filter': '','quick': False})
+			if args:
+				raise aswreg_v2.UsageError(command)
+			run(**options)
+		elif command == 'compare':
+			(args,options) = aswreg_v2.parse_options(argv[2:],{'output_dir': '','base': '-2','head': '-1','threshold': 10.0})
+			if args:
+				raise aswreg_v2.UsageError(command)
+			status = 0 if compare(**options) else 1
+		else:
+			raise aswreg_v2.UsageError(command)
+	except aswreg_v2.UsageError:
+		print(usage,file=stdout if command == '' else stderr)
+		status = 0 if command == '' else 2
+	sys.exit(status)
@@ -0,0 +1,281 @@
+#!/usr/bin/python
+# license roster as a fixed-width binary file that is searched and renewed
+# in place through mmap, so the roster never has to fit in memory
+# the file is a header and 24-byte records sorted by (name hash, number,
+# game); every field is big-endian so comparing raw record bytes gives the
+# key order and a lookup is a binary search over the mapped file
+# a record keeps the hash2 timestamp and the checksum bits of hash1 and
+# hash2, which is all a renew needs: the new code is the old one with the
+# time bits and the checksum swapped, no name or hash1 required
+import bisect
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import sys
+from sys import argv, stdout, stderr, stdin
+
+import aswreg_memo
+import aswreg_v2
+import aswreg_v2int as fast
+
+
+MAGIC = b'ASWRLDB1'
+HEADER = struct.Struct('>8sII') # magic, format version, record size
+RECORD = struct.Struct('>QIBBBxQ') # name hash, number, game, timestamp, checks, bincode
+KEY_SIZE = 13 # name hash, number, game
+FORMAT_VERSION = 1
+GAMES = ('EV Nova','Garendall') # game byte -> game
+
+def name_hash(name): # 64-bit hash of the normalized name
+	return int.from_bytes(hashlib.blake2b(aswreg_memo.normalize(name,0,'')[0].encode('utf-8'),digest_size=8).digest(),'big')
+
+def check_number(number):
+	if not 0 <= number < 1 << 32:
+		raise ValueError('number out of range: %d' % number)
+	return number
+
+def check_timestamp(timestamp):
+	if not 0 <= timestamp <= 0xff:
+		raise ValueError('timestamp out of range: %d' % timestamp)
+	return timestamp
+
+def key(name,number=None,game=None): # key prefix, as long as the fields given
+	prefix = struct.pack('>Q',name_hash(name))
+	if number is not None:
+		prefix += struct.pack('>I',check_number(number))
+		if game is not None:
+			if game not in GAMES:
+				raise ValueError('unknown game: ' + str(game))
+			prefix += bytes([GAMES.index(game)])
+	return prefix
+
+# checks byte: hash1 checksum << 3 | checksum hash2 should have, the second
+# is the full recompute so a renew fixes a bad checksum like renew_code does
+def make_record(code,name,number,game):
+	if game not in GAMES:
+		raise ValueError('unknown game: ' + str(game))
+	check_number(number)
+	bincode = fast.textcode_to_int(code)
+	hash1 = fast.get_hash1(name,number,game)
+	hash2 = bincode ^ hash1
+	checks = (fast.get_hash2_checksum(hash1) << 3) | fast.hash2_checksum(hash2)
+	return RECORD.pack(name_hash(name),number,GAMES.index(game),fast.get_hash2_time(hash2),checks,bincode)
+
+# (bincode, timestamp, checks) after a renew to timestamp
+def renew_fields(bincode,timestamp,checks,new_timestamp):
+	old = fast.set_hash2_checksum(fast.set_hash2_time(0,timestamp),checks & 7)
+	checksum = fast.get_hash2_checksum(fast.set_hash2_time_valid(old,new_timestamp))
+	bincode = fast.set_hash2_time(bincode,fast.get_hash2_time(bincode) ^ timestamp ^ new_timestamp)
+	return (fast.set_hash2_checksum(bincode,(checks >> 3) ^ checksum),new_timestamp,(checks & 0x38) | checksum)
+
+
+
+### DATABASE
+class RecordKeys: # the mapped records' keys as a sequence for bisect
+	def __init__(self,db):
+		self.db = db
+
+	def __len__(self):
+		return len(self.db)
+
+	def __getitem__(self,i):
+		start = HEADER.size + i * RECORD.size
+		return self.db.map[start:start + KEY_SIZE]
+
+class LicenseDB:
+	def __init__(self,path,writable=False):
+		self.path = path
+		self.file = open(path,'r+b' if writable else 'rb')
+		self.map = mmap.mmap(self.file.fileno(),0,access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+		(magic,version,size) = HEADER.unpack_from(self.map,0)
+		if magic != MAGIC or version != FORMAT_VERSION or size != RECORD.size:
+			self.close()
+			raise ValueError('not a version %d license database: %s' % (FORMAT_VERSION,path))
+		self.count = (len(self.map) - HEADER.size) // RECORD.size
+
+	def __len__(self):
+		return self.count
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self,*exc):
+		self.close()
+
+	def close(self):
+		self.map.close()
+		self.file.close()
+
+	def record(self,i): # (name hash, number, game, timestamp, checks, bincode)
+		return RECORD.unpack_from(self.map,HEADER.size + i * RECORD.size)
+
+	def records(self):
+		for i in range(0,self.count):
+			yield self.map[HEADER.size + i * RECORD.size:HEADER.size + (i + 1) * RECORD.size]
+
+	# record numbers whose key starts with prefix, O(log n) to find the first
+	def find(self,prefix):
+		keys = RecordKeys(self)
+		start = bisect.bisect_left(keys,prefix)
+		end = bisect.bisect_right(keys,prefix + b'\xff' * (KEY_SIZE - len(prefix)),start)
+		return range(start,end)
+
+	# licenses for a customer: [(number, game, timestamp, text code)]
+	def lookup(self,name,number=None,game=None):
+		results = []
+		for i in self.find(key(name,number,game)):
+			(hashed,number,game_id,timestamp,checks,bincode) = self.record(i)
+			results.append((number,GAMES[game_id],timestamp,fast.int_to_textcode(bincode)))
+		return results
+
+	# renews records in place, all of them or those in indices, to timestamp
+	# (Garendall ones always to 0xff, like renew_code); returns the count
+	def renew(self,timestamp=None,indices=None,game=None):
+		timestamp = fast.get_current_timestamp() if timestamp is None else check_timestamp(timestamp)
+		if game is not None and game not in GAMES:
+			raise ValueError('unknown game: ' + str(game))
+		if indices is None and game is None:
+			try:
+				return self.renew_all_many(timestamp)
+			except ImportError: # no numpy, one record at a time
+				pass
+		count = 0
+		for i in range(0,self.count) if indices is None else indices:
+			(hashed,number,game_id,old_timestamp,checks,bincode) = self.record(i)
+			if game is None or GAMES[game_id] == game:
+				fields = renew_fields(bincode,old_timestamp,checks,0xff if GAMES[game_id] == 'Garendall' else timestamp)
+				RECORD.pack_into(self.map,HEADER.size + i * RECORD.size,hashed,number,game_id,fields[1],fields[2],fields[0])
+				count += 1
+		return count
+
+	# the same on numpy views of the mapped records, in chunks so memory
+	# stays bounded
+	def renew_all_many(self,timestamp,chunk=1 << 20):
+		import numpy as np
+		import aswreg_v2np as vec
+		dtype = np.dtype([('name','>u8'),('number','>u4'),('game','u1'),('timestamp','u1'),('checks','u1'),('pad','u1'),('code','>u8')])
+		U64 = np.uint64
+		for start in range(0,self.count,chunk):
+			view = np.frombuffer(self.map,dtype=dtype,count=min(chunk,self.count - start),offset=HEADER.size + start * RECORD.size)
+			old_timestamp = view['timestamp'].astype(U64)
+			checks = view['checks'].astype(U64)
+			new_timestamp = np.where(view['game'] == GAMES.index('Garendall'),U64(0xff),U64(timestamp))
+			old = vec.set_hash2_checksum_many(vec.set_hash2_time_many(np.zeros(len(view),dtype=U64),old_timestamp),checks & U64(7))
+			checksum = vec.get_hash2_checksum_many(vec.set_hash2_time_valid_many(old,new_timestamp))
+			bincode = view['code'].astype(U64)
+			bincode = vec.set_hash2_time_many(bincode,vec.get_hash2_time_many(bincode) ^ old_timestamp ^ new_timestamp)
+			view['code'] = vec.set_hash2_checksum_many(bincode,(checks >> U64(3)) ^ checksum)
+			view['timestamp'] = new_timestamp
+			view['checks'] = (checks & U64(0x38)) | checksum
+			del view # the map can't close while a view holds it
+		return self.count
+
+	def flush(self):
+		self.map.flush()
+
+
+
+### IMPORT
+# records are sorted in runs of chunk_size and merged with the current file
+# into a new one that replaces it, so memory holds one run at a time; a
+# license imported again replaces the stored one
+def write_run(records,directory):
+	records.sort(key=lambda record: record[:KEY_SIZE]) # stable, the latest import stays last
+	(fd,path) = tempfile.mkstemp(suffix='.run',dir=directory)
+	with os.fdopen(fd,'wb') as f:
+		f.write(b''.join(records))
+	return path
+
+def read_run(path):
+	with open(path,'rb') as f:
+		while True:
+			record = f.read(RECORD.size)
+			if not record:
+				break
+			yield record
+
+def import_records(path,lines,chunk_size=1000000):
+	directory = os.path.dirname(os.path.abspath(path))
+	(runs,records,errors) = ([],[],[])
+	try:
+		for (line_no,source,record) in aswreg_v2.read_batch(lines):
+			try:
+				if not isinstance(record,dict):
+					raise ValueError('bad record: ' + str(record))
+				records.append(make_record(record.get('code'),record.get('name'),int(record.get('number')),record.get('game')))
+			except (ValueError,TypeError,KeyError,struct.error) as e:
+				errors.append((line_no,'%s: %s' % (type(e).__name__,e)))
+			if len(records) >= chunk_size:
+				runs.append(write_run(records,directory))
+				records = []
+		if records:
+			runs.append(write_run(records,directory))
+
+		old = LicenseDB(path) if os.path.exists(path) else None
+		sources = ([old.records()] if old else []) + [read_run(run) for run in runs] # oldest first
+		(fd,new_path) = tempfile.mkstemp(suffix='.db',dir=directory)
+		count = 0
+		with os.fdopen(fd,'wb') as f:
+			f.write(HEADER.pack(MAGIC,FORMAT_VERSION,RECORD.size))
+			previous = None
+			for record in heapq.merge(*sources,key=lambda record: record[:KEY_SIZE]):
+				if previous is not None and previous[:KEY_SIZE] != record[:KEY_SIZE]:
+					f.write(previous)
+					count += 1
+				previous = record
+			if previous is not None:
+				f.write(previous)
+				count += 1
+		if old:
+			old.close()
+		os.replace(new_path,path)
+	finally:
+		for run in runs:
+			os.remove(run)
+	return (count,errors)
+
+
+usage = """Usage\n-----\n
+Import licenses from CSV or JSON lines (code,name,number,game; stdin by default) into a database:
+import <db> (optional: <file>) (optional: --chunk-size 1000000)\n
+Find a customer's licenses (number and game optional):
+lookup <db> "<name>" (optional: <number> "<game>")
+  prints number, game, timestamp, approximate date (first decade) and code, tab separated\n
+Renew every license in place (or one game's), to now or to a timestamp:
+renew <db> (optional: --game "<game>" --timestamp N)\n"""
+
+if __name__ == '__main__':
+	status = 0
+	command = argv[1] if len(argv) > 1 else ''
+	try:
+		(args,options) = aswreg_v2.parse_options(argv[2:],{'chunk_size': 1000000,'game': '','timestamp': -1})
+		if command == 'import' and len(args) in (1,2):
+			with open(args[1]) if len(args) == 2 and args[1] != '-' else stdin as f:
+				(count,errors) = import_records(args[0],f,options['chunk_size'])
+			for (line_no,error) in errors:
+				print('line %d: %s' % (line_no,error))
+			print('%d licenses in %s' % (count,args[0]))
+			status = 1 if errors else 0
+		elif command == 'lookup' and len(args) in (2,3,4):
+			with LicenseDB(args[0]) as db:
+				results = db.lookup(args[1],aswreg_v2.int_arg(args[2]) if len(args) > 2 else None,args[3] if len(args) > 3 else None)
+			for (number,game,timestamp,code) in results:
+				print('%d\t%s\t%d\t%s\t%s' % (number,game,timestamp,fast.timestamp_to_datetime(timestamp),code))
+			status = 0 if results else 1
+		elif command == 'renew' and len(args) == 1:
+			with LicenseDB(args[0],writable=True) as db:
+				count = db.renew(options['timestamp'] if options['timestamp'] != -1 else None,game=options['game'] or None)
+				db.flush()
+			print('renewed %d licenses' % count)
+		else:
+			raise aswreg_v2.UsageError(command)
+	except aswreg_v2.UsageError:
+		print(usage,file=stdout if command == '' else stderr)
+		status = 0 if command == '' else 2
+	except ValueError as e: # unknown game, out of range, not a database: the inputs, not the usage
+		print('error: %s' % e,file=stderr)
+		status = 2
+	sys.exit(status)
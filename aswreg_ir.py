@@ -0,0 +1,1196 @@
+# register-program IR for the hash2 factor routines (make_hash2_f1/f2) and a
+# compiler that turns a program into a specialized straight-line python
+# function, either on ints (aswreg_v2int) or on numpy uint32 lanes (aswreg_v2np)
+# the programs below are the one source of truth for every non-BitArray engine
+import hashlib
+import os
+
+
+M32 = 0xFFFFFFFF
+CHAR_BITS = 0x1FFFFF # widest value ord() can return
+
+# bump when the generated code changes so stale disk caches are ignored
+COMPILER_VERSION = 2
+CACHE_DIR = os.environ.get('ASWREG_IR_CACHE',os.path.join(os.path.dirname(os.path.abspath(__file__)),'__pycache__'))
+
+
+
+### PROGRAMS
+# one tuple per instruction, registers are strings, immediates are ints
+#   ('li',d,imm)                 d = imm
+#   ('number',d)                 d = copy count (32-bit)
+#   ('name',d,k)                 d = name[k%ln]
+#   ('game',d,k)                 d = game[k]
+#   ('mr',d,a)                   d = a
+#   ('addi',d,a,imm)             d = a + imm (32-bit wrap)
+#   ('xor',d,a,b)                d = a ^ b
+#   ('srwi',d,a,n)               d = a >> n
+#   ('slwi',d,a,n)               d = a << n (32-bit)
+#   ('rlwinm',d,a,shift,mb,me)   d = rotate_mask_and(a,shift,mb,me)
+#   ('rlwimi',d,a,shift,mb,me)   d = rotate_mask_insert(d,a,shift,mb,me)
+#   ('if',(cmp,a,b),[...])       run the block if a cmp b, cmp is 'gt'/'lt', b a register or immediate
+#   ('ret',a)                    return the low 16 bits of a
+# shift/mb/me follow aswreg_v2core: negative shifts rotate left, mask bits
+# are numbered from the MSB ('t' is scratch for the rlwinm half of an xor)
+
+# these programs for EV Nova only
+MAKE_HASH2_F1 = [
+  ('number','r31'),
+
+  ('li','r3',0),
+  ('addi','r3','r3',-100),
+  ('name','r0',12),
+  ('game','r25',0), # E
+  ('xor','r3','r3','r0'),
+  ('name','r0',15),
+  ('addi','r3','r3',-61),
+  ('rlwinm','r4','r3',0,24,31),
+  ('srwi','r3','r4',6),
+  ('rlwinm','t','r4',-2,22,29),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r4','r3',0,24,31),
+  ('xor','r4','r4','r25'),
+  ('xor','r4','r4','r0'),
+  ('rlwinm','r3','r4',-29,27,31),
+  ('rlwinm','t','r4',-5,19,26),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r0','r3',-26,30,31),
+  ('rlwinm','t','r3',-2,22,29),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',0,24,31),
+  ('addi','r3','r3',82),
+  ('rlwinm','r0','r3',-7,17,24),
+  ('rlwimi','r0','r3',-31,25,31),
+  ('rlwinm','r7','r0',0,24,31),
+  ('addi','r7','r7',99),
+  ('rlwinm','r0','r7',0,24,31),
+
+  ('if',('gt','r0',0x71),[
+      ('rlwinm','r0','r31',0,24,31),
+      ('xor','r0','r7','r0'),
+      ('rlwinm','r7','r0',0,24,31),
+  ]),
+
+  ('name','r3',3),
+  ('rlwinm','r0','r31',0,24,31),
+  ('name','r5',6),
+  ('xor','r7','r7','r3'),
+  ('name','r4',5),
+  ('rlwinm','r6','r7',-1,23,30),
+  ('game','r3',3), # N
+  ('rlwimi','r6','r7',-25,31,31),
+  ('game','r28',0), # E
+  ('rlwinm','r6','r6',0,24,31),
+  ('xor','r6','r6','r5'),
+  ('xor','r6','r6','r4'),
+  ('rlwinm','r4','r6',0,24,31),
+  ('addi','r18','r4',-42),
+  ('xor','r18','r18','r3'),
+  ('xor','r18','r18','r0'),
+  ('addi','r18','r18',-87),
+  ('xor','r18','r18','r28'),
+
+  # proc235 returns value in r3, unused
+
+  ('addi','r3','r18',89),
+  ('rlwinm','r0','r3',0,24,31),
+  ('srwi','r0','r0',7),
+  ('rlwinm','t','r3',-1,23,30),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',0,24,31),
+  ('addi','r3','r3',-0x73),
+  ('rlwinm','r0','r3',-29,27,31),
+  ('rlwinm','t','r3',-5,19,26),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',-27,29,31),
+  ('rlwinm','t','r0',-3,21,28),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r0','r3',-5,19,26),
+  ('rlwimi','r0','r3',-29,27,31),
+  ('rlwinm','r18','r0',0,24,31),
+  ('rlwinm','r0','r31',0,24,31),
+  ('xor','r18','r18','r0'),
+  ('addi','r18','r18',0xAC),
+  ('rlwinm','r0','r18',0,24,31),
+
+  ('if',('gt','r0',0x90),[
+      ('name','r0',4),
+      ('xor','r0','r18','r0'),
+      ('rlwinm','r18','r0',0,24,31),
+  ]),
+
+  # proc235 returns value in r3, unused
+
+  ('addi','r7','r18',-64),
+  ('game','r4',6), # a
+  ('rlwinm','r6','r7',-26,30,31),
+  ('name','r5',9),
+  ('rlwinm','t','r7',-2,22,29),
+  ('xor','r6','r6','t'),
+  ('name','r3',2),
+  ('rlwinm','r6','r6',0,24,31),
+  ('name','r0',12),
+  ('xor','r6','r6','r4'),
+  ('xor','r6','r6','r5'),
+  ('xor','r6','r6','r3'),
+  ('xor','r6','r6','r28'),
+  ('addi','r4','r6',-39),
+  ('rlwinm','r3','r4',-31,25,31),
+  ('rlwinm','t','r4',-7,17,24),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r3','r3',0,24,31),
+  ('xor','r3','r3','r5'),
+  ('xor','r3','r3','r0'),
+  ('rlwinm','r0','r31',0,24,31),
+  ('xor','r3','r3','r0'),
+  ('rlwinm','r0','r3',-7,17,24),
+  ('rlwimi','r0','r3',-31,25,31),
+  ('rlwinm','r18','r0',0,24,31),
+  ('mr','r3','r18'),
+
+  # proc20 returns value in r3, unused
+
+  ('rlwinm','r0','r31',0,24,31),
+  ('xor','r18','r18','r0'),
+  ('addi','r0','r18',-0x69),
+  ('rlwinm','r3','r0',-25,31,31),
+  ('rlwinm','t','r0',-1,23,30),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r0','r3',-7,17,24),
+  ('rlwimi','r0','r3',-31,25,31),
+  ('rlwinm','r19','r0',0,24,31),
+
+  # proc235 returns value in r3, unused
+
+  ('mr','r3','r19'),
+
+  # proc20 returns value in r3, unused
+
+  ('game','r26',5), # v
+  ('addi','r19','r19',0x66),
+  ('xor','r19','r19','r26'),
+  ('addi','r19','r19',-0x81),
+  ('rlwinm','r0','r19',0,24,31),
+
+  ('if',('gt','r0',10),[
+      ('addi','r0','r19',-8),
+      ('rlwinm','r19','r0',0,24,31),
+  ]),
+
+  ('rlwinm','r0','r19',0,24,31),
+  ('game','r7',3), # N
+  ('srwi','r3','r0',4),
+  ('name','r5',14),
+  ('rlwinm','t','r19',-4,20,27),
+  ('xor','r3','r3','t'),
+  ('game','r6',4), # o
+  ('rlwinm','r9','r3',0,24,31),
+  ('name','r0',12),
+  ('srwi','r8','r9',1),
+  ('game','r4',1), # V
+  ('rlwinm','t','r9',-7,17,24),
+  ('xor','r8','r8','t'),
+  ('name','r3',4),
+  ('rlwinm','r9','r8',0,24,31),
+  ('srwi','r8','r9',5),
+  ('rlwinm','t','r9',-3,21,28),
+  ('xor','r8','r8','t'),
+  ('rlwinm','r8','r8',0,24,31),
+  ('xor','r8','r8','r7'),
+  ('rlwinm','r8','r8',0,24,31),
+  ('srwi','r7','r8',4),
+  ('rlwinm','t','r8',-4,20,27),
+  ('xor','r7','r7','t'),
+  ('rlwinm','r8','r7',0,24,31),
+  ('srwi','r7','r8',7),
+  ('rlwinm','t','r8',-1,23,30),
+  ('xor','r7','r7','t'),
+  ('rlwinm','r8','r7',0,24,31),
+  ('xor','r8','r8','r26'),
+  ('rlwinm','r7','r8',0,24,31),
+  ('srwi','r7','r7',4),
+  ('rlwinm','t','r8',-4,20,27),
+  ('xor','r7','r7','t'),
+  ('rlwinm','r7','r7',0,24,31),
+  ('addi','r7','r7',62),
+  ('xor','r7','r7','r5'),
+  ('xor','r7','r7','r28'),
+  ('rlwinm','r5','r31',0,24,31),
+  ('xor','r7','r7','r5'),
+  ('xor','r7','r7','r6'),
+  ('rlwinm','r6','r7',0,24,31),
+  ('srwi','r6','r6',7),
+  ('rlwinm','t','r7',-1,23,30),
+  ('xor','r6','r6','t'),
+  ('rlwinm','r7','r6',0,24,31),
+  ('addi','r7','r7',-6),
+  ('xor','r7','r7','r25'),
+  ('rlwinm','r6','r7',0,24,31),
+  ('srwi','r6','r6',4),
+  ('rlwinm','t','r7',-4,20,27),
+  ('xor','r6','r6','t'),
+  ('rlwinm','r7','r6',0,24,31),
+  ('srwi','r6','r7',5),
+  ('rlwinm','t','r7',-3,21,28),
+  ('xor','r6','r6','t'),
+  ('rlwinm','r7','r6',0,24,31),
+  ('srwi','r6','r7',3),
+  ('rlwinm','t','r7',-5,19,26),
+  ('xor','r6','r6','t'),
+  ('rlwinm','r7','r6',-31,25,31),
+  ('rlwinm','t','r6',-7,17,24),
+  ('xor','r7','r7','t'),
+  ('rlwinm','r6','r7',-26,30,31),
+  ('rlwinm','t','r7',-2,22,29),
+  ('xor','r6','r6','t'),
+  ('rlwinm','r7','r6',0,24,31),
+  ('addi','r7','r7',-80),
+  ('xor','r7','r7','r0'),
+  ('rlwinm','r6','r7',-2,22,29),
+  ('rlwimi','r6','r7',-26,30,31),
+  ('rlwinm','r6','r6',0,24,31),
+  ('addi','r6','r6',0xBC),
+  ('xor','r6','r6','r4'),
+  ('addi','r6','r6',-0x75),
+  ('xor','r6','r6','r3'),
+  ('xor','r6','r6','r0'),
+  ('name','r0',1),
+  ('rlwinm','r3','r6',-8,16,23),
+  ('rlwinm','t','r6',0,24,31),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r3','r3',0,24,31),
+  ('xor','r3','r3','r0'),
+  ('xor','r3','r3','r5'),
+  ('rlwinm','r0','r3',0,24,31),
+  ('srwi','r0','r0',1),
+  ('rlwinm','t','r3',-7,17,24),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',0,24,31),
+  ('rlwinm','r0','r0',-27,29,31),
+  ('rlwinm','t','r3',-3,21,28),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',0,24,31),
+  ('addi','r3','r3',0x69),
+  ('rlwinm','r0','r3',-30,26,31),
+  ('rlwinm','t','r3',-6,18,25),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',-8,16,23),
+  ('rlwinm','t','r0',0,24,31),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r0','r3',-3,21,28),
+  ('rlwimi','r0','r3',-27,29,31),
+  ('rlwinm','r25','r0',0,24,31),
+
+  # proc1182 returns current timnestamp in r3
+  # r0 = rotate_mask_and(r3,0,24,31)
+  # r19 = rotate_mask_and(r25,-0,29,30)
+  # r3 = r25 ^ r0
+  # overwritten shortly, so unused
+
+  ('rlwinm','r0','r19',0,24,31),
+  ('addi','r19','r19',-1),
+  # proc189 call is bypassed as long as r19 minus 1 is not equal to r19[24:]
+
+  ('game','r3',1), # V
+  ('name','r0',12),
+  ('xor','r25','r25','r3'),
+  ('game','r3',2), # " "
+  ('xor','r25','r25','r0'),
+  ('name','r0',1),
+  ('rlwinm','r4','r25',-6,18,25),
+  ('rlwimi','r4','r25',-30,26,31),
+  ('rlwinm','r5','r4',0,24,31),
+  ('xor','r5','r5','r3'),
+  ('xor','r5','r5','r0'),
+  ('rlwinm','r0','r5',0,24,31),
+
+  ('if',('gt','r0',0xDB),[
+      ('xor','r0','r5','r28'),
+      ('rlwinm','r5','r0',0,24,31),
+  ]),
+
+  ('name','r0',6),
+  ('xor','r5','r5','r0'),
+  ('rlwinm','r0','r5',0,24,31),
+
+  ('if',('gt','r0',0xA2),[
+      ('mr','r5','r0'),
+  ]),
+
+  ('name','r4',13),
+  ('addi','r5','r5',0x7B),
+  ('rlwinm','r3','r31',0,24,31),
+  ('name','r0',5),
+  ('xor','r5','r5','r4'),
+  ('xor','r5','r5','r3'),
+  ('rlwinm','r4','r5',-25,31,31),
+  ('rlwinm','t','r5',-1,23,30),
+  ('xor','r4','r4','t'),
+  ('rlwinm','r3','r4',-2,22,29),
+  ('rlwimi','r3','r4',-26,30,31),
+  ('rlwinm','r5','r3',0,24,31),
+  ('xor','r5','r5','r0'),
+  ('rlwinm','r0','r5',0,24,31),
+
+  ('ret','r0'),
+]
+
+MAKE_HASH2_F2 = [
+  ('number','r31'),
+
+  ('li','r19',0),
+
+  ('rlwinm','r3','r31',0,24,31),
+  ('name','r0',5),
+  ('xor','r19','r19','r3'),
+  ('addi','r19','r19',50),
+  ('xor','r19','r19','r3'),
+  ('rlwinm','r3','r19',0,24,31),
+
+  ('if',('lt','r3','r0'),[
+      ('addi','r0','r19',90),
+      ('rlwinm','r19','r0',0,24,31),
+  ]),
+
+  ('game','r4',5), # v
+  ('rlwinm','r3','r31',0,24,31),
+  ('name','r0',3),
+  ('xor','r19','r19','r4'),
+  ('addi','r19','r19',0x6A),
+  ('xor','r19','r19','r3'),
+  ('xor','r19','r19','r0'),
+
+  # proc235 returns value in r3, unused
+
+  ('name','r0',14),
+  ('game','r28',2), # " "
+  ('xor','r19','r19','r0'),
+  ('rlwinm','r0','r19',-28,28,31),
+  ('rlwinm','t','r19',-4,20,27),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',0,24,31),
+  ('xor','r3','r3','r28'),
+  ('addi','r0','r3',-28),
+  ('rlwinm','r3','r0',-8,16,23),
+  ('rlwinm','t','r0',0,24,31),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r0','r3',-3,21,28),
+  ('rlwimi','r0','r3',-27,29,31),
+  ('rlwinm','r3','r0',0,24,31),
+  ('addi','r3','r3',2),
+  ('rlwinm','r0','r3',0,24,31),
+
+  ('if',('gt','r0',0xCC),[
+      ('rlwinm','r0','r3',-7,17,24),
+      ('rlwimi','r0','r3',-31,25,31),
+      ('rlwinm','r3','r0',0,24,31),
+  ]),
+
+  ('rlwinm','r0','r3',-28,28,31),
+  ('rlwinm','t','r3',-4,20,27),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',0,24,31),
+  ('addi','r0','r3',-0x7C),
+  ('rlwinm','r3','r0',-26,30,31),
+  ('rlwinm','t','r0',-2,22,29),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r0','r3',-4,20,27),
+  ('rlwimi','r0','r3',-28,28,31),
+  ('rlwinm','r18','r0',0,24,31),
+
+  # proc1162 and proc1161 appear unused, although they change r0-r12 values
+
+  ('game','r27',0), # E
+  ('rlwinm','r0','r31',0,24,31),
+  ('name','r3',11),
+  ('xor','r18','r18','r27'),
+  ('xor','r18','r18','r3'),
+  ('rlwinm','r4','r18',-28,28,31),
+  ('rlwinm','t','r18',-4,20,27),
+  ('xor','r4','r4','t'),
+  ('rlwinm','r3','r4',-28,28,31),
+  ('rlwinm','t','r4',-4,20,27),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r3','r3',0,24,31),
+  ('xor','r3','r3','r0'),
+  ('rlwinm','r0','r3',-6,18,25),
+  ('rlwimi','r0','r3',-30,26,31),
+  ('rlwinm','r4','r0',0,24,31),
+
+  ('if',('gt','r4',0x79),[
+      ('game','r0',0), # E
+      ('xor','r0','r4','r0'),
+      ('rlwinm','r4','r0',0,24,31),
+  ]),
+
+  ('rlwinm','r3','r31',0,24,31),
+  ('xor','r4','r4','r3'),
+  ('rlwinm','r0','r4',-26,30,31),
+  ('rlwinm','t','r4',-2,22,29),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r0','r0',0,24,31),
+  ('xor','r0','r0','r3'),
+  ('rlwinm','r3','r0',-28,28,31),
+  ('rlwinm','t','r0',-4,20,27),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r0','r3',-1,23,30),
+  ('rlwimi','r0','r3',-25,31,31),
+  ('rlwinm','r18','r0',0,24,31),
+
+  # bl       proc188
+  # mullw    r3,r18,r3
+  # seems that r3 is just 1 upon return from 188 in normal operation, so use mr r3,r18
+  ('mr','r3','r18'),
+
+  ('game','r0',1), # V
+  ('game','r19',6), # a
+  ('rlwinm','r3','r3',0,24,31),
+  ('xor','r18','r3','r0'),
+  ('addi','r18','r18',-47),
+  ('xor','r18','r18','r19'),
+  ('addi','r18','r18',36),
+  ('rlwinm','r0','r18',0,24,31),
+  ('mr','r26','r28'),
+
+  ('if',('lt','r0','r26'),[
+      ('name','r0',8),
+      ('xor','r0','r18','r0'),
+      ('rlwinm','r18','r0',0,24,31),
+  ]),
+
+  ('rlwinm','r3','r31',0,24,31),
+  ('game','r0',4), # o
+  ('xor','r18','r18','r3'),
+  ('xor','r18','r18','r0'),
+
+  # proc1162 and proc1161 appear unused, although they change r0-r12 values
+
+  ('name','r4',9),
+  ('name','r0',0),
+  ('xor','r18','r18','r4'),
+  ('xor','r18','r18','r0'),
+  ('rlwinm','r18','r18',0,24,31),
+
+  # lbzx     r3,r21,r18
+  # addi     r0,r3,1
+  # stbx     r0,r21,r18
+  # this snippet appears to be storing some sort of counter
+  # perhaps used when flagging too many attempts or invalid codes
+  # (codes can be blacklisted locally in the saved license file)
+
+  ('if',('gt','r18','r0'),[
+      ('slwi','r0','r18',7),
+      ('rlwimi','r0','r18',-31,25,31),
+      ('rlwinm','r18','r0',0,24,31),
+  ]),
+
+  ('addi','r18','r18',29),
+  ('xor','r18','r18','r28'),
+  ('xor','r18','r18','r4'),
+
+  # proc235 returns value in r3, unused
+
+  ('name','r3',2), # C
+  ('rlwinm','r0','r31',0,24,31),
+  ('xor','r18','r18','r3'),
+  ('rlwinm','r3','r18',-6,18,25),
+  ('rlwimi','r3','r18',-30,26,31),
+  ('rlwinm','r21','r3',0,24,31),
+  ('xor','r21','r21','r19'),
+  ('xor','r21','r21','r0'),
+
+  # proc235 returns value in r3, unused
+
+  ('rlwinm','r0','r31',0,24,31),
+  ('name','r4',6),
+  ('addi','r21','r21',-0xC3),
+  ('game','r28',2), # " '"
+  ('xor','r21','r21','r0'),
+  ('name','r3',3),
+  ('rlwinm','r5','r21',-8,16,23),
+  ('rlwinm','t','r21',0,24,31),
+  ('xor','r5','r5','t'),
+  ('rlwinm','r6','r5',0,24,31),
+  ('srwi','r5','r6',5),
+  ('rlwinm','t','r6',-3,21,28),
+  ('xor','r5','r5','t'),
+  ('rlwinm','r5','r5',0,24,31),
+  ('addi','r6','r5',-3),
+  ('rlwinm','r5','r6',-8,16,23),
+  ('rlwinm','t','r6',0,24,31),
+  ('xor','r5','r5','t'),
+  ('rlwinm','r5','r5',0,24,31),
+  ('addi','r5','r5',-60),
+  ('rlwinm','r5','r5',0,24,31),
+  ('xor','r6','r5','r27'),
+  ('rlwinm','r5','r6',0,24,31),
+  ('srwi','r5','r5',1),
+  ('rlwinm','t','r6',-7,17,24),
+  ('xor','r5','r5','t'),
+  ('rlwinm','r6','r5',0,24,31),
+  ('srwi','r5','r6',3),
+  ('rlwinm','t','r6',-5,19,26),
+  ('xor','r5','r5','t'),
+  ('rlwinm','r5','r5',0,24,31),
+  ('addi','r6','r5',8),
+  ('rlwinm','r5','r6',0,24,31),
+  ('srwi','r5','r5',2),
+  ('rlwinm','t','r6',-6,18,25),
+  ('xor','r5','r5','t'),
+  ('rlwinm','r5','r5',0,24,31),
+  ('xor','r5','r5','r4'),
+  ('xor','r5','r5','r28'),
+  ('xor','r5','r5','r3'),
+  ('addi','r5','r5',-27),
+  ('xor','r5','r5','r0'),
+  ('rlwinm','r0','r5',0,24,31),
+  ('srwi','r0','r0',5),
+  ('rlwinm','t','r5',-3,21,28),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',-31,25,31),
+  ('rlwinm','t','r0',-7,17,24),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r0','r3',-30,26,31),
+  ('rlwinm','t','r3',-6,18,25),
+  ('xor','r0','r0','t'),
+  ('rlwinm','r3','r0',0,24,31),
+  ('addi','r3','r3',-71),
+  ('rlwinm','r0','r3',-2,22,29),
+  ('rlwimi','r0','r3',-26,30,31),
+  ('rlwinm','r4','r0',0,24,31),
+  ('mr','r0','r28'),
+
+  ('if',('gt','r4','r0'),[
+      ('slwi','r0','r4',2),
+      ('rlwimi','r0','r4',-26,30,31),
+      ('rlwinm','r4','r0',0,24,31),
+  ]),
+
+  ('name','r3',13), # S
+  ('addi','r4','r4',75),
+  ('name','r0',8), # L
+  ('xor','r4','r4','r3'),
+  ('xor','r4','r4','r0'),
+  ('rlwinm','r0','r4',0,24,31),
+
+  ('if',('lt','r0',44),[
+      ('addi','r0','r4',-53),
+      ('rlwinm','r4','r0',0,24,31),
+  ]),
+
+  ('addi','r3','r4',73),
+  ('rlwinm','r0','r3',-6,18,25),
+  ('rlwimi','r0','r3',-30,26,31),
+  ('rlwinm','r18','r0',0,24,31),
+
+  # these next few lines seem irrelevant if skipping proc235
+  # cmp      cr0,0,r18,r26
+  # bc       IF_NOT,cr0_GT,lak_41
+  # bl       proc235
+
+  ('name','r0',10),
+  ('rlwinm','r4','r31',0,24,31),
+  ('name','r6',14),
+  ('xor','r18','r18','r0'),
+  ('name','r5',6),
+  ('addi','r8','r18',-45),
+  ('name','r3',4),
+  ('rlwinm','r7','r8',0,24,31),
+  ('name','r0',3),
+  ('srwi','r7','r7',1),
+  ('rlwinm','t','r8',-7,17,24),
+  ('xor','r7','r7','t'),
+  ('rlwinm','r7','r7',0,24,31),
+  ('addi','r7','r7',34),
+  ('xor','r7','r7','r6'),
+  ('rlwinm','r6','r7',0,24,31),
+  ('srwi','r6','r6',6),
+  ('rlwinm','t','r7',-2,22,29),
+  ('xor','r6','r6','t'),
+  ('rlwinm','r6','r6',0,24,31),
+  ('xor','r6','r6','r5'),
+  ('rlwinm','r5','r6',0,24,31),
+  ('srwi','r5','r5',5),
+  ('rlwinm','t','r6',-3,21,28),
+  ('xor','r5','r5','t'),
+  ('rlwinm','r6','r5',0,24,31),
+  ('rlwinm','r5','r5',-29,27,31),
+  ('rlwinm','t','r6',-5,19,26),
+  ('xor','r5','r5','t'),
+  ('rlwinm','r5','r5',0,24,31),
+  ('xor','r5','r5','r3'),
+  ('xor','r5','r5','r4'),
+  ('xor','r5','r5','r4'),
+  ('xor','r5','r5','r4'),
+  ('addi','r5','r5',86),
+  ('xor','r5','r5','r28'),
+  ('rlwinm','r3','r5',-25,31,31),
+  ('rlwinm','t','r5',-1,23,30),
+  ('xor','r3','r3','t'),
+  ('rlwinm','r5','r3',0,24,31),
+  ('xor','r5','r5','r4'),
+  ('rlwinm','r3','r5',-7,17,24),
+  ('rlwimi','r3','r5',-31,25,31),
+  ('rlwinm','r19','r3',0,24,31),
+  ('xor','r19','r19','r0'),
+  ('xor','r19','r19','r4'),
+
+  # proc235 returns value in r3, unused
+
+  ('addi','r19','r19',0x6D),
+  ('rlwinm','r0','r19',0,24,31),
+
+  ('ret','r0'),
+]
+
+PROGRAMS = {'f1': MAKE_HASH2_F1, 'f2': MAKE_HASH2_F2}
+
+
+
+### REFERENCE INTERPRETER
+# direct evaluation of a program, the spec every compiled target must match
+def rotate(bits,num): # positive rotates right, like deque.rotate on MSB-first bits
+  num %= 32
+  return ((bits >> num) | (bits << (32 - num))) & M32
+
+def make_mask(num_mask_start,num_mask_end):
+  return ((1 << (num_mask_end + 1 - num_mask_start)) - 1) << (31 - num_mask_end)
+
+def run(program,name,number,game):
+  name = name.upper().replace(' ','')
+  return run_block(program,{},name,number,game)
+
+def run_block(block,regs,name,number,game):
+  for op in block:
+    kind = op[0]
+    if kind == 'li':
+      regs[op[1]] = op[2] & M32
+    elif kind == 'number':
+      regs[op[1]] = number & M32
+    elif kind == 'name':
+      regs[op[1]] = ord(name[op[2] % len(name)])
+    elif kind == 'game':
+      regs[op[1]] = ord(game[op[2]])
+    elif kind == 'mr':
+      regs[op[1]] = regs[op[2]]
+    elif kind == 'addi':
+      regs[op[1]] = (regs[op[2]] + op[3]) & M32
+    elif kind == 'xor':
+      regs[op[1]] = regs[op[2]] ^ regs[op[3]]
+    elif kind == 'srwi':
+      regs[op[1]] = regs[op[2]] >> op[3]
+    elif kind == 'slwi':
+      regs[op[1]] = (regs[op[2]] << op[3]) & M32
+    elif kind == 'rlwinm':
+      regs[op[1]] = rotate(regs[op[2]],op[3]) & make_mask(op[4],op[5])
+    elif kind == 'rlwimi':
+      mask = make_mask(op[4],op[5])
+      regs[op[1]] = (regs[op[1]] & ~mask & M32) | (rotate(regs[op[2]],op[3]) & mask)
+    elif kind == 'if':
+      (cmp,a,b) = op[1]
+      a = regs[a]
+      b = regs[b] if isinstance(b,str) else b
+      if (a > b) if cmp == 'gt' else (a < b):
+        run_block(op[2],regs,name,number,game)
+    elif kind == 'ret':
+      return regs[op[1]] & 0xFFFF
+    else:
+      raise ValueError('unknown instruction: ' + str(op))
+
+
+
+### EXPRESSION GRAPH
+# symbolic execution turns registers into a hash-consed DAG of value nodes,
+# which gives dead register removal (only what reaches 'ret' is emitted),
+# common subexpressions and constant folding for free
+# nodes: ('const',v) ('name',k) ('game',k) ('number',) ('add',a,imm)
+#   ('xor',a,b,...) ('shr',a,n) ('shl',a,n) ('rlwinm',a,shift,mask)
+#   ('rlwimi',d,a,shift,mask) ('gt',a,b) ('lt',a,b) ('select',c,a,b)
+#   ('table',b,values) values[b] for a byte b, see tabulate
+# node operands are indices into Graph.nodes
+class Graph:
+  def __init__(self,consts=None):
+    self.nodes = []
+    self.bits = [] # bits each node can possibly have set
+    self.index = {}
+    self.consts = consts or {} # leaf node -> known value, see specialize
+
+  def add(self,node):
+    node = self.simplify(node)
+    if isinstance(node,int): # simplified to an existing node
+      return node
+    if node in self.index:
+      return self.index[node]
+    self.nodes.append(node)
+    self.bits.append(self.possible_bits(node))
+    self.index[node] = len(self.nodes) - 1
+    return len(self.nodes) - 1
+
+  def const(self,value):
+    return self.add(('const',value & M32))
+
+  def value(self,n): # known constant value of a node or None
+    node = self.nodes[n]
+    return node[1] if node[0] == 'const' else None
+
+  def simplify(self,node):
+    kind = node[0]
+    if node in self.consts:
+      return ('const',self.consts[node])
+    if kind in ('const','name','game','number'):
+      return node
+
+    operands = node_operands(node)
+    if all(self.value(n) is not None for n in operands):
+      return ('const',evaluate(node,[self.value(n) for n in operands]))
+
+    if kind == 'add':
+      (a,imm) = node[1:]
+      if imm & M32 == 0:
+        return a
+      if self.nodes[a][0] == 'add': # (x + i) + j
+        return self.simplify(('add',self.nodes[a][1],(self.nodes[a][2] + imm) & M32))
+      return ('add',a,imm & M32)
+
+    if kind == 'xor': # flatten, cancel pairs and merge constants
+      terms = {}
+      value = 0
+      for n in operands:
+        for m in (node_operands(self.nodes[n]) if self.nodes[n][0] == 'xor' else (n,)):
+          if self.value(m) is not None:
+            value ^= self.value(m)
+          else:
+            terms[m] = terms.get(m,0) ^ 1
+      terms = sorted(m for m in terms if terms[m])
+      if value:
+        terms.append(self.add(('const',value)))
+      if not terms:
+        return ('const',0)
+      if len(terms) == 1:
+        return terms[0]
+      return ('xor',) + tuple(terms)
+
+    if kind in ('shr','shl'):
+      if node[2] == 0:
+        return node[1]
+      return node
+
+    if kind == 'rlwinm':
+      (a,shift,mask) = node[1:]
+      if rotate(self.bits[a],shift) & mask == 0:
+        return ('const',0)
+      if shift % 32 == 0 and self.bits[a] & ~mask == 0:
+        return a
+      if shift % 32 != 0 and self.bits[a] & ~0xFF and rotate(mask,-shift) & self.bits[a] & ~0xFF == 0:
+        # only the low byte of a survives the mask, read it through a byte
+        # node so the rotate can join a lookup table on that byte
+        return ('rlwinm',self.add(('rlwinm',a,0,0xFF)),shift,mask)
+      return node
+
+    if kind == 'rlwimi':
+      (d,a,shift,mask) = node[1:]
+      if self.bits[d] & ~mask == 0: # everything d can hold is replaced
+        return self.simplify(('rlwinm',a,shift,mask))
+      if shift % 32 != 0 and self.bits[a] & ~0xFF and rotate(mask,-shift) & self.bits[a] & ~0xFF == 0:
+        return ('rlwimi',d,self.add(('rlwinm',a,0,0xFF)),shift,mask)
+      return node
+
+    if kind == 'select':
+      (c,a,b) = node[1:]
+      if a == b:
+        return a
+      if self.value(c) is not None:
+        return a if self.value(c) else b
+      return node
+
+    return node
+
+  def possible_bits(self,node):
+    kind = node[0]
+    if kind == 'const':
+      return node[1]
+    if kind in ('name','game'):
+      return CHAR_BITS
+    if kind == 'number':
+      return M32
+    if kind == 'add':
+      top = self.bits[node[1]] + node[2]
+      return (1 << top.bit_length()) - 1 if top <= M32 else M32
+    if kind == 'xor':
+      bits = 0
+      for n in node[1:]:
+        bits |= self.bits[n]
+      return bits
+    if kind == 'shr':
+      return self.bits[node[1]] >> node[2]
+    if kind == 'shl':
+      return (self.bits[node[1]] << node[2]) & M32
+    if kind == 'rlwinm':
+      return rotate(self.bits[node[1]],node[2]) & node[3]
+    if kind == 'rlwimi':
+      return (self.bits[node[1]] & ~node[4]) | (rotate(self.bits[node[2]],node[3]) & node[4])
+    if kind in ('gt','lt'):
+      return 1
+    if kind == 'select':
+      return self.bits[node[2]] | self.bits[node[3]]
+    if kind == 'table':
+      bits = 0
+      for v in node[2]:
+        bits |= v
+      return bits
+    raise ValueError('unknown node: ' + str(node))
+
+  # value of node n when node source holds value (n only depends on source)
+  def evaluate_from(self,n,source,value,memo=None):
+    if memo is None:
+      memo = {source: value}
+    if n not in memo:
+      node = self.nodes[n]
+      if node[0] == 'const':
+        memo[n] = node[1]
+      else:
+        memo[n] = evaluate(node,[self.evaluate_from(m,source,value,memo) for m in node_operands(node)])
+    return memo[n]
+
+def node_operands(node):
+  kind = node[0]
+  if kind in ('add','shr','shl','rlwinm','table'):
+    return (node[1],)
+  if kind in ('xor','gt','lt','select'):
+    return node[1:]
+  if kind == 'rlwimi':
+    return node[1:3]
+  return ()
+
+def evaluate(node,values):
+  kind = node[0]
+  if kind == 'add':
+    return (values[0] + node[2]) & M32
+  if kind == 'xor':
+    result = 0
+    for v in values:
+      result ^= v
+    return result
+  if kind == 'shr':
+    return values[0] >> node[2]
+  if kind == 'shl':
+    return (values[0] << node[2]) & M32
+  if kind == 'rlwinm':
+    return rotate(values[0],node[2]) & node[3]
+  if kind == 'rlwimi':
+    return (values[0] & ~node[4] & M32) | (rotate(values[1],node[3]) & node[4])
+  if kind == 'gt':
+    return int(values[0] > values[1])
+  if kind == 'lt':
+    return int(values[0] < values[1])
+  if kind == 'select':
+    return values[1] if values[0] else values[2]
+  if kind == 'table':
+    return node[2][values[0]]
+  raise ValueError('cannot evaluate: ' + str(node))
+
+def replace_operands(node,operands):
+  return (node[0],) + tuple(operands) + node[1 + len(node_operands(node)):]
+
+# symbolic execution of a program, returns (graph, root node)
+def build(program,consts=None):
+  graph = Graph(consts)
+  regs = {}
+  root = build_block(graph,program,regs)
+  return (graph,graph.add(('rlwinm',root,0,0xFFFF)))
+
+def build_block(graph,block,regs):
+  for op in block:
+    kind = op[0]
+    if kind == 'li':
+      regs[op[1]] = graph.const(op[2])
+    elif kind == 'number':
+      regs[op[1]] = graph.add(('number',))
+    elif kind in ('name','game'):
+      regs[op[1]] = graph.add((kind,op[2]))
+    elif kind == 'mr':
+      regs[op[1]] = regs[op[2]]
+    elif kind == 'addi':
+      regs[op[1]] = graph.add(('add',regs[op[2]],op[3] & M32))
+    elif kind == 'xor':
+      regs[op[1]] = graph.add(('xor',regs[op[2]],regs[op[3]]))
+    elif kind == 'srwi':
+      regs[op[1]] = graph.add(('shr',regs[op[2]],op[3]))
+    elif kind == 'slwi':
+      regs[op[1]] = graph.add(('shl',regs[op[2]],op[3]))
+    elif kind == 'rlwinm':
+      regs[op[1]] = graph.add(('rlwinm',regs[op[2]],op[3] % 32,make_mask(op[4],op[5])))
+    elif kind == 'rlwimi':
+      regs[op[1]] = graph.add(('rlwimi',regs[op[1]],regs[op[2]],op[3] % 32,make_mask(op[4],op[5])))
+    elif kind == 'if':
+      (cmp,a,b) = op[1]
+      b = regs[b] if isinstance(b,str) else graph.const(b)
+      cond = graph.add((cmp,regs[a],b))
+      inner = build_block(graph,op[2],dict(regs)) # returns the block's registers
+      for (reg,n) in inner.items():
+        if reg not in regs:
+          regs[reg] = n
+        elif regs[reg] != n:
+          regs[reg] = graph.add(('select',cond,n,regs[reg]))
+    elif kind == 'ret':
+      return regs[op[1]]
+    else:
+      raise ValueError('unknown instruction: ' + str(op))
+  return regs
+
+
+
+### LOOKUP TABLES
+# most of f1/f2 is byte shuffling: a value masked to the low byte goes
+# through rotate/mask pairs, constant adds and even data-dependent selects
+# before anything else is mixed in, e.g. rotate_mask_and(x,-1,23,30) ^ (x >> 7)
+# is a byte rotate. every such subexpression that only depends on one byte
+# becomes a 256-entry lookup on that byte
+MIN_TABLE_OPS = 2 # a single op is as cheap as the lookup itself
+
+def tabulate(graph,root):
+  order = postorder(graph,root)
+  users = dict((n,[]) for n in order)
+  for n in order:
+    for m in node_operands(graph.nodes[n]):
+      users[m].append(n)
+
+  # source[n]: the one byte-valued node n is a function of, None if n
+  # mixes several inputs, 'const' for constants
+  source = {}
+  size = {} # ops between n and its source
+  for n in order:
+    node = graph.nodes[n]
+    operands = node_operands(node)
+    if node[0] == 'const':
+      source[n] = 'const'
+      continue
+    found = set(source[m] for m in operands) - set(['const'])
+    if operands and len(found) == 1 and None not in found:
+      source[n] = found.pop()
+      size[n] = 1 + sum(size.get(m,0) for m in operands if source[m] != 'const' and m != source[n])
+    elif graph.bits[n] & ~0xFF == 0:
+      source[n] = n
+    else:
+      source[n] = None
+
+  tables = set()
+  for n in order:
+    if source[n] not in (None,'const',n) and size[n] >= MIN_TABLE_OPS:
+      if n == root or any(source[u] != source[n] for u in users[n]):
+        tables.add(n)
+
+  new = Graph(graph.consts)
+  mapped = {}
+  for n in order:
+    node = graph.nodes[n]
+    if n in tables:
+      values = tuple(graph.evaluate_from(n,source[n],v) for v in range(0,256))
+      mapped[n] = new.add(('table',mapped[source[n]],values))
+    else:
+      mapped[n] = new.add(replace_operands(node,[mapped[m] for m in node_operands(node)]))
+  return (new,mapped[root])
+
+def postorder(graph,root):
+  order = []
+  seen = set()
+  stack = [(root,False)]
+  while stack:
+    (n,done) = stack.pop()
+    if done:
+      order.append(n)
+    elif n not in seen:
+      seen.add(n)
+      stack.append((n,True))
+      stack.extend((m,False) for m in node_operands(graph.nodes[n]) if m not in seen)
+  return order
+
+
+
+### CODE GENERATION
+# targets: 'int' works on python ints and has to mask back to 32 bits itself,
+# 'numpy' works on uint32 lanes where shifts and adds already wrap and
+# branches become np.where selects
+INLINE_DEPTH = 6 # deeper expressions get a local so the source stays readable
+
+class Emitter:
+  def __init__(self,graph,target):
+    self.graph = graph
+    self.target = target
+    self.wraps = target == 'numpy'
+    self.lines = []
+    self.names = {}
+    self.depth = {}
+    self.loose = {} # inlined int adds without their final & 0xFFFFFFFF
+    self.tables = {} # table values -> name
+
+  def emit(self,root):
+    uses = {}
+    for n in reachable(self.graph,root):
+      for m in node_operands(self.graph.nodes[n]):
+        uses[m] = uses.get(m,0) + 1
+    self.uses = uses
+    return self.expr(root)
+
+  def expr(self,n):
+    if n in self.names:
+      return self.names[n]
+    node = self.graph.nodes[n]
+    operands = [self.expr(m) for m in node_operands(node)]
+    depth = 1 + max([self.depth.get(m,0) for m in node_operands(node)] + [0])
+    text = self.format(n,node,operands)
+    if node[0] != 'const' and (self.uses.get(n,0) > 1 or depth > INLINE_DEPTH):
+      name = 'v%d' % len(self.names)
+      self.lines.append('%s = %s' % (name,text))
+      self.names[n] = name
+      depth = 0
+      text = name
+    self.depth[n] = depth
+    return text
+
+  def format(self,n,node,operands):
+    kind = node[0]
+    bits = self.graph.bits
+    if kind == 'const':
+      return 'U(%s)' % hex(node[1]) if self.wraps else hex(node[1])
+    if kind == 'name':
+      return 'name_at(chars,lengths,%d)' % node[1] if self.wraps else 'ord(name[%d %% ln])' % node[1]
+    if kind == 'game':
+      return 'game_chars[:,%d]' % node[1] if self.wraps else 'ord(game[%d])' % node[1]
+    if kind == 'number':
+      return 'number'
+    if kind == 'add':
+      if self.wraps or bits[node[1]] + node[2] <= M32:
+        return '(%s + %s)' % (operands[0],hex(node[2]))
+      self.loose[n] = '(%s + %s)' % (operands[0],hex(node[2]))
+      return '(%s & 0xFFFFFFFF)' % self.loose[n]
+    if kind == 'xor':
+      return '(%s)' % ' ^ '.join(operands)
+    if kind == 'shr':
+      return '(%s >> %d)' % (operands[0],node[2])
+    if kind == 'shl':
+      return self.masked('(%s << %d)' % (operands[0],node[2]),bits[node[1]] << node[2],M32)
+    if kind == 'rlwinm':
+      if node[2] == 0 and node[1] in self.loose and node[1] not in self.names:
+        # a plain mask already drops the carry, skip the add's own mask
+        return self.masked(self.loose[node[1]],bits[node[1]] | (1 << 32),node[3])
+      return self.rotate_mask(operands[0],bits[node[1]],node[2],node[3])
+    if kind == 'rlwimi':
+      (d,a,shift,mask) = node[1:]
+      keep = self.masked(operands[0],bits[d],~mask & M32)
+      return '(%s | %s)' % (keep,self.rotate_mask(operands[1],bits[a],shift,mask))
+    if kind in ('gt','lt'):
+      return '(%s %s %s)' % (operands[0],'>' if kind == 'gt' else '<',operands[1])
+    if kind == 'table':
+      if node[2] not in self.tables:
+        self.tables[node[2]] = 'T%d' % len(self.tables)
+      return '%s[%s]' % (self.tables[node[2]],operands[0])
+    if kind == 'select':
+      if self.wraps:
+        return 'np.where(%s, %s, %s)' % tuple(operands)
+      return '(%s if %s else %s)' % (operands[1],operands[0],operands[2])
+    raise ValueError('unknown node: ' + str(node))
+
+  # value & mask, leaving out the & when it cannot clear anything
+  def masked(self,text,bits,mask):
+    if self.wraps: # numpy already dropped everything past 32 bits
+      bits &= M32
+    if bits & ~mask == 0:
+      return text
+    return '(%s & %s)' % (text,hex(mask))
+
+  # rotate_mask_and fused into at most one shift-and-mask per direction,
+  # using the bits the value can have to drop dead halves and masks
+  def rotate_mask(self,text,bits,shift,mask):
+    left = (32 - shift) % 32
+    if left == 0:
+      return self.masked(text,bits,mask)
+    parts = []
+    if (bits << left) & mask:
+      parts.append(self.masked('(%s << %d)' % (text,left),bits << left,mask))
+    if (bits >> (32 - left)) & mask:
+      parts.append(self.masked('(%s >> %d)' % (text,32 - left),bits >> (32 - left),mask))
+    if not parts:
+      return 'U(0)' if self.wraps else '0'
+    if len(parts) == 1:
+      return parts[0]
+    return '(%s)' % ' | '.join(parts)
+
+def reachable(graph,root):
+  seen = set()
+  stack = [root]
+  while stack:
+    n = stack.pop()
+    if n not in seen:
+      seen.add(n)
+      stack.extend(node_operands(graph.nodes[n]))
+  return seen
+
+def function_name(program_name,target):
+  return 'make_hash2_%s%s' % (program_name,'_many' if target == 'numpy' else '')
+
+def generate_source(program_name,target,consts=None):
+  (graph,root) = tabulate(*build(PROGRAMS[program_name],consts))
+  emitter = Emitter(graph,target)
+  result = emitter.emit(root)
+  body = []
+  for (values,name) in sorted(emitter.tables.items(),key=lambda item: int(item[1][1:])):
+    values = ','.join(hex(v) for v in values)
+    if target == 'numpy':
+      body.append('%s = np.array((%s),dtype=np.uint32)' % (name,values))
+    else:
+      body.append('%s = (%s)' % (name,values))
+  if target == 'numpy':
+    body.append('def %s(names,numbers,games):' % function_name(program_name,target))
+    body.append('  (chars,lengths) = name_lanes(names)')
+    body.append('  game_chars = game_lanes(games,len(lengths))')
+    body.append('  number = numbers_to_lanes(numbers,len(lengths)).astype(np.uint32)')
+    body.extend(['  ' + line for line in emitter.lines])
+    body.append('  return np.broadcast_to(%s,lengths.shape).astype(np.uint16)' % result)
+  else:
+    body.append('def %s(name,number,game):' % function_name(program_name,target))
+    body.append("  name = name.upper().replace(' ','')")
+    body.append('  ln = len(name)')
+    body.append('  number &= 0xFFFFFFFF')
+    body.extend(['  ' + line for line in emitter.lines])
+    body.append('  return %s' % result)
+  header = '# generated by aswreg_ir from PROGRAMS[%r] for %s, do not edit\n' % (program_name,target)
+  return header + '\n'.join(body) + '\n'
+
+
+
+### LOADING
+# generated source is cached on disk keyed by program, target and compiler
+# version so a warm start only has to compile() the cached text
+def cache_key(program_name,target,consts=None):
+  text = repr((COMPILER_VERSION,PROGRAMS[program_name],target,sorted((consts or {}).items())))
+  return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def cached_source(program_name,target,consts=None):
+  path = os.path.join(CACHE_DIR,'aswreg_ir_%s_%s_%s.py' % (program_name,target,cache_key(program_name,target,consts)))
+  try:
+    with open(path) as f:
+      return (f.read(),path)
+  except OSError:
+    pass
+  source = generate_source(program_name,target,consts)
+  try: # a read-only checkout just regenerates every time
+    os.makedirs(CACHE_DIR,exist_ok=True)
+    with open(path + '.tmp%d' % os.getpid(),'w') as f:
+      f.write(source)
+    os.replace(path + '.tmp%d' % os.getpid(),path)
+  except OSError:
+    pass
+  return (source,path)
+
+# namespace supplies the helpers the target needs (numpy: np, U, name_lanes,
+# name_at, game_lanes, numbers_to_lanes); disk_cache=False generates the
+# source in memory only, for one-off variants that shouldn't leave files
+def load(program_name,target='int',namespace=None,consts=None,disk_cache=True):
+  if disk_cache:
+    (source,path) = cached_source(program_name,target,consts)
+  else:
+    (source,path) = (generate_source(program_name,target,consts),'<aswreg_ir %s>' % program_name)
+  scope = dict(namespace or {})
+  exec(compile(source,path,'exec'),scope)
+  return scope[function_name(program_name,target)]
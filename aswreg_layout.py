@@ -0,0 +1,176 @@
+# the hash2 field layout as data, compiled into mask-and-shift accessors on a
+# 64-bit int (aswreg_v2int) or on numpy uint64 arrays (aswreg_v2np)
+# positions keep the BitArray convention of aswreg_v2core (index 0 is the MSB)
+
+
+# time bit i (LSB first) lives at these positions
+TIME_BITS = (9,14,23,28,37,42,51,56)
+# nibble positions of each factor, most significant nibble first
+F1_NIBBLES = (5,47,33,19)
+F2_NIBBLES = (43,29,15,57)
+F3_NIBBLES = (24,10,52,38)
+
+# field -> (position, length) segments, most significant first
+FIELDS = {
+  'time': [(position,1) for position in reversed(TIME_BITS)],
+  'f1': [(position,4) for position in F1_NIBBLES],
+  'f2': [(position,4) for position in F2_NIBBLES],
+  'f3': [(position,4) for position in F3_NIBBLES],
+  'topbit': [(4,1)],
+  'checksum': [(61,3)],
+}
+# bits generate_code leaves at 0: the top 5 (unused and topbit) and f3
+UNUSED = [(0,5)] + FIELDS['f3']
+
+M64 = 0xFFFFFFFFFFFFFFFF
+
+def field_mask(segments): # bits of the 64-bit int the segments cover
+  mask = 0
+  for (position,length) in segments:
+    mask |= ((1 << length) - 1) << (64 - position - length)
+  return mask
+
+# segments that move by the same shift between field and hash2 share one
+# mask-and-shift; returns [(shift, field mask)], hash2 bit = field bit + shift
+def field_moves(segments):
+  moves = {}
+  offset = sum(length for (position,length) in segments)
+  for (position,length) in segments:
+    offset -= length
+    shift = (64 - position - length) - offset
+    moves[shift] = moves.get(shift,0) | (((1 << length) - 1) << offset)
+  return sorted(moves.items(),reverse=True)
+
+
+def scatter(segments,value): # field value -> its bits in place in a 64-bit int
+  bits = 0
+  for (shift,mask) in field_moves(segments):
+    bits |= (value & mask) << shift if shift >= 0 else (value & mask) >> -shift
+  return bits
+
+
+
+### CHECKSUM
+# the checksum is the sum of the 19 3-bit groups of bits 5-60 (bits 3-58 of
+# the int), so int bit s adds 2**(s%3) and the checksum is a weighted bit count
+CHECKSUM_BITS = range(3,59)
+CHECKSUM_MASKS = tuple(sum(1 << s for s in CHECKSUM_BITS if s % 3 == r) for r in range(0,3)) # weight 1, 2, 4
+
+def checksum_sum(bits):
+  return sum(1 << (s % 3) for s in CHECKSUM_BITS if (bits >> s) & 1)
+
+# 256-entry tables for one byte of input, built by doubling: entry b | 1<<i
+# is entry b plus the share of bit i (tables stay cheap to build at import)
+def byte_tables(bit_values):
+  (values,sums) = ([0],[0])
+  for bits in bit_values:
+    weight = checksum_sum(bits)
+    values += [value | bits for value in values]
+    sums += [total + weight for total in sums]
+  return (values,bytes(total & 7 for total in sums))
+
+# byte k of hash2 -> its share of the checksum (mod 8), for the full recompute
+# on numpy arrays
+def checksum_byte_sums():
+  return [byte_tables([1 << (8 * k + i) for i in range(0,8)])[1] for k in range(0,8)]
+
+# per 8-bit chunk of a field value: the chunk's bits scattered into hash2 and
+# their share of the checksum, so a setter is one lookup per chunk
+def field_tables(segments):
+  width = sum(length for (position,length) in segments)
+  return [byte_tables([scatter(segments,1 << (8 * k + i)) for i in range(0,8)]) for k in range(0,(width + 7) // 8)]
+
+
+
+### CODE GENERATION
+# numpy shifts and masks are spelled U64(...) so nothing is upcast
+def constant(value,target,form='0x%x'):
+  if target == 'numpy':
+    return 'U64(%s)' % (form % value)
+  return form % value
+
+def shifted(expression,shift,target): # expression << shift, negative shifts go right
+  if shift > 0:
+    return '(%s << %s)' % (expression,constant(shift,target,'%d'))
+  if shift < 0:
+    return '(%s >> %s)' % (expression,constant(-shift,target,'%d'))
+  return expression
+
+def getter_source(name,segments,target):
+  terms = ['(%s & %s)' % (shifted('hash2',-shift,target),constant(mask,target)) for (shift,mask) in field_moves(segments)]
+  return 'def %s(hash2):\n  return %s\n' % (name,' | '.join(terms))
+
+def setter_source(name,segments,target):
+  terms = ['(%s & %s)' % (shifted('value',shift,target),constant(mask << shift if shift >= 0 else mask >> -shift,target))
+    for (shift,mask) in field_moves(segments)]
+  lines = ['def %s(hash2,value):' % name]
+  if target == 'numpy':
+    lines.append('  value = U64(value)')
+  lines.append('  return (hash2 & %s) | %s' % (constant(~field_mask(segments) & M64,target),' | '.join(terms)))
+  return '\n'.join(lines) + '\n'
+
+def clear_source(name,segments,target):
+  return 'def %s(hash2):\n  return hash2 & %s\n' % (name,constant(~field_mask(segments) & M64,target))
+
+# the checksum share of the bits in expression: a weighted bit count on ints,
+# the per-byte tables on numpy (bit counts need numpy 2)
+def checksum_source(expression,mask,target):
+  if target == 'numpy':
+    terms = ['checksum_bytes_%d[(%s >> U64(%d)) & U64(0xff)]' % (k,expression,8 * k)
+      for k in range(0,8) if (mask >> (8 * k)) & 0xff]
+  else:
+    terms = ['%s(%s & 0x%x).bit_count()' % ('%d * ' % (1 << r) if r else '',expression,CHECKSUM_MASKS[r] & mask)
+      for r in range(0,3) if CHECKSUM_MASKS[r] & mask]
+  return ' + '.join(terms) or '0' # the top bits are not checksummed
+
+def hash2_checksum_source(name,target):
+  return 'def %s(hash2):\n  return (%s) & %s\n' % (name,checksum_source('hash2',M64,target),constant(7,target))
+
+# sets a field and moves the checksum by the difference in the field's share,
+# so a valid hash2 stays valid without summing all 19 groups again
+def valid_setter_source(name,field,segments,target):
+  chunks = ['((value >> %s) & %s)' % (constant(8 * k,target,'%d'),constant(0xff,target)) if k else '(value & %s)' % constant(0xff,target)
+    for k in range(0,len(field_tables(segments)))]
+  lines = ['def %s(hash2,value):' % name]
+  if target == 'numpy':
+    lines.append('  value = U64(value)')
+  lines.append('  old = hash2 & %s' % constant(field_mask(segments),target))
+  lines.append('  checksum = hash2 - (%s) + %s' % (checksum_source('old',field_mask(segments),target),
+    ' + '.join('%s_sums_%d[%s]' % (field,k,chunk) for (k,chunk) in enumerate(chunks))))
+  lines.append('  return ((hash2 ^ old) & %s) | %s | (checksum & %s)' % (constant(~7 & M64,target),
+    ' | '.join('%s_scatter_%d[%s]' % (field,k,chunk) for (k,chunk) in enumerate(chunks)),constant(7,target)))
+  return '\n'.join(lines) + '\n'
+
+# get_hash2_<field>/set_hash2_<field> for every field, set_hash2_<field>_valid
+# for every field but the checksum, clear_hash2_unused and hash2_checksum (the
+# full recompute), numpy versions end in _many
+def generate_source(target='int'):
+  suffix = '_many' if target == 'numpy' else ''
+  parts = []
+  for (field,segments) in FIELDS.items():
+    parts.append(getter_source('get_hash2_%s%s' % (field,suffix),segments,target))
+    parts.append(setter_source('set_hash2_%s%s' % (field,suffix),segments,target))
+    if field != 'checksum':
+      parts.append(valid_setter_source('set_hash2_%s_valid%s' % (field,suffix),field,segments,target))
+  parts.append(clear_source('clear_hash2_unused' + suffix,UNUSED,target))
+  parts.append(hash2_checksum_source('hash2_checksum' + suffix,target))
+  return '\n'.join(parts)
+
+def compile_fields(target='int'):
+  scope = {}
+  if target == 'numpy':
+    import numpy as np
+    scope['U64'] = np.uint64
+    table = lambda values: np.array(values,dtype=np.uint64)
+  else:
+    table = lambda values: values
+  for (field,segments) in FIELDS.items():
+    if field != 'checksum':
+      for (k,(scattered,sums)) in enumerate(field_tables(segments)):
+        scope['%s_scatter_%d' % (field,k)] = table(scattered)
+        scope['%s_sums_%d' % (field,k)] = table(list(sums) if target == 'numpy' else sums)
+  if target == 'numpy':
+    for (k,sums) in enumerate(checksum_byte_sums()):
+      scope['checksum_bytes_%d' % k] = table(list(sums))
+  exec(compile(generate_source(target),'<aswreg_layout %s>' % target,'exec'),scope)
+  return dict((name,fn) for (name,fn) in scope.items() if callable(fn) and name.startswith(('get_','set_','clear_','hash2_')))
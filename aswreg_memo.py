@@ -0,0 +1,259 @@
+# opt-in memoization of the time-independent results (hash1, f1, f2)
+# values are stored as plain ints so a cached result can never be changed in
+# place by a caller (set_hash2_time & co mutate their BitArray argument),
+# BitArray callers get a fresh copy on every hit
+# enable with enable(maxsize) or ASWREG_MEMO=<maxsize> in the environment
+# a persistent SQLite tier shared by every process (CLI runs, batch workers,
+# the server) sits behind it with enable_disk(directory) or
+# ASWREG_CACHE=<directory> (ASWREG_CACHE_SIZE=<entries> caps it)
+# entries are keyed by backend as well: the engines give the same results
+# for valid licenses but fail differently on bad input, so one engine must
+# never answer from the other's entries
+from collections import OrderedDict
+from functools import wraps
+import os
+import time
+
+import aswreg_backend
+
+
+KINDS = ('hash1','f1','f2')
+# stored with every disk entry, bump when hash1/f1/f2 change so old entries
+# are ignored (and evicted first)
+VERSION = 1
+
+class LRUCache:
+  def __init__(self,maxsize):
+    self.maxsize = maxsize
+    self.data = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def get(self,key):
+    value = self.data.get(key)
+    if value is None:
+      self.misses += 1
+    else:
+      self.hits += 1
+      self.data.move_to_end(key)
+    return value
+
+  def put(self,key,value):
+    self.data[key] = value
+    self.data.move_to_end(key)
+    while len(self.data) > self.maxsize:
+      self.data.popitem(last=False)
+      self.evictions += 1
+
+  def discard(self,key):
+    self.data.pop(key,None)
+
+  def clear(self):
+    self.data.clear()
+
+  def stats(self):
+    lookups = self.hits + self.misses
+    return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+      'size': len(self.data), 'maxsize': self.maxsize,
+      'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+
+
+### DISK
+# one row per (kind, version, backend, normalized license); WAL mode lets
+# readers and a writer in other processes run side by side, a busy or
+# read-only file just behaves like a miss
+# a file with an older table layout (PRAGMA user_version) is started afresh
+CACHE_FILE = 'aswreg_cache.sqlite3'
+DEFAULT_DIR = os.path.join(os.path.expanduser('~'),'.cache','aswreg')
+SCHEMA_VERSION = 2
+SCHEMA = """CREATE TABLE IF NOT EXISTS results (kind TEXT, version INTEGER, backend TEXT, name TEXT, number INTEGER,
+  game TEXT, value INTEGER, used REAL, PRIMARY KEY (kind,version,backend,name,number,game)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_used ON results (used);"""
+KEY_COLUMNS = 'kind = ? AND version = ? AND backend = ? AND name = ? AND number = ? AND game = ?'
+EVICT_EVERY = 256 # puts between size checks (the first put always checks)
+
+class DiskCache:
+  def __init__(self,directory=None,maxsize=100000):
+    self.path = os.path.join(directory or DEFAULT_DIR,CACHE_FILE)
+    self.maxsize = maxsize
+    self.connection = None
+    self.pid = None
+    self.puts = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.errors = 0
+
+  def connect(self): # per process, a forked worker opens its own
+    if self.pid != os.getpid():
+      import sqlite3
+      os.makedirs(os.path.dirname(self.path),exist_ok=True)
+      self.connection = sqlite3.connect(self.path,timeout=5.0,isolation_level=None)
+      self.connection.execute('PRAGMA journal_mode=WAL')
+      self.connection.execute('PRAGMA synchronous=NORMAL')
+      if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        self.connection.executescript('DROP TABLE IF EXISTS results; PRAGMA user_version = %d;' % SCHEMA_VERSION)
+      self.connection.executescript(SCHEMA)
+      self.pid = os.getpid()
+    return self.connection
+
+  def execute(self,sql,args=()):
+    import sqlite3
+    try:
+      return self.connect().execute(sql,args).fetchall()
+    except sqlite3.Error:
+      self.errors += 1
+      return None
+
+  # hits only write back their use time once it is an hour stale, so reads
+  # don't queue up behind each other for the write lock
+  def get(self,kind,key):
+    rows = self.execute('SELECT value,used FROM results WHERE ' + KEY_COLUMNS,(kind,VERSION) + key)
+    if not rows:
+      self.misses += 1
+      return None
+    (value,used) = rows[0]
+    now = time.time()
+    if now - used > 3600:
+      self.execute('UPDATE results SET used = ? WHERE ' + KEY_COLUMNS,(now,kind,VERSION) + key)
+    self.hits += 1
+    return value
+
+  def put(self,kind,key,value):
+    self.execute('INSERT OR REPLACE INTO results VALUES (?,?,?,?,?,?,?,?)',(kind,VERSION) + key + (value,time.time()))
+    if self.puts % EVICT_EVERY == 0:
+      self.evict()
+    self.puts += 1
+
+  # drop other versions, then the least recently used rows down to 90% of
+  # maxsize so the next check has some headroom
+  def evict(self):
+    self.execute('DELETE FROM results WHERE version != ?',(VERSION,))
+    rows = self.execute('SELECT count(*) FROM results')
+    if rows and rows[0][0] > self.maxsize:
+      excess = rows[0][0] - int(self.maxsize * 0.9)
+      self.execute('DELETE FROM results WHERE (kind,version,backend,name,number,game) IN '
+        '(SELECT kind,version,backend,name,number,game FROM results ORDER BY used LIMIT ?)',(excess,))
+      self.evictions += excess
+
+  def discard(self,kind,key):
+    self.execute('DELETE FROM results WHERE ' + KEY_COLUMNS,(kind,VERSION) + key)
+
+  def clear(self,kind=None):
+    if kind is None:
+      self.execute('DELETE FROM results')
+      self.execute('VACUUM')
+    else:
+      self.execute('DELETE FROM results WHERE kind = ?',(kind,))
+
+  def stats(self):
+    entries = dict(('%s[%s] v%d' % (kind,backend,version),count) for (kind,version,backend,count) in
+      self.execute('SELECT kind,version,backend,count(*) FROM results GROUP BY kind,version,backend ORDER BY kind,version,backend') or [])
+    size = sum(os.path.getsize(self.path + suffix) for suffix in ('','-wal') if os.path.exists(self.path + suffix))
+    return {'path': self.path,'version': VERSION,'entries': entries,'bytes': size,'maxsize': self.maxsize,
+      'hits': self.hits,'misses': self.misses,'evictions': self.evictions,'errors': self.errors}
+
+# memory in front of disk for one kind, same interface as LRUCache
+class TieredCache:
+  def __init__(self,kind,memory,disk):
+    self.kind = kind
+    self.memory = memory
+    self.disk = disk
+
+  def get(self,key):
+    value = self.memory.get(key) if self.memory is not None else None
+    if value is None:
+      value = self.disk.get(self.kind,key)
+      if value is not None and self.memory is not None:
+        self.memory.put(key,value)
+    return value
+
+  def put(self,key,value):
+    if self.memory is not None:
+      self.memory.put(key,value)
+    self.disk.put(self.kind,key,value)
+
+  def discard(self,key):
+    if self.memory is not None:
+      self.memory.discard(key)
+    self.disk.discard(self.kind,key)
+
+  def clear(self):
+    if self.memory is not None:
+      self.memory.clear()
+    self.disk.clear(self.kind)
+
+  def stats(self):
+    stats = self.memory.stats() if self.memory is not None else {}
+    stats['disk'] = {'hits': self.disk.hits,'misses': self.disk.misses}
+    return stats
+
+
+
+caches = {} # kind -> LRUCache or TieredCache, empty while disabled
+disk = None # the DiskCache while the disk tier is on
+
+def enable(maxsize=4096,kinds=KINDS):
+  for kind in kinds:
+    caches[kind] = LRUCache(maxsize) if disk is None else TieredCache(kind,LRUCache(maxsize),disk)
+
+def enable_disk(directory=None,maxsize=100000,kinds=KINDS):
+  global disk
+  disk = DiskCache(directory,maxsize)
+  for kind in kinds:
+    memory = caches.get(kind)
+    caches[kind] = TieredCache(kind,memory.memory if isinstance(memory,TieredCache) else memory,disk)
+  return disk
+
+def disable():
+  global disk
+  caches.clear()
+  disk = None
+
+# drop one license from every cache, or everything when called without args
+def invalidate(name=None,number=None,game=None):
+  for cache in caches.values():
+    if name is None:
+      cache.clear()
+    else:
+      for backend in aswreg_backend.BACKENDS:
+        cache.discard((backend,) + normalize(name,number,game))
+
+def stats():
+  return dict((kind,cache.stats()) for (kind,cache) in caches.items())
+
+# every cached function sees the name uppercased with spaces removed
+def normalize(name,number,game):
+  return (name.upper().replace(' ',''),number,game)
+
+# decorator for fn(name,number,game) of one backend's engine; to_value and
+# from_value convert the result to and from the stored int when the function
+# does not return one
+def memoized(kind,to_value=None,from_value=None,backend='int'):
+  def decorate(fn):
+    @wraps(fn)
+    def cached(name,number,game):
+      cache = caches.get(kind)
+      if cache is None:
+        return fn(name,number,game)
+      key = (backend,) + normalize(name,number,game)
+      value = cache.get(key)
+      if value is None:
+        value = fn(name,number,game)
+        if to_value is not None:
+          value = to_value(value)
+        cache.put(key,value)
+      if from_value is not None:
+        return from_value(value)
+      return value
+    return cached
+  return decorate
+
+
+if os.environ.get('ASWREG_MEMO'):
+  enable(int(os.environ['ASWREG_MEMO']))
+if os.environ.get('ASWREG_CACHE'):
+  enable_disk(os.environ['ASWREG_CACHE'],int(os.environ.get('ASWREG_CACHE_SIZE',100000)))
@@ -0,0 +1,186 @@
+# opt-in profiling of the hot path: call counts, cumulative and self time and
+# BitArray allocations for each stage (hash1 game/name pass, f1, f2, the
+# specialized factor pair, checksum, timestamp, text codec) nested under the
+# operation that ran them
+# the engines declare their stages where they bind them: register() for
+# module attributes (accessors, kernels, entry points) and tables of
+# functions, dispatch() for functions made at run time (compiled kernels,
+# specialized pairs); enable() wraps everything registered and disable()
+# unwraps it, so nothing is wrapped (and nothing costs) while profiling is off
+# use "with profiled() as profile:" or ASWREG_PROFILE=<path> in the
+# environment, which writes the summary to <path> (JSON) and the collapsed
+# stacks to <path>.folded (flamegraph.pl, speedscope...) at exit
+# only the current process is profiled, not batch/server workers
+# kept light, every engine imports it
+import atexit
+import os
+from time import perf_counter
+
+
+# attribute -> stage, the same names in every engine (and _many for numpy)
+STAGES = {
+  'renew_code': 'renew', 'date_code': 'date', 'generate_code': 'generate', 'verify_code': 'verify',
+  'textcode_to_bincode': 'text.decode', 'textcode_to_int': 'text.decode', 'textcodes_to_ints': 'text.decode',
+  'bincode_to_textcode': 'text.encode', 'int_to_textcode': 'text.encode', 'ints_to_textcodes': 'text.encode',
+  'get_hash1': 'hash1', 'get_hash1_game': 'hash1.game', 'get_hash1_name': 'hash1.name',
+  'get_hash2': 'hash2', 'make_hash2_factors': 'factors', 'make_hash2_f1': 'f1', 'make_hash2_f2': 'f2',
+  'make_hash2_valid': 'checksum', 'check_hash2_valid': 'checksum', 'hash2_checksum': 'checksum',
+  'set_hash2_time_valid': 'checksum.incremental', 'set_hash2_f1_valid': 'checksum.incremental',
+  'set_hash2_f2_valid': 'checksum.incremental',
+  'get_current_timestamp': 'timestamp', 'set_hash2_time': 'timestamp', 'get_hash2_time': 'timestamp',
+}
+STAGES.update([(attr + '_many',stage) for (attr,stage) in list(STAGES.items()) if attr.startswith(('get_','make_','set_','hash2_'))])
+
+class Profile:
+  def __init__(self):
+    self.paths = {} # stage path -> [calls, seconds, child seconds, allocs, child allocs]
+    self.stack = []
+    self.allocs = 0
+
+  def timed(self,stage,fn):
+    def wrapper(*args,**kwargs):
+      if active is not self: # kept by a caller after disable()
+        return fn(*args,**kwargs)
+      stack = self.stack
+      path = stack[-1] + (stage,) if stack else (stage,)
+      stack.append(path)
+      allocs = self.allocs
+      start = perf_counter()
+      try:
+        return fn(*args,**kwargs)
+      finally:
+        elapsed = perf_counter() - start
+        allocs = self.allocs - allocs
+        stack.pop()
+        record = self.paths.get(path)
+        if record is None:
+          record = self.paths[path] = [0,0.0,0.0,0,0]
+        record[0] += 1
+        record[1] += elapsed
+        record[3] += allocs
+        if stack:
+          parent = self.paths.get(stack[-1])
+          if parent is None:
+            parent = self.paths[stack[-1]] = [0,0.0,0.0,0,0]
+          parent[2] += elapsed
+          parent[4] += allocs
+    wrapper.__wrapped__ = fn
+    wrapper.profile_stage = stage
+    return wrapper
+
+  # per stage totals: a stage nested in itself (core.get_hash1 calling
+  # aswreg_v2int.get_hash1) only counts its outermost time
+  def summary(self):
+    stages = {}
+    for (path,(calls,seconds,child_seconds,allocs,child_allocs)) in self.paths.items():
+      stage = stages.setdefault(path[-1],{'calls': 0,'seconds': 0.0,'self_seconds': 0.0,'allocs': 0,'self_allocs': 0})
+      stage['calls'] += calls
+      stage['self_seconds'] += seconds - child_seconds
+      stage['self_allocs'] += allocs - child_allocs
+      if path[-1] not in path[:-1]:
+        stage['seconds'] += seconds
+        stage['allocs'] += allocs
+    return {'stages': stages,'bitarray_allocs': self.allocs,
+      'paths': [{'stack': list(path),'calls': r[0],'seconds': r[1],'self_seconds': r[1] - r[2],
+        'allocs': r[3],'self_allocs': r[3] - r[4]} for (path,r) in sorted(self.paths.items())]}
+
+  # "renew;hash1;hash1.name 1234" lines, weighted by self time in
+  # microseconds or by allocations
+  def collapsed(self,weight='time'):
+    lines = []
+    for (path,(calls,seconds,child_seconds,allocs,child_allocs)) in sorted(self.paths.items()):
+      value = int(round((seconds - child_seconds) * 1e6)) if weight == 'time' else allocs - child_allocs
+      if value > 0:
+        lines.append('%s %d' % (';'.join(path),value))
+    return '\n'.join(lines) + '\n'
+
+
+active = None
+registry = [] # (namespace, {attribute: stage}) or (table, stage) for every entry
+
+# stages of a module's globals() (or any dict), by attribute, or every
+# function in a table dict under one stage
+def register(namespace,stages):
+  registry.append((namespace,stages))
+  if active is not None:
+    wrap(active,namespace,stages)
+
+# a function made after import (a compiled kernel, a specialized pair)
+def dispatch(stage,fn):
+  return fn if active is None else active.timed(stage,fn)
+
+def entries(namespace,stages): # [(key, stage)] present in namespace
+  if isinstance(stages,str):
+    return [(key,stages) for key in list(namespace)]
+  return [(key,stage) for (key,stage) in stages.items() if key in namespace]
+
+def wrap(profile,namespace,stages):
+  for (key,stage) in entries(namespace,stages):
+    if not hasattr(namespace[key],'profile_stage'):
+      namespace[key] = profile.timed(stage,namespace[key])
+
+def unwrap(namespace,stages):
+  for (key,stage) in entries(namespace,stages):
+    fn = namespace[key]
+    while hasattr(fn,'profile_stage'):
+      fn = fn.__wrapped__
+    namespace[key] = fn
+
+def enable():
+  global active
+  if active is not None:
+    return active
+  profile = active = Profile()
+  for (namespace,stages) in registry:
+    wrap(profile,namespace,stages)
+  try:
+    from bitstring import BitArray
+  except ImportError:
+    return profile
+  new = BitArray.__dict__['__new__']
+  def counting_new(cls,*args,**kwargs):
+    if active is profile:
+      profile.allocs += 1
+    return new.__func__(cls,*args,**kwargs)
+  counting_new.original = new
+  BitArray.__new__ = staticmethod(counting_new)
+  return profile
+
+def disable():
+  global active
+  for (namespace,stages) in registry:
+    unwrap(namespace,stages)
+  try:
+    from bitstring import BitArray
+  except ImportError:
+    pass
+  else:
+    original = getattr(BitArray.__dict__['__new__'].__func__,'original',None)
+    if original is not None:
+      BitArray.__new__ = original
+  profile = active
+  active = None
+  return profile
+
+class profiled: # with profiled() as profile: ...
+  def __enter__(self):
+    return enable()
+
+  def __exit__(self,*exc):
+    disable()
+
+def write(profile,path):
+  import json
+  with open(path,'w') as f:
+    json.dump(profile.summary(),f,indent=1)
+  with open(path + '.folded','w') as f:
+    f.write(profile.collapsed())
+
+def enable_from_env():
+  if active is None and os.environ.get('ASWREG_PROFILE'):
+    profile = enable()
+    atexit.register(lambda: write(profile,os.environ['ASWREG_PROFILE']))
+
+
+if os.environ.get('ASWREG_PROFILE'):
+  enable_from_env()
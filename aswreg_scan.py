@@ -0,0 +1,212 @@
+#!/usr/bin/python
+# hash1 collision scan: every (name, number) pair of a name list and a range
+# of copy counts for one game, counting the pairs that share a hash1 (a
+# renewed code of one would then also pass for the other)
+# the pairs are cut into shards of at most --shard-records, each shard is
+# hashed on a process pool and spilled to the work directory as a run of
+# records sorted by hash1; a finished run is the checkpoint, so running the
+# same scan again skips the shards already on disk, and the runs are merged
+# as streams at the end, so memory depends on the shard size, not the range
+import hashlib
+import heapq
+import json
+import os
+import struct
+import sys
+import time
+from collections import deque
+from sys import argv, stdout, stderr
+
+import aswreg_v2
+import aswreg_v2int as fast
+
+
+RUN_RECORD = struct.Struct('>QII') # hash1, name index, number; big-endian so bytes sort by hash1
+MERGE_FANIN = 128 # runs open at once, more are merged in passes first
+SCAN_VERSION = 1
+
+# names as hash1 sees them (uppercase, no spaces), duplicates dropped since
+# they hash the same by definition
+def load_names(path):
+	names = []
+	seen = set()
+	with open(path) as f:
+		for line in f:
+			name = line.strip()
+			normalized = name.upper().replace(' ','')
+			if normalized and normalized not in seen:
+				seen.add(normalized)
+				names.append(name)
+	return names
+
+# (first number, last number, first name, end name) blocks covering the range
+def make_shards(name_count,first,last,shard_records):
+	name_block = min(name_count,shard_records)
+	number_block = max(1,shard_records // name_block)
+	shards = []
+	for number in range(first,last + 1,number_block):
+		for name in range(0,name_count,name_block):
+			shards.append((number,min(number + number_block - 1,last),name,min(name + name_block,name_count)))
+	return shards
+
+def run_path(workdir,shard):
+	return os.path.join(workdir,'run_%d_%d_%d_%d.bin' % shard)
+
+
+
+### SHARDS
+# set in each worker by the pool initializer, so the names are sent once
+worker_names = []
+
+def init_worker(names):
+	global worker_names
+	worker_names = [name.upper().replace(' ','') for name in names]
+
+# game pass once per number, name pass per name, the same two passes as
+# aswreg_v2int.get_hash1 without its caches; written to a temp file and
+# renamed so a killed worker never leaves half a run behind
+def scan_shard(workdir,game,shard):
+	(first,last,name_start,name_end) = shard
+	keys = []
+	for number in range(first,last + 1):
+		(code,overflow) = fast.get_hash1_game(game,number,0,0)
+		for index in range(name_start,name_end):
+			(key_lower,key_upper) = fast.get_hash1_name(worker_names[index],number,code,overflow)
+			keys.append((((key_upper & 0x0FFFFFFF) << 32 | key_lower) << 64) | (index << 32) | number)
+	keys.sort()
+	path = run_path(workdir,shard)
+	with open(path + '.tmp','wb') as f:
+		f.write(b''.join([key.to_bytes(16,'big') for key in keys]))
+	os.replace(path + '.tmp',path)
+	return len(keys)
+
+
+
+### MERGE
+def read_run(path,buffer_records=4096):
+	with open(path,'rb') as f:
+		while True:
+			data = f.read(RUN_RECORD.size * buffer_records)
+			if not data:
+				break
+			for i in range(0,len(data),RUN_RECORD.size):
+				yield data[i:i + RUN_RECORD.size]
+
+def merge_runs(paths,workdir):
+	# cut the number of open files down first, intermediate runs are
+	# rebuilt on every merge so an interrupted merge just starts over
+	generation = 0
+	temporary = []
+	while len(paths) > MERGE_FANIN:
+		merged = []
+		for k in range(0,len(paths),MERGE_FANIN):
+			path = os.path.join(workdir,'merge_%d_%d.tmp' % (generation,k))
+			with open(path,'wb') as f:
+				for record in heapq.merge(*[read_run(p) for p in paths[k:k + MERGE_FANIN]]):
+					f.write(record)
+			merged.append(path)
+		temporary += merged
+		(paths,generation) = (merged,generation + 1)
+	try:
+		for record in heapq.merge(*[read_run(p) for p in paths]):
+			yield record
+	finally:
+		for path in temporary:
+			os.remove(path)
+
+# groups of records sharing a hash1, only the groups with 2 or more
+def collisions(records):
+	group = []
+	for record in records:
+		if group and record[:8] != group[0][:8]:
+			if len(group) > 1:
+				yield group
+			group = []
+		group.append(record)
+	if len(group) > 1:
+		yield group
+
+
+
+### SCAN
+def load_manifest(workdir,manifest):
+	path = os.path.join(workdir,'scan.json')
+	if os.path.exists(path):
+		with open(path) as f:
+			saved = json.load(f)
+		if saved != manifest:
+			raise ValueError('%s holds a different scan (%s), use another --workdir' % (workdir,path))
+	else:
+		with open(path,'w') as f:
+			json.dump(manifest,f,indent=1)
+
+def scan(names_path,game='EV Nova',first=1,last=1000,workdir='',workers=1,shard_records=1000000,progress=False):
+	from concurrent.futures import ProcessPoolExecutor
+	names = load_names(names_path)
+	if not names or last < first:
+		raise ValueError('nothing to scan')
+	workdir = workdir or 'scan_%s' % hashlib.sha1(repr((names,game,first,last)).encode('utf-8')).hexdigest()[:12]
+	os.makedirs(workdir,exist_ok=True)
+	load_manifest(workdir,{'version': SCAN_VERSION,'game': game,'first': first,'last': last,'shard_records': shard_records,
+		'names': len(names),'names_sha1': hashlib.sha1('\n'.join(names).encode('utf-8')).hexdigest()})
+
+	shards = make_shards(len(names),first,last,shard_records)
+	todo = deque(shard for shard in shards if not os.path.exists(run_path(workdir,shard)))
+	if progress and len(todo) < len(shards):
+		print('resuming: %d of %d shards already done' % (len(shards) - len(todo),len(shards)),file=stderr)
+	start = time.time()
+	done = 0
+	with ProcessPoolExecutor(workers,initializer=init_worker,initargs=(names,)) as pool:
+		pending = deque()
+		while todo or pending:
+			while todo and len(pending) < workers * 2: # bounded, like batch
+				pending.append(pool.submit(scan_shard,workdir,game,todo.popleft()))
+			done += pending.popleft().result()
+			if progress:
+				elapsed = time.time() - start
+				print('%d/%d shards, %.0f pairs/s' % (len(shards) - len(todo) - len(pending),len(shards),done / elapsed if elapsed else 0),file=stderr)
+
+	# collisions.tsv: hash1, number, name for each colliding pair, a blank line between groups
+	(pairs,groups,colliding) = ((last - first + 1) * len(names),0,0)
+	largest = 0
+	with open(os.path.join(workdir,'collisions.tsv'),'w') as f:
+		for group in collisions(merge_runs([run_path(workdir,shard) for shard in shards],workdir)):
+			groups += 1
+			colliding += len(group)
+			largest = max(largest,len(group))
+			for record in group:
+				(hash1,index,number) = RUN_RECORD.unpack(record)
+				f.write('%015x\t%d\t%s\n' % (hash1,number,names[index]))
+			f.write('\n')
+	summary = {'game': game,'names': len(names),'first': first,'last': last,'pairs': pairs,
+		'collision_groups': groups,'colliding_pairs': colliding,'largest_group': largest,
+		'collision_rate': colliding / pairs}
+	with open(os.path.join(workdir,'summary.json'),'w') as f:
+		json.dump(summary,f,indent=1)
+	return (workdir,summary)
+
+
+usage = """Usage\n-----\n
+Scan a name list (one per line) against a range of copy counts for hash1 collisions:
+scan <names file> (optional: --game "EV Nova" --first 1 --last 1000 --workdir <dir> --workers N --shard-records 1000000 --progress)
+  runs and results go to the work directory (named after the inputs by default),
+  running the same scan again resumes it; collisions.tsv lists the colliding pairs\n"""
+
+if __name__ == '__main__':
+	defaults = {'game': 'EV Nova','first': 1,'last': 1000,'workdir': '','workers': 1,'shard_records': 1000000,'progress': False}
+	status = 0
+	command = argv[1] if len(argv) > 1 else ''
+	try:
+		(args,options) = aswreg_v2.parse_options(argv[2:],defaults)
+		if command != 'scan' or len(args) != 1:
+			raise aswreg_v2.UsageError(command)
+		(workdir,summary) = scan(args[0],**options)
+		print('%d pairs, %d collision groups, %d colliding pairs (%.3g), largest group %d -- %s' % (summary['pairs'],
+			summary['collision_groups'],summary['colliding_pairs'],summary['collision_rate'],summary['largest_group'],workdir))
+	except aswreg_v2.UsageError:
+		print(usage,file=stdout if command == '' else stderr)
+		status = 0 if command == '' else 2
+	except ValueError as e: # nothing to scan, a work directory of another scan
+		print('error: %s' % e,file=stderr)
+		status = 1
+	sys.exit(status)
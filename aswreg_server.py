@@ -0,0 +1,235 @@
+#!/usr/bin/python
+# resident registration service, saves the interpreter start, bitstring
+# import and argv parsing that every aswreg_v2.py call pays
+# POST /renew, /date, /generate or /verify with a JSON body holding the batch
+# record fields (code, name, number, game, optional decade), answers
+# {"result": ..., "error": ...}, GET /health and /stats for monitoring
+# concurrent requests are gathered into micro-batches (up to --max-batch
+# records or --max-delay-ms after the first one) that run on a process pool
+# through aswreg_v2.process_batch_chunk, so the event loop never hashes
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sys import argv, stdout, stderr
+
+import aswreg_v2
+
+
+OPS = ('renew','date','generate','verify')
+
+class MicroBatcher:
+	def __init__(self,pool,workers,max_batch=64,max_delay=0.002):
+		self.pool = pool
+		self.max_batch = max_batch
+		self.max_delay = max_delay
+		self.queue = asyncio.Queue()
+		self.slots = asyncio.Semaphore(workers) # one batch per worker at a time
+		self.batches = 0
+		self.records = 0
+		self.dispatching = set() # the loop only keeps weak references to tasks
+
+	async def submit(self,record):
+		future = asyncio.get_running_loop().create_future()
+		await self.queue.put((record,future))
+		return await future
+
+	async def run(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			batch = [await self.queue.get()]
+			deadline = loop.time() + self.max_delay
+			while len(batch) < self.max_batch:
+				if not self.queue.empty():
+					batch.append(self.queue.get_nowait())
+					continue
+				timeout = deadline - loop.time()
+				if timeout <= 0:
+					break
+				try:
+					batch.append(await asyncio.wait_for(self.queue.get(),timeout))
+				except asyncio.TimeoutError:
+					break
+			await self.slots.acquire()
+			task = asyncio.ensure_future(self.dispatch(batch))
+			self.dispatching.add(task)
+			task.add_done_callback(self.dispatching.discard)
+
+	async def dispatch(self,batch):
+		try:
+			records = [(i,'jsonl',record) for (i,(record,future)) in enumerate(batch)]
+			results = await asyncio.get_running_loop().run_in_executor(self.pool,aswreg_v2.process_batch_chunk,records)
+			self.batches += 1
+			self.records += len(batch)
+			for ((record,future),result) in zip(batch,results):
+				if not future.done():
+					future.set_result(result[3:]) # (result, error)
+		except Exception as e:
+			for (record,future) in batch:
+				if not future.done():
+					future.set_exception(e)
+		finally:
+			self.slots.release()
+
+	def stats(self):
+		return {'batches': self.batches,'records': self.records,'queued': self.queue.qsize(),
+			'mean_batch': self.records / self.batches if self.batches else 0.0}
+
+
+
+### HTTP
+# just enough HTTP/1.1 for local clients, with keep-alive
+async def read_request(reader):
+	line = await reader.readline()
+	if not line:
+		return None
+	(method,path,version) = line.decode('latin-1').split()
+	headers = {}
+	while True:
+		line = await reader.readline()
+		if line in (b'\r\n',b'\n',b''):
+			break
+		(key,sep,value) = line.decode('latin-1').partition(':')
+		headers[key.strip().lower()] = value.strip()
+	body = await reader.readexactly(int(headers.get('content-length',0)))
+	return (method,path,headers,body)
+
+def write_response(writer,status,payload):
+	reason = {200: 'OK',400: 'Bad Request',404: 'Not Found',500: 'Internal Server Error'}[status]
+	body = json.dumps(payload).encode('utf-8')
+	writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n' % (status,reason,len(body))).encode('latin-1') + body)
+
+async def route(method,path,body,batcher):
+	op = path.strip('/')
+	if method == 'GET' and op == 'health':
+		return (200,{'ok': True})
+	if method == 'GET' and op == 'stats':
+		return (200,batcher.stats())
+	if method != 'POST' or op not in OPS:
+		return (404,{'error': 'unknown endpoint: %s %s' % (method,path)})
+	try:
+		record = json.loads(body or b'{}')
+		if not isinstance(record,dict):
+			raise ValueError('expected a JSON object')
+	except ValueError as e:
+		return (400,{'result': None,'error': 'ValueError: %s' % e})
+	record['op'] = op
+	try:
+		(result,error) = await batcher.submit(record)
+	except Exception as e:
+		return (500,{'result': None,'error': 'WorkerError: %s: %s' % (type(e).__name__,e)})
+	return (400 if error else 200,{'result': result,'error': error})
+
+async def handle(reader,writer,batcher):
+	try:
+		while True:
+			request = await read_request(reader)
+			if request is None:
+				break
+			(method,path,headers,body) = request
+			(status,payload) = await route(method,path,body,batcher)
+			write_response(writer,status,payload)
+			await writer.drain()
+			if headers.get('connection','').lower() == 'close':
+				break
+	except (ConnectionError,asyncio.IncompleteReadError,ValueError):
+		pass
+	finally:
+		writer.close()
+
+async def serve(host='127.0.0.1',port=8740,socket='',workers=0,max_batch=64,max_delay_ms=2.0):
+	workers = workers or os.cpu_count() or 1
+	with ProcessPoolExecutor(workers) as pool:
+		batcher = MicroBatcher(pool,workers,max_batch,max_delay_ms / 1000.0)
+		runner = asyncio.ensure_future(batcher.run())
+		handler = lambda reader,writer: handle(reader,writer,batcher)
+		if socket:
+			server = await asyncio.start_unix_server(handler,path=socket)
+			print('listening on %s' % socket,file=stderr)
+		else:
+			server = await asyncio.start_server(handler,host,port)
+			print('listening on http://%s:%d' % (host,port),file=stderr)
+		try:
+			async with server:
+				await server.serve_forever()
+		finally:
+			runner.cancel()
+
+
+
+### CLIENT
+# stand-in for the portal: concurrent keep-alive connections, reports latency
+async def open_client(host,port,socket):
+	if socket:
+		return await asyncio.open_unix_connection(socket)
+	return await asyncio.open_connection(host,port)
+
+async def request(reader,writer,op,record):
+	body = json.dumps(record).encode('utf-8')
+	writer.write(('POST /%s HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n' % (op,len(body))).encode('latin-1') + body)
+	await writer.drain()
+	line = await reader.readline()
+	status = int(line.split()[1])
+	length = 0
+	while True:
+		line = await reader.readline()
+		if line in (b'\r\n',b'\n',b''):
+			break
+		if line.lower().startswith(b'content-length:'):
+			length = int(line.split(b':')[1])
+	return (status,json.loads(await reader.readexactly(length)))
+
+def percentile(values,p):
+	values = sorted(values)
+	return values[min(len(values) - 1,int(len(values) * p / 100.0))]
+
+async def bench(host='127.0.0.1',port=8740,socket='',requests=2000,concurrency=50,op='generate'):
+	latencies = []
+	errors = [0]
+
+	async def client(k):
+		(reader,writer) = await open_client(host,port,socket)
+		for i in range(k,requests,concurrency):
+			record = {'code': '6RHG-NTFP-M889','name': 'Customer %d' % i,'number': 1 + i % 300,'game': 'EV Nova'}
+			start = time.perf_counter()
+			(status,payload) = await request(reader,writer,op,record)
+			latencies.append(time.perf_counter() - start)
+			if status != 200:
+				errors[0] += 1
+		writer.close()
+
+	start = time.perf_counter()
+	await asyncio.gather(*[client(k) for k in range(0,concurrency)])
+	elapsed = time.perf_counter() - start
+	print('%d %s requests, %d errors, %.0f req/s' % (len(latencies),op,errors[0],len(latencies) / elapsed))
+	print('latency ms: p50 %.2f  p90 %.2f  p99 %.2f  max %.2f' % tuple(
+		1000 * percentile(latencies,p) for p in (50,90,99,100)))
+
+
+usage = """Usage\n-----\n
+Run the service:
+serve (optional: --host 127.0.0.1 --port 8740 --socket <path> --workers N --max-batch 64 --max-delay-ms 2)\n
+Load-test a running service:
+bench (optional: --host --port --socket --requests 2000 --concurrency 50 --op generate)\n"""
+
+if __name__ == '__main__':
+	serve_options = {'host': '127.0.0.1','port': 8740,'socket': '','workers': 0,'max_batch': 64,'max_delay_ms': 2.0}
+	bench_options = {'host': '127.0.0.1','port': 8740,'socket': '','requests': 2000,'concurrency': 50,'op': 'generate'}
+	status = 0
+	command = argv[1] if len(argv) > 1 else ''
+	try:
+		if command in ('serve','bench'):
+			(args,options) = aswreg_v2.parse_options(argv[2:],serve_options if command == 'serve' else bench_options)
+			if args:
+				raise aswreg_v2.UsageError(command)
+			asyncio.run((serve if command == 'serve' else bench)(**options))
+		else:
+			raise aswreg_v2.UsageError(command)
+	except aswreg_v2.UsageError:
+		print(usage,file=stdout if command == '' else stderr)
+		status = 0 if command == '' else 2
+	except KeyboardInterrupt:
+		pass
+	sys.exit(status)
@@ -1,21 +1,28 @@
 #!/usr/bin/python
-from bitstring import BitArray
-from collections import deque
 from sys import argv
 
+import aswreg_backend
+
 # games
 earlier_games = ['Maelstrom','Chiral','Apeiron','Swoop','Barrack','Escape Velocity','Avara','Bubble Trouble','Harry']
 later_games = ['Mars Rising','EV Override','Slithereens','Cythera','Ares']
 
+# register engine: 'int' or 'bitarray' (reference, same codes), see
+# aswreg_backend for the default
+
 def rotate(bits,num):
+	from bitstring import BitArray
+	from collections import deque
 	b = deque(bits)
 	b.rotate(num)
 	return BitArray(b)
 
 def add(a,b):
+	from bitstring import BitArray
 	return BitArray('0b' + format(a + b,'032b'))
 
 def hash_code(string,number,code,extra_hash=False):
+	from bitstring import BitArray
 	for i in range(0,len(string)):
 
 		code[24:] = add(ord(string[i]),int(code[24:].hex,16))[24:] # add current letter
@@ -32,7 +39,32 @@ def hash_code(string,number,code,extra_hash=False):
 
 	return code
 
-def generate_code(name,number,game):
+# the same pass on a 32-bit int, the adds only touch the low byte/half
+# (no carry into the bits above)
+def hash_code_int(string,number,code,extra_hash=False):
+	for c in string:
+		code = (code & 0xFFFFFF00) | ((code + ord(c)) & 0xFF) # add current letter
+		if extra_hash:
+			code = ((code << 6) | (code >> 26)) & 0xFFFFFFFF # rotate left 6
+			code = (code & 0xFFFF0000) | ((code + number) & 0xFFFF) # add number copies
+			code ^= 0xDEADBEEF # xor with key
+			code = (code >> 1) | ((code & 1) << 31) # rotate right 1
+		else:
+			code = ((code << 5) | (code >> 27)) & 0xFFFFFFFF # rotate left 5
+			code = (code & 0xFFFF0000) | ((code + number) & 0xFFFF) # add number copies
+	return code
+
+# one letter per nibble, least significant first (the rotate-left-4 loop
+# below, reversed)
+def int_to_registration(code):
+	return ''.join([chr(((code >> shift) & 15) + 65) for shift in (0,4,8,12,16,20,24,28)])
+
+def generate_code(name,number,game,backend=None):
+	if aswreg_backend.check_backend(backend) == 'int':
+		extra_hash = game in later_games
+		return int_to_registration(hash_code_int(game,number,hash_code_int(name.upper(),number,0,extra_hash),extra_hash))
+
+	from bitstring import BitArray
 	code = BitArray(32) # 4-byte code of 0's to process on
 	name = name.upper() # name uppercase only
 
@@ -47,11 +79,27 @@ def generate_code(name,number,game):
 
 	return registration[::-1] # reverse
 
+# codes for every game: the name pass is done once per family (earlier
+# games skip the xor, so the two lists can't share it) and each game
+# continues from that state
+def generate_all(name,number):
+	name = name.upper()
+	codes = {}
+	for (games,extra_hash) in ((earlier_games,False),(later_games,True)):
+		state = hash_code_int(name,number,0,extra_hash)
+		for game in games:
+			codes[game] = int_to_registration(hash_code_int(game,number,state,extra_hash))
+	return codes
+
 
 if __name__ == '__main__':
 	try:
 		if len(argv) > 4:
 			raise
-		print(generate_code(argv[1],int(argv[2]),argv[3]))
+		if len(argv) == 3: # no game, every game
+			for (game,code) in generate_all(argv[1],int(argv[2])).items():
+				print('%s\t%s' % (game,code))
+		else:
+			print(generate_code(argv[1],int(argv[2]),argv[3]))
 	except:
-		print('Usage: "<name>" <number> "<game>"')
+		print('Usage: "<name>" <number> ["<game>"]\n  without a game, prints the code for every game')
@@ -1,91 +1,614 @@
 #!/usr/bin/python
-from bitstring import BitArray
-from sys import argv
+import sys
+from sys import argv, stdin, stdout, stderr
+from collections import deque
+import os
+import time
 
-import aswreg_v2core as core
+import aswreg_backend
+import aswreg_profile
+import aswreg_v2int as fast
+from aswreg_v2int import CODE_ALPHABET, textcode_to_int, int_to_textcode
 
+# single-shot calls are mostly interpreter startup, so heavier modules
+# (bitstring/aswreg_v2core, csv, json, the process pool) are imported by the
+# functions that need them; the default int engine gives the same codes as
+# the BitArray one, ASWREG_BACKEND=bitarray (or backend=) picks the reference
+# path, see aswreg_backend
 
-def textcode_to_bincode(textcode):
-	textcode = textcode.upper()
-	if len(textcode.replace('-','')) > 12:
-		return
-
-	# no 0,1,O,I -- causes confusion, plus this amount allows for 5-bit indexing (32 values)
-	ref = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
-	r30 = BitArray(32)
-	r29 = BitArray(32)
 
-	for i in range(0,len(textcode)):
-		if (textcode[i] == '-'):
-			continue
-		r5 = BitArray('0b' + format(ref.index(textcode[i]),'032b'))
-		r3 = r30 << 5
-		r4 = r29 << 5
-		r3[27:32] ^= r29[0:5]
-		r0 = r5 >> 31
-		r29 = r4 | r5
-		r30 = r3 | r0
-
-	return r30 + r29
+def textcode_to_bincode(textcode):
+	from bitstring import BitArray
+	return BitArray(uint=textcode_to_int(textcode),length=64)
 
 def bincode_to_textcode(bincode):
-	ref = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
-	textcode = ''
+	return int_to_textcode(bincode.uint)
 
-	for i in range(4,64,5):
-		textcode += ref[int(bincode[i:i+5].bin,2)]
-		if i == 19 or i == 39:
-			textcode += '-'
 
-	return textcode
-
-
-def date_code(code,name,number,game,decade=0):
+def date_code(code,name,number,game,decade=0,backend=None):
+	if aswreg_backend.check_backend(backend) == 'int':
+		hash2 = textcode_to_int(code) ^ fast.get_hash1(name,number,game)
+		return fast.timestamp_to_datetime(fast.get_hash2_time(hash2),decade)
+	import aswreg_v2core as core
 	bincode = textcode_to_bincode(code)
-	hash1 = core.get_hash1(name,number,game)
+	hash1 = core.get_hash1(name,number,game,backend='bitarray')
 	hash2 = bincode ^ hash1
 	return core.timestamp_to_datetime(core.get_hash2_time(hash2),decade)
 
 
-def renew_code(code,name,number,game):
+def renew_code(code,name,number,game,backend=None):
+	if aswreg_backend.check_backend(backend) == 'int':
+		hash1 = fast.get_hash1(name,number,game)
+		hash2 = textcode_to_int(code) ^ hash1
+		hash2 = fast.set_hash2_time(hash2,0xff if game == 'Garendall' else fast.get_current_timestamp())
+		return int_to_textcode(fast.make_hash2_valid(hash2) ^ hash1)
+	import aswreg_v2core as core
+	from bitstring import BitArray
 	bincode = textcode_to_bincode(code)
-	hash1 = core.get_hash1(name,number,game)
+	hash1 = core.get_hash1(name,number,game,backend='bitarray')
 	hash2 = bincode ^ hash1
 	if game == 'Garendall': # Pillars of Garendall bug, just use 0xff
 		hash2 = core.set_hash2_time(hash2,BitArray('0xff'))
 	else:
 		hash2 = core.set_hash2_time(hash2,core.get_current_timestamp())
-	hash2 = core.make_hash2_valid(hash2)
+	hash2 = core.make_hash2_valid(hash2,backend='bitarray')
 	return bincode_to_textcode(hash2 ^ hash1)
 
+# every fortnight variant of one license: hash1 and the decode are done once,
+# only the 8 time bits and the checksum change between rows
+# returns [(timestamp, date, code)] for the 256 timestamps of a decade, or
+# for each fortnight from start to end (datetimes) when given, 256 from
+# start without an end
+def renew_calendar(code,name,number,game,decade=0,start=None,end=None):
+	if game == 'Garendall':
+		raise ValueError('Garendall codes always use timestamp 0xff, use renew')
+	if end is not None and start is None:
+		raise ValueError('an end date needs a start date')
+	if end is not None and end < start:
+		raise ValueError('end date %s is before start date %s' % (end.date(),start.date()))
+	hash1 = fast.get_hash1(name,number,game)
+	hash2 = fast.make_hash2_valid(textcode_to_int(code) ^ hash1) # then every row just adjusts it
+
+	if start is None:
+		fortnights = range(decade * 256,decade * 256 + 256)
+	else:
+		first = fast.datetime_to_fortnight(start)
+		fortnights = range(first,fast.datetime_to_fortnight(end) + 1 if end else first + 256)
+
+	rows = []
+	for fortnight in fortnights:
+		(decade,timestamp) = divmod(fortnight,256)
+		renewed = fast.set_hash2_time_valid(hash2,timestamp)
+		rows.append((timestamp,fast.timestamp_to_datetime(timestamp,decade),int_to_textcode(renewed ^ hash1)))
+	return rows
 
-def generate_code(name,number,game):
+
+def generate_code(name,number,game,backend=None):
+	backend = aswreg_backend.check_backend(backend)
 	if game != 'EV Nova':
-		print('Warning: generated codes will likely fail except for "EV Nova"')
-	hash1 = core.get_hash1(name,number,game)
-	hash2 = core.get_hash2(name,number,game)
+		print('Warning: generated codes will likely fail except for "EV Nova"',file=stderr)
+	if backend == 'int':
+		return int_to_textcode(fast.get_hash1(name,number,game) ^ fast.get_hash2(name,number,game))
+	import aswreg_v2core as core
+	hash1 = core.get_hash1(name,number,game,backend='bitarray')
+	hash2 = core.get_hash2(name,number,game,backend='bitarray')
 	return bincode_to_textcode(hash1 ^ hash2)
 
 
-if __name__ == '__main__':
+# checks a code against (name, number, game), cheapest test first so most
+# junk is turned away before f1/f2 are recomputed: format -> checksum -> f1/f2
+# returns (is_valid, reason, detail), reason is one of VERIFY_REASONS
+# only the format and the checksum can make a code invalid: f3 and the top
+# bit have no validation, and real codes (the README's renewed one included)
+# hold other multiples than the 1x generate_code uses, or other factors
+# altogether, so a factor mismatch is reported as 'not_generated' (valid,
+# but not generated by this tool)
+VERIFY_REASONS = ('ok','not_generated','format','checksum')
+
+def verify_code(code,name,number,game):
 	try:
-		if argv[1] == 'date' and (len(argv) == 7 or len(argv) == 6):
-			if len(argv) == 7:
-				print(date_code(argv[2],argv[3],int(argv[4]),argv[5],int(argv[6])))
-			else:
-				print(date_code(argv[2],argv[3],int(argv[4]),argv[5]))
-		elif argv[1] == 'renew' and len(argv) == 6:
-			print(renew_code(argv[2],argv[3],int(argv[4]),argv[5]))
-		elif argv[1] == 'generate' and len(argv) == 5:
-			print(generate_code(argv[2],int(argv[3]),argv[4]))
+		bincode = textcode_to_int(code.strip())
+	except ValueError as e:
+		return (False,'format',str(e))
+
+	return verify_hash2(bincode ^ fast.get_hash1(name,number,game),name,number,game)
+
+def verify_hash2(hash2,name,number,game):
+	(is_valid,expected,actual) = fast.check_hash2_valid(hash2)
+	if not is_valid:
+		return (False,'checksum','expected %d, got %d' % (expected,actual))
+
+	for (factor,get_factor,make_factor) in (('f1',fast.get_hash2_f1,fast.make_hash2_f1),('f2',fast.get_hash2_f2,fast.make_hash2_f2)):
+		(value,base) = (get_factor(hash2),make_factor(name,number,game))
+		if not is_factor_multiple(value,base):
+			return (True,'not_generated','%s 0x%04x is not a multiple of 0x%04x' % (factor,value,base))
+
+	return (True,'ok','')
+
+def format_verification(verification):
+	(is_valid,reason,detail) = verification
+	if reason == 'ok':
+		return 'valid'
+	if reason == 'not_generated':
+		return 'valid, not generated by this tool (%s)' % detail
+	return 'invalid: %s (%s)' % (reason,detail)
+
+def is_factor_multiple(value,base):
+	if base == 0:
+		return value == 0
+	return value != 0 and value % base == 0
+
+
+# copy-count recovery: the numbers in [first, last] that make code verify for
+# name and game, checked cheapest first -- hash1 and the checksum for a whole
+# block (on numpy lanes when numpy is installed), the f1/f2 kernels only for
+# the numbers that pass it
+# a code generated by this tool matches its f1/f2 as well ('ok'), a real
+# code only passes the checksum ('not_generated', see verify_code), which
+# about 1 number in 8 does by chance; so the search stops early on 'ok'
+# matches only, and otherwise lists every checksum match after them
+RECOVER_BLOCK = 8192
+
+def recover_candidates(bincode,name,game,first,last):
+	try:
+		import numpy as np
+		import aswreg_v2np as vec
+	except ImportError:
+		name = name.upper().replace(' ','')
+		candidates = []
+		for number in range(first,last + 1):
+			(key_lower,key_upper) = fast.get_hash1_name(name,number,*fast.get_hash1_game(game,number,0,0))
+			hash2 = bincode ^ ((key_upper & 0x0FFFFFFF) << 32 | key_lower)
+			if fast.hash2_checksum(hash2) == fast.get_hash2_checksum(hash2):
+				candidates.append((number,hash2))
+		return candidates
+	numbers = np.arange(first,last + 1,dtype=np.uint32)
+	hash2 = np.uint64(bincode) ^ vec.get_hash1_many([name] * len(numbers),numbers,game)
+	keep = vec.hash2_checksum_many(hash2) == vec.get_hash2_checksum_many(hash2)
+	return list(zip(numbers[keep].tolist(),hash2[keep].tolist()))
+
+def recover_block(bincode,name,game,first,last): # [(number, 'ok' or 'not_generated')]
+	return [(number,verify_hash2(hash2,name,number,game)[1]) for (number,hash2) in recover_candidates(bincode,name,game,first,last)]
+
+# blocks run in order on a pool (at most 2 per worker in flight) and the
+# search stops once matches 'ok' numbers are found, the lowest ones first;
+# returns [(number, reason)], the 'ok' ones first
+def recover_number(code,name,game,first=1,last=65535,matches=1,workers=1,progress=False):
+	bincode = textcode_to_int(code.strip())
+	blocks = deque((start,min(start + RECOVER_BLOCK - 1,last)) for start in range(first,last + 1,RECOVER_BLOCK))
+	(found,checksum_only) = ([],[])
+	(checked,start) = (0,time.time())
+	pool = None
+	if workers > 1:
+		from concurrent.futures import ProcessPoolExecutor
+		pool = ProcessPoolExecutor(workers)
+	try:
+		pending = deque()
+		while (blocks or pending) and len(found) < matches:
+			while blocks and len(pending) < (workers * 2 if pool else 1):
+				block = blocks.popleft()
+				if pool:
+					pending.append((block,pool.submit(recover_block,bincode,name,game,*block)))
+				else:
+					pending.append((block,None))
+			(block,future) = pending.popleft()
+			for (number,reason) in future.result() if future else recover_block(bincode,name,game,*block):
+				(found if reason == 'ok' else checksum_only).append((number,reason))
+			checked += block[1] - block[0] + 1
+			if progress:
+				elapsed = time.time() - start
+				print('%d/%d numbers, %.0f/s, %d found, %d checksum only' % (checked,last - first + 1,
+					checked / elapsed if elapsed else 0,len(found),len(checksum_only)),file=stderr)
+	finally:
+		if pool:
+			pool.shutdown(wait=False,cancel_futures=True)
+	if len(found) >= matches:
+		return found[:matches]
+	return found + checksum_only
+
+
+# batch mode: one record per line, either CSV (code,name,number,game,op) or a
+# JSON object with the same keys, optional trailing decade for "date"
+# records are streamed one at a time and answered in input order
+BATCH_FIELDS = ['code','name','number','game','op','decade']
+
+def read_batch(lines,fields=BATCH_FIELDS):
+	import csv, json
+	for (line_no,line) in enumerate(lines,1):
+		line = line.strip()
+		if not line:
+			continue
+		if line.startswith('{'):
+			try:
+				record = json.loads(line)
+			except ValueError as e:
+				record = str(e) # exceptions don't all survive pickling to workers
+			yield (line_no,'jsonl',record)
 		else:
-			raise
-	except:
-		usage = """Usage\n-----\n
+			row = next(csv.reader([line]))
+			if row == fields[:len(row)]: # header
+				continue
+			yield (line_no,'csv',dict(zip(fields,row)))
+
+def run_batch_record(record):
+	if not isinstance(record,dict):
+		raise ValueError('bad record: ' + str(record))
+	op = record.get('op')
+	name = record.get('name')
+	number = int(record.get('number'))
+	game = record.get('game')
+	if op == 'renew':
+		return renew_code(record.get('code'),name,number,game)
+	elif op == 'date':
+		return date_code(record.get('code'),name,number,game,int(record.get('decade') or 0))
+	elif op == 'generate':
+		return generate_code(name,number,game)
+	elif op == 'verify':
+		return format_verification(verify_code(record.get('code'),name,number,game))
+	raise ValueError('unknown op: ' + str(op))
+
+def process_batch(records):
+	for (line_no,fmt,record) in records:
+		try:
+			yield (line_no,fmt,record,run_batch_record(record),None)
+		except Exception as e:
+			yield (line_no,fmt,record,None,'%s: %s' % (type(e).__name__,e))
+
+def write_batch(results,out):
+	import csv, json
+	writer = csv.writer(out,lineterminator='\n')
+	for (line_no,fmt,record,result,error) in results:
+		if fmt == 'jsonl':
+			if not isinstance(record,dict):
+				record = {}
+			out.write(json.dumps(dict(record,line=line_no,result=result,error=error)) + '\n')
+		else:
+			writer.writerow([line_no] + [record.get(k,'') for k in BATCH_FIELDS[:5]] + [result or '',error or ''])
+
+# multi-core batch: records are cut into chunks that run on a process pool,
+# at most 2 chunks per worker are in flight so memory stays bounded and
+# results are written back in input order
+def chunked(records,size):
+	chunk = []
+	for record in records:
+		chunk.append(record)
+		if len(chunk) >= size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+def process_batch_chunk(chunk):
+	return list(process_batch(chunk))
+
+def submit_chunk(pool,chunk):
+	from concurrent.futures import Future
+	from concurrent.futures.process import BrokenProcessPool
+	try:
+		return pool.submit(process_batch_chunk,chunk)
+	except BrokenProcessPool as e: # noticed the dead worker before we did
+		future = Future()
+		future.set_exception(e)
+		return future
+
+def process_batch_parallel(records,workers,chunk_size=256,progress=False):
+	from concurrent.futures import ProcessPoolExecutor
+	from concurrent.futures.process import BrokenProcessPool
+	pool = ProcessPoolExecutor(workers)
+	pending = deque() # [chunk, future], future is None until (re)submitted
+	suspects = 0 # chunks at the head of pending to run one at a time
+	done = 0
+	start = time.time()
+	try:
+		chunks = chunked(records,chunk_size)
+		while True:
+			while not suspects and len(pending) < workers * 2:
+				chunk = next(chunks,None)
+				if chunk is None:
+					break
+				pending.append([chunk,submit_chunk(pool,chunk)])
+			if not pending:
+				break
+			(chunk,future) = pending[0]
+			if future is None:
+				future = pending[0][1] = submit_chunk(pool,chunk)
+			try:
+				results = future.result()
+			except BrokenProcessPool as e:
+				# a worker died (killed, out of memory...) and took the pool and
+				# every chunk in flight with it, without saying which chunk did it:
+				# start a fresh pool and run those chunks again one at a time, a
+				# chunk that breaks the pool on its own reports an error on each
+				# record and the others go through
+				pool.shutdown(wait=False)
+				pool = ProcessPoolExecutor(workers)
+				if not suspects:
+					suspects = len(pending)
+					for entry in pending:
+						entry[1] = None
+					continue
+				results = [r[:3] + (None,'WorkerError: %s' % e) for r in chunk]
+			except Exception as e:
+				results = [r[:3] + (None,'WorkerError: %s: %s' % (type(e).__name__,e)) for r in chunk]
+			pending.popleft()
+			suspects = max(suspects - 1,0)
+			for result in results:
+				yield result
+			done += len(chunk)
+			if progress:
+				elapsed = time.time() - start
+				print('%d records, %.0f/s' % (done,done / elapsed if elapsed else 0),file=stderr)
+	finally:
+		pool.shutdown(wait=False,cancel_futures=True)
+
+def batch(path='-',workers=1,chunk_size=256,progress=False):
+	f = stdin if path == '-' else open(path)
+	try:
+		if workers > 1:
+			results = process_batch_parallel(read_batch(f),workers,chunk_size,progress)
+		else:
+			results = process_batch(read_batch(f))
+		write_batch(results,stdout)
+	finally:
+		if f is not stdin:
+			f.close()
+
+
+# bulk dating: the hash2 timestamps of many codes, each one's decade inferred
+# from an issue date hint or as the last decade not in the future, summed up
+# into per-game histograms
+# records are CSV code,name,number,game(,issued YYYY-MM-DD) or JSON objects
+# with optional issued and decade; timestamps are gathered a chunk at a time,
+# on numpy lanes when numpy is installed
+DATE_FIELDS = ['code','name','number','game','issued']
+DATE_CHUNK = 65536
+
+def record_timestamps(chunk): # [(line_no, record, stamp, error)]
+	(parsed,results) = ([],[])
+	for (line_no,fmt,record) in chunk:
+		try:
+			if not isinstance(record,dict):
+				raise ValueError('bad record: ' + str(record))
+			parsed.append((line_no,record,textcode_to_int(record.get('code').strip()),record.get('name'),int(record.get('number')),record.get('game')))
+		except Exception as e:
+			results.append((line_no,record,None,'%s: %s' % (type(e).__name__,e)))
+	if not parsed:
+		return results
+	try:
+		import numpy as np
+		import aswreg_v2np as vec
+	except ImportError:
+		stamps = [fast.get_hash2_time(bincode ^ fast.get_hash1(name,number,game)) for (line_no,record,bincode,name,number,game) in parsed]
+	else:
+		(line_nos,records,bincodes,names,numbers,games) = zip(*parsed)
+		hash1 = vec.get_hash1_many(names,numbers,list(games))
+		stamps = vec.get_hash2_time_many(np.array(bincodes,dtype=np.uint64) ^ hash1).tolist()
+	results += [(p[0],p[1],stamp,None) for (p,stamp) in zip(parsed,stamps)]
+	return sorted(results,key=lambda result: result[0])
+
+# (line_no, game, stamp, decade, date, error) per record, date is None for
+# errors and for renewed Garendall codes (always stamped 0xff)
+def date_records(records,now=None):
+	from datetime import datetime
+	now = now or datetime.utcnow()
+	for chunk in chunked(records,DATE_CHUNK):
+		for (line_no,record,stamp,error) in record_timestamps(chunk):
+			game = record.get('game') if isinstance(record,dict) else None
+			if error or (game == 'Garendall' and stamp == 0xff):
+				yield (line_no,game,stamp,None,None,error)
+				continue
+			try:
+				if record.get('decade') not in (None,''):
+					decade = int(record['decade'])
+				elif record.get('issued'):
+					decade = fast.infer_decade(stamp,datetime.fromisoformat(record['issued']))
+				else:
+					decade = fast.infer_decade(stamp,now,latest=True)
+			except ValueError as e:
+				yield (line_no,game,stamp,None,None,'ValueError: %s' % e)
+				continue
+			yield (line_no,game,stamp,decade,fast.fortnight_to_datetime(stamp + 256 * decade),None)
+
+def date_report(path='-',bucket='year',records=False):
+	from collections import Counter
+	bucket_format = {'year': '%Y','month': '%Y-%m'}[bucket]
+	histograms = {}
+	errors = 0
+	f = stdin if path == '-' else open(path)
+	try:
+		for (line_no,game,stamp,decade,date,error) in date_records(read_batch(f,DATE_FIELDS)):
+			if error:
+				errors += 1
+				print('line %d: %s' % (line_no,error),file=stderr)
+				continue
+			key = date.strftime(bucket_format) if date else 'undated'
+			histograms.setdefault(game,Counter())[key] += 1
+			if records:
+				print('%d\t%s\t%d\t%s\t%s' % (line_no,game,stamp,'' if decade is None else decade,date.strftime('%Y-%m-%d') if date else 'undated'))
+	finally:
+		if f is not stdin:
+			f.close()
+	for (game,counts) in sorted(histograms.items()):
+		print('%s (%d codes)' % (game,sum(counts.values())))
+		widest = max(counts.values())
+		for (key,count) in sorted(counts.items()):
+			print('  %-8s %8d  %s' % (key,count,'#' * max(1,count * 40 // widest)))
+	if errors:
+		print('%d record(s) with errors' % errors)
+	return errors == 0
+
+# command line mistakes, the CLIs print their usage for these and let any
+# other error through
+class UsageError(ValueError):
+	pass
+
+def int_arg(text):
+	try:
+		return int(text)
+	except ValueError:
+		raise UsageError('not a number: ' + str(text))
+
+# pull --flag value options out of an argv list, returns (positional, options)
+def parse_options(args,defaults):
+	args = list(args)
+	options = dict(defaults)
+	for (flag,default) in defaults.items():
+		option = '--' + flag.replace('_','-')
+		if option in args:
+			i = args.index(option)
+			if isinstance(default,bool):
+				options[flag] = True
+				del args[i]
+			elif i + 1 == len(args):
+				raise UsageError(option + ' needs a value')
+			else:
+				try:
+					options[flag] = type(default)(args[i + 1])
+				except ValueError:
+					raise UsageError('bad %s: %s' % (option,args[i + 1]))
+				del args[i:i + 2]
+	return (args,options)
+
+
+# what a single-shot command's own imports cost on top of a bare interpreter,
+# as reported by python -X importtime (with .pyc files already written);
+# timings depend on the machine, so they are only checked against an
+# explicit budget, and none of the commands should pull in the slow modules
+SLOW_IMPORTS = ('bitstring','aswreg_v2core','numpy','concurrent.futures','csv','json')
+
+def import_times(args):
+	import subprocess
+	proc = subprocess.run([sys.executable,'-X','importtime'] + args,
+		stdout=subprocess.DEVNULL,stderr=subprocess.PIPE,text=True)
+	imports = []
+	for line in proc.stderr.splitlines():
+		fields = line[len('import time:'):].split('|')
+		if not line.startswith('import time:') or not fields[0].strip().isdigit():
+			continue
+		module = fields[2].rstrip()
+		depth = (len(module) - len(module.lstrip())) // 2
+		imports.append((int(fields[1]) / 1000.0,int(fields[0]) / 1000.0,depth,module.strip()))
+	return imports
+
+# runs a command under -X importtime and prints its most expensive imports,
+# returns False when a budget (ms) is given and the command goes over it or
+# loads a slow module
+def import_report(args,top=15,budget=0.0):
+	baseline = set(module for (cumulative,own,depth,module) in import_times(['-c','pass']))
+	start = time.time()
+	imports = [i for i in import_times([os.path.abspath(__file__)] + args) if i[3] not in baseline]
+	wall = (time.time() - start) * 1000
+
+	total = sum(cumulative for (cumulative,own,depth,module) in imports if depth == 0)
+	print('%10s %10s  module' % ('cumul ms','self ms'))
+	for (cumulative,own,depth,module) in sorted(imports,reverse=True)[:top]:
+		print('%10.2f %10.2f  %s' % (cumulative,own,module))
+
+	command = args[0] if args else 'usage'
+	loaded = [module for module in SLOW_IMPORTS if module in [i[3] for i in imports]]
+	print('\n%s: imports %.2f ms, wall %.2f ms, budget %s' % (command,total,wall,'%g ms' % budget if budget else 'none'))
+	if loaded:
+		print('slow imports loaded: ' + ', '.join(loaded))
+	return not budget or (total <= budget and not loaded)
+
+# stage timing for aswreg_profile, wraps these while profiling is on
+aswreg_profile.register(globals(),aswreg_profile.STAGES)
+
+
+usage = """Usage\n-----\n
 Renew codes with "renew" command:
 renew <code> "<name>" <number> "<game>"\n
+Renewed codes for every fortnight of a decade (or of a date range) with "renew-calendar" command:
+renew-calendar <code> "<name>" <number> "<game>" (optional: --decade N or --start YYYY-MM-DD --end YYYY-MM-DD)
+  prints timestamp, approximate date and code, tab separated\n
 Check approximate date of a code with "date" command:
-date <code> "<name>" <number> "<game>" (optional: decade_offset)\n
+date <code> "<name>" <number> "<game>" (optional: decade_offset)
+or date many codes at once, histogram per game (CSV or JSON lines, - for stdin):
+date <file> (optional: --bucket year|month --records)
+  records: code,name,number,game(,issued) -- the decade comes from decade (JSON), the
+  issue date YYYY-MM-DD, or else is the last one not in the future; --records lists each code\n
 Generate codes with "generate" command
-generate "<name>" <number> "<game>"\n"""
-		print(usage)
+generate "<name>" <number> "<game>"\n
+Check a code with "verify" command (exit status 1 and the reason when invalid)
+verify <code> "<name>" <number> "<game>"\n
+Find the number of copies a code was made for with "recover-number" command (exit status 1 when none match)
+recover-number <code> "<name>" "<game>" (optional: --first 1 --last 65535 --matches 1 --workers N --progress)
+  numbers this tool would have generated the code for come first; codes from elsewhere only
+  pass the checksum, like about 1 number in 8, so all of those are listed (narrow --first/--last)\n
+Process many records with "batch" command (CSV or JSON lines, stdin by default)
+batch (optional: <file>) (optional: --workers N --chunk-size N --progress)
+  records: code,name,number,game,op(,decade) -- op is renew, date, generate or verify\n
+Inspect or empty the persistent result cache with "cache" command
+cache stats|clear (optional: --dir <directory>, default $ASWREG_CACHE or ~/.cache/aswreg)
+  the cache is used when ASWREG_CACHE=<directory> is set (ASWREG_CACHE_SIZE caps its entries)\n
+Show what a command spends on imports with "importtime" (exit status 1 when over --budget)
+importtime (optional: --budget MS) (optional: <command and its arguments>)\n"""
+
+if __name__ == '__main__':
+	status = 0
+	command = argv[1] if len(argv) > 1 else ''
+	try:
+		if command == 'date':
+			defaults = {'bucket': 'year','records': False}
+			(args,options) = parse_options(argv[2:],defaults)
+			if len(args) in (4,5) and options == defaults:
+				print(date_code(args[0],args[1],int_arg(args[2]),args[3],*[int_arg(arg) for arg in args[4:]]))
+			elif len(args) == 1 and options['bucket'] in ('year','month'): # bulk, - reads stdin
+				status = 0 if date_report(args[0],**options) else 1
+			else:
+				raise UsageError(command)
+		elif command == 'renew' and len(argv) == 6:
+			print(renew_code(argv[2],argv[3],int_arg(argv[4]),argv[5]))
+		elif command == 'renew-calendar':
+			(args,options) = parse_options(argv[2:],{'decade': 0,'start': '','end': ''})
+			if len(args) != 4:
+				raise UsageError(command)
+			from datetime import datetime
+			(start,end) = [datetime.strptime(options[k],'%Y-%m-%d') if options[k] else None for k in ('start','end')]
+			for row in renew_calendar(args[0],args[1],int_arg(args[2]),args[3],options['decade'],start,end):
+				print('%d\t%s\t%s' % row)
+		elif command == 'generate' and len(argv) == 5:
+			print(generate_code(argv[2],int_arg(argv[3]),argv[4]))
+		elif command == 'verify' and len(argv) == 6:
+			verification = verify_code(argv[2],argv[3],int_arg(argv[4]),argv[5])
+			print(format_verification(verification))
+			status = 0 if verification[0] else 1
+		elif command == 'recover-number':
+			(args,options) = parse_options(argv[2:],{'first': 1,'last': 65535,'matches': 1,'workers': 1,'progress': False})
+			if len(args) != 3:
+				raise UsageError(command)
+			numbers = recover_number(args[0],args[1],args[2],**options)
+			for (number,reason) in numbers:
+				print(number if reason == 'ok' else '%d\tnot generated by this tool (checksum only)' % number)
+			status = 0 if numbers else 1
+		elif command == 'batch':
+			(args,options) = parse_options(argv[2:],{'workers': 1,'chunk_size': 256,'progress': False})
+			if len(args) > 1:
+				raise UsageError(command)
+			batch(*args,**options)
+		elif command == 'cache':
+			(args,options) = parse_options(argv[2:],{'dir': ''})
+			if args not in (['stats'],['clear']):
+				raise UsageError(command)
+			import aswreg_memo
+			cache = aswreg_memo.DiskCache(options['dir']) if options['dir'] else aswreg_memo.disk or aswreg_memo.DiskCache()
+			if args[0] == 'clear':
+				cache.clear()
+				print('cleared %s' % cache.path)
+			else:
+				stats = cache.stats()
+				print('%s (version %d, %d bytes, max %d entries)' % (stats['path'],stats['version'],stats['bytes'],stats['maxsize']))
+				for (kind,count) in sorted(stats['entries'].items()):
+					print('%-20s %8d' % (kind,count))
+		elif command == 'importtime':
+			(args,options) = parse_options(argv[2:],{'budget': 0.0})
+			status = 0 if import_report(args,budget=options['budget']) else 1
+		else:
+			raise UsageError(command)
+	except UsageError:
+		print(usage,file=stdout if command == '' else stderr)
+		status = 0 if command == '' else 2
+	except ValueError as e: # bad code, date, ...: the inputs, not the usage
+		print('error: %s' % e,file=stderr)
+		status = 1
+	sys.exit(status)
@@ -1,6 +1,18 @@
 from bitstring import BitArray, BitStream
 from collections import deque
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+import aswreg_backend
+import aswreg_memo
+import aswreg_profile
+import aswreg_v2int
+
+
+# register engine: 'int' (aswreg_v2int) or 'bitarray' (this module, the
+# reference), see aswreg_backend for the default
+def use_int_backend(backend=None):
+  return aswreg_backend.check_backend(backend) == 'int'
 
 
 
@@ -47,19 +59,40 @@ def rotate_mask_insert(ra,rb,num_shift,num_mask_start,num_mask_end):
 
 
 ### HASH1
-def get_hash1(name,number,game):
-  key_lower = BitArray(32) # 4-byte key to process on
-  key_upper = BitArray(32) # holds overflow values
+def get_hash1(name,number,game,backend=None):
+  if use_int_backend(backend):
+    return BitArray(uint=aswreg_v2int.get_hash1(name,number,game),length=64)
+  return make_hash1(name,number,game)
+
+@aswreg_memo.memoized('hash1',lambda b: b.uint,lambda v: BitArray(uint=v,length=64),'bitarray')
+def make_hash1(name,number,game):
+  # game pass only depends on (game, number), start from its cached state
+  (key_lower,key_upper) = get_hash1_game_state(game,number)
+  key_lower = BitArray(uint=key_lower,length=32) # 4-byte key to process on
+  key_upper = BitArray(uint=key_upper,length=32) # holds overflow values
 
   name = name.upper().replace(' ','')
 
-  (key_lower,key_upper) = get_hash1_game(game,number,key_lower,key_upper)
   (key_lower,key_upper) = get_hash1_name(name,number,key_lower,key_upper)
 
   key_upper[0:4] = BitArray(4) # zero out top nibble
 
   return key_upper + key_lower
 
+# (key_lower,key_upper) after the game pass, kept as ints so it can be shared
+@lru_cache(maxsize=1024)
+def get_hash1_game_state(game,number):
+  (key_lower,key_upper) = get_hash1_game(game,number,BitArray(32),BitArray(32))
+  return (key_lower.uint,key_upper.uint)
+
+# fill the game state table ahead of a batch
+def prewarm_hash1_games(games,numbers,backend=None):
+  if use_int_backend(backend):
+    return aswreg_v2int.prewarm_hash1_games(games,numbers)
+  for game in games:
+    for number in numbers:
+      get_hash1_game_state(game,number)
+
 def get_hash1_game(string,number,code,overflow):
   r5 = number
   r0 = code
@@ -121,7 +154,10 @@ def get_hash1_name(string,number,code,overflow):
 
 
 ### HASH2
-def get_hash2(name,number,game):
+def get_hash2(name,number,game,backend=None):
+  if use_int_backend(backend):
+    return BitArray(uint=aswreg_v2int.get_hash2(name,number,game),length=64)
+
   hash2 = BitArray(64)
 
   f1 = make_hash2_f1(name,number,game)
@@ -136,7 +172,11 @@ def get_hash2(name,number,game):
   return hash2
 
 
-def make_hash2_valid(hash2):
+def make_hash2_valid(hash2,backend=None):
+  if use_int_backend(backend):
+    hash2[61:] = BitArray(uint=aswreg_v2int.make_hash2_valid(hash2.uint) & 7,length=3)
+    return hash2
+
   (is_valid, expected, actual) = check_hash2_valid(hash2)
   if not is_valid:
     hash2[61:] = expected
@@ -243,6 +283,7 @@ def get_hash2_topbit(hash2):
 
 # main functions for the basekey factors
 # these functions for EV Nova only
+@aswreg_memo.memoized('f1',lambda b: b.uint,lambda v: BitArray(uint=v,length=16),'bitarray')
 def make_hash2_f1(name,number,game):
   name = name.upper().replace(' ','')
   ln = len(name)
@@ -515,6 +556,7 @@ def make_hash2_f1(name,number,game):
   return r0[16:]
 
 
+@aswreg_memo.memoized('f2',lambda b: b.uint,lambda v: BitArray(uint=v,length=16),'bitarray')
 def make_hash2_f2(name,number,game):
   name = name.upper().replace(' ','')
   ln = len(name)
@@ -795,3 +837,7 @@ def make_hash2_f2(name,number,game):
   r0 = rotate_mask_and(r19,0,24,31)
 
   return r0[16:]
+
+
+# stage timing for aswreg_profile, wraps these while profiling is on
+aswreg_profile.register(globals(),aswreg_profile.STAGES)
@@ -0,0 +1,319 @@
+# aswreg_v2core on plain python ints, no bitstring needed
+# registers are 32-bit unsigned ints, hash1/hash2 are 64-bit unsigned ints
+# bit positions below keep the BitArray convention (index 0 is the MSB)
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import aswreg_layout
+import aswreg_memo
+import aswreg_profile
+
+M32 = 0xFFFFFFFF
+M64 = 0xFFFFFFFFFFFFFFFF
+
+
+
+### SUPPORT FUNCTIONS
+# binary conversion support
+def bits_to_int(b): # 2's comp conversion from 32-bit register
+  if b & 0x80000000:
+    return b - 0x100000000
+  else:
+    return b
+
+def int_to_bits(i): # 2's comp conversion to 32-bit register
+  return i & M32
+
+def char_to_bits(c):
+  return ord(c)
+
+# 2's complement addition
+def addi(a,b):
+  return (a + b) & M32
+
+# rotation and masking operations
+# same direction as deque.rotate on the MSB-first bit list, positive rotates right
+def rotate(bits,num):
+  num %= 32
+  return ((bits >> num) | (bits << (32 - num))) & M32
+
+def make_mask(num_mask_start,num_mask_end):
+  return ((1 << (num_mask_end + 1 - num_mask_start)) - 1) << (31 - num_mask_end)
+
+def rotate_mask_and(rb,num_shift,num_mask_start,num_mask_end):
+  return rotate(rb,num_shift) & make_mask(num_mask_start,num_mask_end)
+
+def rotate_mask_insert(ra,rb,num_shift,num_mask_start,num_mask_end):
+  mask = make_mask(num_mask_start,num_mask_end)
+  return (ra & ~mask & M32) | (rotate(rb,num_shift) & mask)
+
+
+
+### HASH1
+@aswreg_memo.memoized('hash1')
+def get_hash1(name,number,game):
+  name = name.upper().replace(' ','')
+
+  (key_lower,key_upper) = get_hash1_game_state(game,number)
+  (key_lower,key_upper) = get_hash1_name(name,number,key_lower,key_upper)
+
+  key_upper &= 0x0FFFFFFF # zero out top nibble
+
+  return (key_upper << 32) | key_lower
+
+# the game pass only depends on (game, number), so it is computed once
+@lru_cache(maxsize=1024)
+def get_hash1_game_state(game,number):
+  return get_hash1_game(game,number,0,0)
+
+def prewarm_hash1_games(games,numbers):
+  for game in games:
+    for number in numbers:
+      get_hash1_game_state(game,number)
+
+# both passes rotate the 64-bit (overflow,code) pair left, xor in the
+# character, rotate left 1 more and xor the copy count term into the low word
+def get_hash1_game(string,number,code,overflow):
+  r5 = number
+  r0 = code
+  r9 = overflow
+  for i in range(0,len(string)):
+    r8 = ord(string[i])
+    r7 = (r5 * (i + 7)) & M32
+    r10 = ((r0 << 4) & M32) ^ (r9 >> 28) ^ r8
+    r9 = ((r9 << 4) & M32) ^ (r0 >> 28)
+    r0 = ((r10 << 1) & M32) ^ (r9 >> 31) ^ r7
+    r9 = ((r9 << 1) & M32) ^ (r10 >> 31)
+
+  return (r0,r9)
+
+def get_hash1_name(string,number,code,overflow):
+  r5 = number
+  r0 = code
+  r9 = overflow
+  for i in range(0,len(string)):
+    r6 = ord(string[i])
+    r3 = ((i + 13) * r5 * 3) & M32
+    r10 = ((r0 << 3) & M32) ^ (r9 >> 29) ^ r6
+    r8 = ((r9 << 3) & M32) ^ (r0 >> 29)
+    r0 = ((r10 << 1) & M32) ^ (r8 >> 31) ^ r3
+    r9 = ((r8 << 1) & M32) ^ (r10 >> 31)
+
+  return (r0,r9)
+
+
+
+### HASH2
+def get_hash2(name,number,game):
+  hash2 = 0
+
+  (f1,f2) = make_hash2_factors(name,number,game)
+
+  hash2 = set_hash2_f1(hash2,f1)
+  hash2 = set_hash2_f2(hash2,f2)
+  hash2 = clear_hash2_unused(hash2)
+  hash2 = set_hash2_time(hash2,get_current_timestamp())
+  hash2 = make_hash2_valid(hash2)
+
+  return hash2
+
+
+def make_hash2_valid(hash2):
+  (is_valid, expected, actual) = check_hash2_valid(hash2)
+  if not is_valid:
+    hash2 = (hash2 & ~7) | expected
+  return hash2
+
+def check_hash2_valid(hash2):
+  expected = hash2_checksum(hash2) # sum of the 3-bit groups of bits 5-60, see aswreg_layout
+  actual = hash2 & 7
+
+  return (expected == actual, expected, actual)
+
+
+def get_current_timestamp():
+  return datetime_to_timestamp(datetime.utcnow())
+
+def datetime_to_timestamp(date):
+  return datetime_to_fortnight(date) % 256
+
+def datetime_to_fortnight(date): # not wrapped to 8 bits, fortnight // 256 is the decade
+  # need number of fortnights passed since 2000/12/25 (Eastern Time)
+  basedate = datetime(2000, 12, 25, 4, 0) # UTC time is 4 hrs ahead Eastern
+
+  weeks = (date - basedate).days / 7
+  return int(weeks / 2)
+
+def timestamp_to_datetime(stamp,decade=0):
+  # timestamps hold 256 fortnights, about 512 weeks or 10 years
+  # by default, assume first decade but can manually advance if needed
+  basedate = datetime(2000, 12, 25, 4, 0) # Christmas Day 2000 in New York, UTC time
+
+  fortnights = stamp + (256 * decade)
+  weeks = fortnights * 2
+  days = weeks * 7
+  date = basedate + timedelta(days=days)
+
+  return "~ " + date.strftime("%B %d, %Y")
+
+def fortnight_to_datetime(fortnight): # start of an unwrapped fortnight (stamp + 256 * decade)
+  return datetime(2000, 12, 25, 4, 0) + timedelta(days=14 * fortnight)
+
+# the decade that puts stamp closest to hint (about when the code was
+# issued), or with latest=True the last decade that doesn't pass hint
+def infer_decade(stamp,hint,latest=False):
+  fortnight = datetime_to_fortnight(hint)
+  if latest:
+    return max(0,(fortnight - stamp) // 256)
+  return max(0,(fortnight - stamp + 128) // 256)
+
+# get a single bit / nibble at a BitArray-style position of the 64-bit hash2
+def get_bits(hash2,start,length):
+  return (hash2 >> (64 - start - length)) & ((1 << length) - 1)
+
+def set_bits(hash2,start,length,value):
+  shift = 64 - start - length
+  mask = ((1 << length) - 1) << shift
+  return (hash2 & ~mask & M64) | ((value << shift) & mask)
+
+# field accessors compiled from the layout in aswreg_layout, a few
+# mask-and-shift ops each
+TIME_BITS = aswreg_layout.TIME_BITS
+F1_NIBBLES = aswreg_layout.F1_NIBBLES
+F2_NIBBLES = aswreg_layout.F2_NIBBLES
+F3_NIBBLES = aswreg_layout.F3_NIBBLES
+
+layout = aswreg_layout.compile_fields('int')
+set_hash2_time = layout['set_hash2_time']
+get_hash2_time = layout['get_hash2_time']
+clear_hash2_unused = layout['clear_hash2_unused'] # top 5 bits and f3 can all be 0
+
+# can be any multiple of the base factors, the functions included just return 1x
+set_hash2_f1 = layout['set_hash2_f1']
+set_hash2_f2 = layout['set_hash2_f2']
+get_hash2_f1 = layout['get_hash2_f1']
+get_hash2_f2 = layout['get_hash2_f2']
+
+# neither f3 nor topbit have separate validation, can just be 0
+get_hash2_f3 = layout['get_hash2_f3']
+get_hash2_topbit = layout['get_hash2_topbit']
+
+# the 3-bit checksum field as stored
+get_hash2_checksum = layout['get_hash2_checksum']
+set_hash2_checksum = layout['set_hash2_checksum']
+
+# setters that keep a valid checksum valid by adjusting it for the changed
+# field instead of summing all 19 groups again
+hash2_checksum = layout['hash2_checksum']
+set_hash2_time_valid = layout['set_hash2_time_valid']
+set_hash2_f1_valid = layout['set_hash2_f1_valid']
+set_hash2_f2_valid = layout['set_hash2_f2_valid']
+
+
+# main functions for the basekey factors, compiled from the register
+# programs in aswreg_ir (dead registers dropped, rotate/mask pairs fused)
+# compiled on first use, date and renew never need them
+# these functions for EV Nova only
+def load_kernel(program_name):
+  import aswreg_ir
+  compiled = aswreg_memo.memoized(program_name)(aswreg_ir.load(program_name,'int'))
+  compiled = aswreg_profile.dispatch(program_name,compiled)
+  globals()['make_hash2_' + program_name] = compiled
+  return compiled
+
+def lazy_kernel(program_name): # swaps itself out for the compiled kernel
+  kernel = [] # for callers still holding the stub
+  def first_call(name,number,game):
+    if not kernel:
+      kernel.append(load_kernel(program_name))
+    return kernel[0](name,number,game)
+  first_call.lazy = True
+  return first_call
+
+make_hash2_f1 = lazy_kernel('f1')
+make_hash2_f2 = lazy_kernel('f2')
+
+# the kernels partially evaluated for one (game, number): aswreg_ir folds
+# every game- and number-only subexpression to a constant so only the name
+# work is left (about a third less per call); returns make_factors(name) ->
+# (f1, f2), a new pair costs a compile, kept in memory only (no files per
+# pair); results go through the same memo entries as the generic kernels
+# the last SPECIALIZED_MAX pairs are kept in specialized, most recent last
+SPECIALIZED_MAX = 64
+specialized = OrderedDict()
+
+def specialize(game,number):
+  pair = (game,number)
+  make_factors = specialized.get(pair)
+  if make_factors is not None:
+    specialized.move_to_end(pair)
+    return make_factors
+  import aswreg_ir
+  consts = dict([(('game',k),ord(c)) for (k,c) in enumerate(game)] + [(('number',),number & M32)])
+  (f1,f2) = [aswreg_memo.memoized(program_name)(aswreg_ir.load(program_name,'int',consts=consts,disk_cache=False))
+    for program_name in ('f1','f2')]
+  def make_factors(name):
+    return (f1(name,number,game),f2(name,number,game))
+  make_factors = specialized[pair] = aswreg_profile.dispatch('factors.specialized',make_factors)
+  while len(specialized) > SPECIALIZED_MAX:
+    specialized.popitem(last=False)
+  return make_factors
+
+# with ASWREG_SPECIALIZE=<calls>, get_hash2 switches a (game, number) pair
+# to specialize() once it has seen it this often (8192 or so pays for the
+# compile; batches are nearly always one game and one copy count); off by
+# default
+SPECIALIZE_AFTER = int(os.environ.get('ASWREG_SPECIALIZE',0))
+pair_calls = {}
+
+def make_hash2_factors(name,number,game):
+  if not SPECIALIZE_AFTER:
+    return (make_hash2_f1(name,number,game),make_hash2_f2(name,number,game))
+  pair = (game,number)
+  calls = pair_calls.get(pair,0) + 1
+  if calls > SPECIALIZE_AFTER:
+    return specialize(game,number)(name)
+  if len(pair_calls) >= 4096: # many pairs, none of them hot
+    pair_calls.clear()
+  pair_calls[pair] = calls
+  return (make_hash2_f1(name,number,game),make_hash2_f2(name,number,game))
+
+
+
+### TEXT CODES
+# 12 base-32 characters hold the low 60 bits of the 64-bit code, written
+# bare or grouped XXXX-XXXX-XXXX
+# no 0,1,O,I -- causes confusion, plus this amount allows for 5-bit indexing (32 values)
+CODE_ALPHABET = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
+
+# byte -> the digit int(...,32) expects for that code character (either case),
+# '!' for everything else so int() rejects it (signs, '_', spaces included)
+DECODE_TABLE = bytes(ord('0123456789abcdefghijklmnopqrstuv'[CODE_ALPHABET.index(chr(b).upper())])
+  if chr(b).upper() in CODE_ALPHABET else ord('!') for b in range(0,256))
+# 10 bits -> 2 characters
+ENCODE_PAIRS = [a + b for a in CODE_ALPHABET for b in CODE_ALPHABET]
+
+def textcode_to_int(textcode):
+  if len(textcode) == 14 and textcode[4] == '-' and textcode[9] == '-':
+    textcode = textcode[0:4] + textcode[5:9] + textcode[10:14]
+  if len(textcode) != 12:
+    raise ValueError('expected XXXX-XXXX-XXXX or 12 characters, got %r' % textcode)
+  try:
+    return int(textcode.encode('ascii').translate(DECODE_TABLE),32)
+  except ValueError:
+    bad = [c for c in textcode if c.upper() not in CODE_ALPHABET]
+    raise ValueError('bad character %r in code (no 0, 1, I or O)' % bad[0]) from None
+
+def int_to_textcode(value):
+  pairs = ENCODE_PAIRS
+  return (pairs[(value >> 50) & 1023] + pairs[(value >> 40) & 1023] + '-'
+    + pairs[(value >> 30) & 1023] + pairs[(value >> 20) & 1023] + '-'
+    + pairs[(value >> 10) & 1023] + pairs[value & 1023])
+
+
+
+# stage timing for aswreg_profile, wraps these while profiling is on
+aswreg_profile.register(globals(),aswreg_profile.STAGES)
+aswreg_profile.register(specialized,'factors.specialized')
@@ -0,0 +1,207 @@
+# batched aswreg_v2core on numpy arrays, one lane per license
+# needs numpy, which is only used for bulk work and is not in requirements.txt
+# results are bit-identical to aswreg_v2int / aswreg_v2core
+import numpy as np
+
+import aswreg_ir
+import aswreg_layout
+import aswreg_profile
+import aswreg_v2int
+
+
+U = np.uint32 # constants in generated kernels
+
+
+
+### SUPPORT FUNCTIONS
+# fixed-width uint32 char matrix plus the per-lane active mask for padded strings
+def strings_to_lanes(strings):
+  width = max([len(s) for s in strings] + [1])
+  padded = ''.join([s.ljust(width,'\0') for s in strings])
+  chars = np.frombuffer(padded.encode('utf-32-le'),dtype=np.uint32).reshape(len(strings),width)
+  lengths = np.array([len(s) for s in strings],dtype=np.int64)
+  active = np.arange(width)[None,:] < lengths[:,None]
+  return (chars,active)
+
+def broadcast_lanes(values,count):
+  if isinstance(values,str):
+    return [values] * count
+  return list(values)
+
+def numbers_to_lanes(numbers,count):
+  # copy counts wrap to 32 bits like aswreg_v2int (2's comp for negatives)
+  numbers = np.asarray(numbers,dtype=np.int64).astype(np.uint64)
+  return np.broadcast_to(numbers,(count,))
+
+def name_lanes(names):
+  names = [name.upper().replace(' ','') for name in names]
+  if not all(names):
+    raise ValueError('empty name')
+  (chars,active) = strings_to_lanes(names)
+  return (chars,np.array([len(name) for name in names],dtype=np.int64))
+
+def name_at(chars,lengths,k): # name[k%ln] for every lane
+  return chars[np.arange(len(lengths)),k % lengths]
+
+def game_lanes(games,count):
+  (chars,active) = strings_to_lanes(broadcast_lanes(games,count))
+  if chars.shape[1] < 7 or not active[:,6].all():
+    raise ValueError('game names need at least 7 characters')
+  return chars
+
+
+### HASH1
+def get_hash1_many(names,numbers,games):
+  names = [name.upper().replace(' ','') for name in names]
+  count = len(names)
+  games = broadcast_lanes(games,count)
+  numbers = numbers_to_lanes(numbers,count)
+
+  (key_lower,key_upper) = get_hash1_game_states(games,numbers)
+  (key_lower,key_upper) = get_hash1_name_many(names,numbers,key_lower,key_upper)
+
+  key_upper &= np.uint32(0x0FFFFFFF) # zero out top nibble
+
+  return (key_upper.astype(np.uint64) << np.uint64(32)) | key_lower.astype(np.uint64)
+
+# one step of either pass for every lane at character position i, see
+# aswreg_v2int.get_hash1_game / get_hash1_name for the scalar version
+def hash1_step(chars,active,term,code,overflow,shift):
+  r10 = (code << np.uint32(shift)) ^ (overflow >> np.uint32(32 - shift)) ^ chars
+  r9 = (overflow << np.uint32(shift)) ^ (code >> np.uint32(32 - shift))
+  r0 = (r10 << np.uint32(1)) ^ (r9 >> np.uint32(31)) ^ term
+  r9 = (r9 << np.uint32(1)) ^ (r10 >> np.uint32(31))
+  return (np.where(active,r0,code),np.where(active,r9,overflow))
+
+# game pass results from the shared aswreg_v2int table, batches usually repeat
+# a few (game, number) pairs, past this many a vectorized game pass is cheaper
+GAME_STATE_PAIRS = 256
+
+def get_hash1_game_states(games,numbers):
+  pairs = list(zip(games,numbers.astype(np.int64).tolist()))
+  states = dict.fromkeys(pairs)
+  if len(states) > GAME_STATE_PAIRS:
+    zeros = np.zeros(len(pairs),dtype=np.uint32)
+    return get_hash1_game_many(games,numbers,zeros,zeros.copy())
+
+  for pair in states:
+    states[pair] = aswreg_v2int.get_hash1_game_state(*pair)
+  lanes = np.array([states[pair] for pair in pairs],dtype=np.uint32).reshape(len(pairs),2)
+  return (lanes[:,0].copy(),lanes[:,1].copy())
+
+def get_hash1_game_many(strings,numbers,code,overflow):
+  (chars,active) = strings_to_lanes(strings)
+  for i in range(0,chars.shape[1]):
+    term = (numbers * np.uint64(i + 7)).astype(np.uint32)
+    (code,overflow) = hash1_step(chars[:,i],active[:,i],term,code,overflow,4)
+  return (code,overflow)
+
+def get_hash1_name_many(strings,numbers,code,overflow):
+  (chars,active) = strings_to_lanes(strings)
+  for i in range(0,chars.shape[1]):
+    term = (numbers * np.uint64((i + 13) * 3)).astype(np.uint32)
+    (code,overflow) = hash1_step(chars[:,i],active[:,i],term,code,overflow,3)
+  return (code,overflow)
+
+
+
+### HASH2
+# f1s/f2s from make_hash2_f1_many/make_hash2_f2_many, timestamp is a single
+# fortnight stamp or an array of them (current time by default)
+def get_hash2_many(f1s,f2s,timestamp=None):
+  if timestamp is None:
+    timestamp = aswreg_v2int.get_current_timestamp()
+  f1s = np.asarray(f1s,dtype=np.uint64)
+  f2s = np.asarray(f2s,dtype=np.uint64)
+  hash2 = np.zeros(np.broadcast(f1s,f2s).shape,dtype=np.uint64) # unused fields stay 0
+
+  hash2 = set_hash2_f1_many(hash2,f1s)
+  hash2 = set_hash2_f2_many(hash2,f2s)
+  hash2 = set_hash2_time_many(hash2,timestamp)
+  hash2 = make_hash2_valid_many(hash2)
+
+  return hash2
+
+def generate_bincodes_many(names,numbers,games,timestamp=None):
+  f1s = make_hash2_f1_many(names,numbers,games)
+  f2s = make_hash2_f2_many(names,numbers,games)
+  return get_hash1_many(names,numbers,games) ^ get_hash2_many(f1s,f2s,timestamp)
+
+def make_hash2_valid_many(hash2):
+  return (hash2 & ~np.uint64(7)) | hash2_checksum_many(hash2)
+
+# field accessors compiled from aswreg_layout, for extracting fields from
+# many codes at once or packing them
+layout = aswreg_layout.compile_fields('numpy')
+set_hash2_time_many = layout['set_hash2_time_many']
+get_hash2_time_many = layout['get_hash2_time_many']
+clear_hash2_unused_many = layout['clear_hash2_unused_many']
+set_hash2_f1_many = layout['set_hash2_f1_many']
+set_hash2_f2_many = layout['set_hash2_f2_many']
+get_hash2_f1_many = layout['get_hash2_f1_many']
+get_hash2_f2_many = layout['get_hash2_f2_many']
+get_hash2_f3_many = layout['get_hash2_f3_many']
+get_hash2_topbit_many = layout['get_hash2_topbit_many']
+get_hash2_checksum_many = layout['get_hash2_checksum_many']
+set_hash2_checksum_many = layout['set_hash2_checksum_many']
+hash2_checksum_many = layout['hash2_checksum_many'] # per-byte partial sums
+set_hash2_time_valid_many = layout['set_hash2_time_valid_many']
+set_hash2_f1_valid_many = layout['set_hash2_f1_valid_many']
+set_hash2_f2_valid_many = layout['set_hash2_f2_valid_many']
+
+
+### TEXT CODES
+# bulk aswreg_v2int.textcode_to_int / int_to_textcode, codes go through a
+# fixed-width byte matrix so a whole array is converted in one pass
+DECODE_VALUES = np.full(256,-1,dtype=np.int16) # byte -> 5-bit value, -1 if not a code character
+for (value,c) in enumerate(aswreg_v2int.CODE_ALPHABET):
+  DECODE_VALUES[ord(c)] = DECODE_VALUES[ord(c.lower())] = value
+ENCODE_BYTES = np.frombuffer(aswreg_v2int.CODE_ALPHABET.encode('ascii'),dtype=np.uint8)
+CODE_SHIFTS = np.arange(55,-1,-5,dtype=np.uint64) # character k holds bits 4+5k .. 8+5k
+HYPHENATED = np.array([0,1,2,3,5,6,7,8,10,11,12,13]) # character columns of XXXX-XXXX-XXXX
+
+# same strict layout as textcode_to_int: with invalid=None the first bad code
+# raises ValueError, otherwise bad codes decode to invalid (codes only use 60
+# bits, so something like 2**64-1 can't be mistaken for one)
+def textcodes_to_ints(codes,invalid=None):
+  codes = list(codes)
+  try:
+    raw = np.array(codes,dtype='S15') # longer than 14 is invalid anyway
+  except UnicodeEncodeError:
+    raw = np.array([code.encode('ascii','replace') for code in codes],dtype='S15')
+  chars = raw.view(np.uint8).reshape(len(codes),15)
+  lengths = (chars != 0).sum(axis=1)
+
+  hyphenated = (lengths == 14) & (chars[:,4] == ord('-')) & (chars[:,9] == ord('-'))
+  digits = DECODE_VALUES[np.where(hyphenated[:,None],chars[:,HYPHENATED],chars[:,0:12])]
+  valid = (hyphenated | (lengths == 12)) & (digits >= 0).all(axis=1)
+  values = (digits.astype(np.uint64) << CODE_SHIFTS).sum(axis=1,dtype=np.uint64)
+
+  if not valid.all():
+    if invalid is None:
+      i = int(np.argmin(valid))
+      try:
+        aswreg_v2int.textcode_to_int(codes[i])
+      except ValueError as e:
+        raise ValueError('code %d: %s' % (i,e)) from None
+      raise ValueError('code %d: bad code %r' % (i,codes[i]))
+    values[~valid] = np.uint64(invalid)
+  return values
+
+def ints_to_textcodes(values):
+  values = np.asarray(values,dtype=np.uint64)
+  chars = np.full((len(values),14),ord('-'),dtype=np.uint8)
+  chars[:,HYPHENATED] = ENCODE_BYTES[(values[:,None] >> CODE_SHIFTS) & np.uint64(31)]
+  return chars.view('S14').ravel().astype('U14')
+
+# the basekey factor programs with one lane per license, compiled from
+# aswreg_ir, data-dependent branches become masked selects (np.where) so
+# every lane runs the same code
+# these functions for EV Nova only
+make_hash2_f1_many = aswreg_ir.load('f1','numpy',globals())
+make_hash2_f2_many = aswreg_ir.load('f2','numpy',globals())
+
+
+
+# stage timing for aswreg_profile, wraps these while profiling is on
+aswreg_profile.register(globals(),aswreg_profile.STAGES)
@@ -0,0 +1,14 @@
+import os
+import sys
+
+# the modules are flat scripts in the repository root
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+# numpy paths fall back to plain ints when numpy can't be imported
+@pytest.fixture
+def no_numpy(monkeypatch):
+	monkeypatch.setitem(sys.modules,'numpy',None)
+	monkeypatch.setitem(sys.modules,'aswreg_v2np',None)
@@ -0,0 +1,69 @@
+import pytest
+
+import aswreg_backend
+import aswreg_v1
+import aswreg_v2
+import aswreg_v2core as core
+import aswreg_v2int as fast
+
+CASES = [('Special [K]',200,'EV Nova'),('a',1,'EV Nova'),('Some One',65535,'Garendall'),('',0,'EV Nova')]
+CODE = '6RHH-PTHR-M443' # the README's renewed code for CASES[0]
+
+
+def test_one_default_everywhere():
+	assert aswreg_backend.BACKEND in aswreg_backend.BACKENDS
+	assert not hasattr(aswreg_v2,'BACKEND') # read from aswreg_backend at call time
+	assert core.use_int_backend() == (aswreg_backend.BACKEND == 'int')
+
+def test_unknown_backend():
+	with pytest.raises(ValueError):
+		aswreg_backend.check_backend('numpy')
+	with pytest.raises(ValueError):
+		core.get_hash1('a',1,'EV Nova',backend='numpy')
+	with pytest.raises(ValueError):
+		aswreg_v1.generate_code('a',1,'Ares',backend='numpy')
+	with pytest.raises(ValueError):
+		aswreg_v2.generate_code('a',1,'EV Nova',backend='numpy')
+
+def test_default_read_at_call_time(monkeypatch):
+	monkeypatch.setattr(aswreg_backend,'BACKEND','numpy')
+	for call in (lambda: aswreg_v2.generate_code('a',1,'EV Nova'),lambda: aswreg_v2.renew_code(CODE,*CASES[0]),
+			lambda: aswreg_v2.date_code(CODE,*CASES[0]),lambda: core.get_hash1('a',1,'EV Nova')):
+		with pytest.raises(ValueError,match='unknown backend'):
+			call()
+
+def test_v2_backends_agree(monkeypatch):
+	calls = []
+	monkeypatch.setattr(core,'make_hash1',lambda *args,original=core.make_hash1: calls.append(args) or original(*args))
+	for backend in ('int','bitarray'):
+		monkeypatch.setattr(aswreg_backend,'BACKEND',backend)
+		results = (aswreg_v2.generate_code(*CASES[0]),aswreg_v2.date_code(CODE,*CASES[0]),aswreg_v2.renew_code(CODE,*CASES[0]))
+		if backend == 'int':
+			expected = results
+		assert results == expected
+	assert calls # the bitarray pass really ran the BitArray engine
+
+@pytest.mark.parametrize('name,number,game',CASES)
+def test_hash1_backends_agree(name,number,game):
+	assert core.get_hash1(name,number,game,backend='int') == core.get_hash1(name,number,game,backend='bitarray')
+
+@pytest.mark.parametrize('name,number,game',CASES[:-1])
+def test_factors_backends_agree(name,number,game):
+	assert fast.make_hash2_f1(name,number,game) == core.make_hash2_f1(name,number,game).uint
+	assert fast.make_hash2_f2(name,number,game) == core.make_hash2_f2(name,number,game).uint
+
+def test_factors_raise_alike():
+	# no name and no copies divides by zero in both engines
+	for make in (fast.make_hash2_f1,fast.make_hash2_f2,core.make_hash2_f1,core.make_hash2_f2):
+		with pytest.raises(ZeroDivisionError):
+			make('',0,'EV Nova')
+
+def test_make_hash2_valid_backends_agree():
+	from bitstring import BitArray
+	for value in (0,1,0x0123456789abcdef,0xffffffffffffffff):
+		assert core.make_hash2_valid(BitArray(uint=value,length=64),backend='int') == core.make_hash2_valid(BitArray(uint=value,length=64),backend='bitarray')
+
+@pytest.mark.parametrize('game',aswreg_v1.earlier_games[:3] + aswreg_v1.later_games[:3])
+def test_v1_backends_agree(game):
+	for (name,number) in (('Special [K]',200),('a',1)):
+		assert aswreg_v1.generate_code(name,number,game,backend='int') == aswreg_v1.generate_code(name,number,game,backend='bitarray')
@@ -0,0 +1,70 @@
+import io
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import aswreg_v2
+
+CODE = aswreg_v2.generate_code('Special [K]',200,'EV Nova')
+
+
+def make_records(count):
+	lines = []
+	for i in range(count):
+		op = ('renew','date','generate','verify')[i % 4]
+		lines.append('%s,Name %d,%d,EV Nova,%s' % (CODE,i,i + 1,op))
+	lines.append('{"code": "%s", "name": "Special [K]", "number": 200, "game": "EV Nova", "op": "verify"}' % CODE)
+	lines.append('{"broken json')
+	lines.append('%s,Special [K],200,EV Nova,fly' % CODE)
+	return list(aswreg_v2.read_batch(lines))
+
+def without_times(results):
+	# renewed and generated codes carry the current fortnight
+	return [(line_no,error) if result is None or len(result) != 14 else (line_no,error,len(result)) for (line_no,fmt,record,result,error) in results]
+
+
+def test_read_batch_formats():
+	records = list(aswreg_v2.read_batch(['code,name,number,game,op','','a,b,1,EV Nova,renew','{"op": "date"}']))
+	assert records == [(3,'csv',{'code': 'a','name': 'b','number': '1','game': 'EV Nova','op': 'renew'}),(4,'jsonl',{'op': 'date'})]
+
+def test_serial_results():
+	results = list(aswreg_v2.process_batch(make_records(8)))
+	assert [r[0] for r in results] == list(range(1,12))
+	assert results[8][3] == 'valid'
+	assert results[9][4].startswith('ValueError: bad record')
+	assert results[10][4] == 'ValueError: unknown op: fly'
+	assert all(r[4] is None for r in results[:9])
+
+def test_write_batch():
+	out = io.StringIO()
+	aswreg_v2.write_batch(aswreg_v2.process_batch(make_records(1)[-3:]),out)
+	lines = out.getvalue().splitlines()
+	assert '"result": "valid"' in lines[0]
+	assert lines[2].endswith(',,ValueError: unknown op: fly')
+
+def test_parallel_matches_serial():
+	records = make_records(40)
+	serial = without_times(aswreg_v2.process_batch(records))
+	assert without_times(aswreg_v2.process_batch_parallel(iter(records),2,chunk_size=3)) == serial
+
+
+def run_or_die(record):
+	if record['name'] == 'poison':
+		os._exit(1)
+	if record['name'] == 'slow': # keeps the head chunk in flight while the pool breaks
+		time.sleep(0.3)
+	return 'ok'
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',reason='workers must inherit the patched record handler')
+def test_worker_death_is_charged_to_its_chunk(monkeypatch):
+	monkeypatch.setattr(aswreg_v2,'run_batch_record',run_or_die)
+	names = dict([(1,'slow'),(3,'poison')])
+	records = [(i,'csv',{'name': names.get(i,'fine')}) for i in range(1,21)]
+	results = list(aswreg_v2.process_batch_parallel(iter(records),2,chunk_size=2))
+	assert [r[0] for r in results] == list(range(1,21))
+	failed = [r[0] for r in results if r[4] is not None]
+	assert failed == [3,4] # the poison record's chunk, not the head chunk
+	assert all(r[4].startswith('WorkerError') for r in results if r[4] is not None)
+	assert all(r[3] == 'ok' for r in results if r[4] is None)
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+import aswreg_backend
+import aswreg_bench
+import aswreg_v2core as core
+import aswreg_v2int as fast
+
+
+def test_history_goes_to_the_output_dir(tmp_path,monkeypatch,capsys):
+	monkeypatch.chdir(tmp_path)
+	output_dir = str(tmp_path / 'results')
+	aswreg_bench.run(output_dir,label='base',filter='get_hash1[int]',quick=True)
+	aswreg_bench.run(output_dir,label='head',filter='get_hash1[int]',quick=True)
+	assert os.listdir(output_dir) == ['bench_history.jsonl']
+	assert os.listdir(str(tmp_path)) == ['results'] # nothing left in the working directory
+	runs = aswreg_bench.load_history(aswreg_bench.history_path(output_dir))
+	assert [run['label'] for run in runs] == ['base','head']
+	assert list(runs[0]['results']) == ['get_hash1[int]']
+	assert aswreg_bench.compare(output_dir,'base','head',threshold=1e9)
+	assert 'get_hash1[int]' in capsys.readouterr().out
+
+def test_default_output_dir(monkeypatch):
+	monkeypatch.setattr(aswreg_bench,'OUTPUT_DIR','/some/dir')
+	assert aswreg_bench.history_path() == os.path.join('/some/dir','bench_history.jsonl')
+
+def test_find_run():
+	runs = [{'label': 'a','commit': 'c1'},{'label': 'b','commit': 'c2'}]
+	assert aswreg_bench.find_run(runs,'-1') is runs[1]
+	assert aswreg_bench.find_run(runs,'c1') is runs[0]
+	with pytest.raises(ValueError):
+		aswreg_bench.find_run(runs,'nope')
+
+def test_inputs_are_deterministic(monkeypatch):
+	first = aswreg_bench.make_inputs()
+	monkeypatch.setattr(fast,'get_current_timestamp',lambda: 3) # another fortnight
+	assert aswreg_bench.make_inputs() == first
+
+def test_bitarray_rows_run_the_bitarray_engine(tmp_path,monkeypatch):
+	backend = aswreg_backend.BACKEND
+	calls = []
+	monkeypatch.setattr(core,'make_hash1',lambda *args,original=core.make_hash1: calls.append(args) or original(*args))
+	for op in ('renew','generate'):
+		del calls[:]
+		aswreg_bench.run(str(tmp_path),filter='%s[bitarray] batch=1' % op,quick=True)
+		assert calls,op
+	calls.clear()
+	aswreg_bench.run(str(tmp_path),filter='renew[int] batch=1',quick=True)
+	assert not calls
+	assert aswreg_backend.BACKEND == backend # put back afterwards
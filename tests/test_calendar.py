@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+import aswreg_v2
+import aswreg_v2int as fast
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LICENSE = ('Special [K]',200,'EV Nova')
+CODE = aswreg_v2.generate_code(*LICENSE)
+
+
+def test_decade():
+	rows = aswreg_v2.renew_calendar(CODE,*LICENSE,decade=1)
+	assert [row[0] for row in rows] == list(range(0,256))
+	for (timestamp,date,code) in rows[::37]:
+		assert aswreg_v2.verify_code(code,*LICENSE)[0]
+		hash2 = fast.textcode_to_int(code) ^ fast.get_hash1(*LICENSE)
+		assert fast.get_hash2_time(hash2) == timestamp
+		assert date == fast.timestamp_to_datetime(timestamp,1)
+	assert rows[0][1] == fast.timestamp_to_datetime(0,1)
+
+def test_date_range():
+	rows = aswreg_v2.renew_calendar(CODE,*LICENSE,start=datetime(2009,12,1),end=datetime(2010,3,1))
+	assert len(rows) == 7
+	assert [row[0] for row in rows] == [(rows[0][0] + k) % 256 for k in range(0,7)] # wraps past 255
+	assert len(aswreg_v2.renew_calendar(CODE,*LICENSE,start=datetime(2009,12,1))) == 256
+
+def test_bad_ranges():
+	with pytest.raises(ValueError,match='needs a start'):
+		aswreg_v2.renew_calendar(CODE,*LICENSE,end=datetime(2010,1,1))
+	with pytest.raises(ValueError,match='before start'):
+		aswreg_v2.renew_calendar(CODE,*LICENSE,start=datetime(2010,1,1),end=datetime(2009,1,1))
+	with pytest.raises(ValueError,match='Garendall'):
+		aswreg_v2.renew_calendar(CODE,'Special [K]',200,'Garendall')
+
+def test_command():
+	args = [sys.executable,os.path.join(ROOT,'aswreg_v2.py'),'renew-calendar',CODE] + [str(field) for field in LICENSE]
+	proc = subprocess.run(args + ['--start','2009-12-01','--end','2010-03-01'],capture_output=True,text=True)
+	assert proc.returncode == 0 and len(proc.stdout.splitlines()) == 7
+	proc = subprocess.run(args + ['--end','2010-03-01'],capture_output=True,text=True)
+	assert proc.returncode == 1 and proc.stderr.startswith('error: an end date needs a start date')
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(*args,stdin=''):
+	return subprocess.run([sys.executable,os.path.join(ROOT,'aswreg_v2.py')] + list(args),
+		input=stdin,capture_output=True,text=True,cwd=ROOT)
+
+
+def test_renew():
+	proc = run('renew','6RHG-NTFP-M889','Special [K]','200','EV Nova')
+	assert proc.returncode == 0
+	assert len(proc.stdout.strip()) == 14
+
+def test_no_arguments_prints_usage():
+	proc = run()
+	assert proc.returncode == 0
+	assert proc.stdout.startswith('Usage')
+
+def test_bad_arguments_print_usage():
+	for args in (['renew','6RHG-NTFP-M889','Special [K]','many','EV Nova'],['nope'],['batch','--workers']):
+		proc = run(*args)
+		assert proc.returncode == 2
+		assert 'Usage' in proc.stderr
+
+def test_bad_input_is_an_error():
+	proc = run('renew','XXXX','Special [K]','200','EV Nova')
+	assert proc.returncode == 1
+	assert proc.stderr.startswith('error: ')
+	assert 'Usage' not in proc.stderr
+
+def test_runtime_errors_are_not_usage():
+	proc = run('batch',os.path.join(ROOT,'no such file'))
+	assert proc.returncode == 1
+	assert 'FileNotFoundError' in proc.stderr
+	assert 'Usage' not in proc.stdout + proc.stderr
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+import aswreg_v2
+import aswreg_v2int as fast
+
+VALUES = [0,1,(1 << 60) - 1,0x0123456789abcde] + [random.Random(5).getrandbits(60) for i in range(200)]
+
+
+def test_round_trip():
+	for value in VALUES:
+		code = fast.int_to_textcode(value)
+		assert len(code) == 14 and code[4] == code[9] == '-'
+		assert fast.textcode_to_int(code) == value
+		assert fast.textcode_to_int(code.replace('-','')) == value
+		assert fast.textcode_to_int(code.lower()) == value
+
+def test_alphabet():
+	assert fast.int_to_textcode(0) == '2222-2222-2222'
+	assert fast.int_to_textcode((1 << 60) - 1) == 'ZZZZ-ZZZZ-ZZZZ'
+	assert fast.textcode_to_int('2222-2222-2223') == 1
+
+def test_bad_codes():
+	for code in ('','XXXX','2222-2222-222','2222_2222_2222','2222-2222-2220','2222-2222-222O','+222-2222-2222','22 2-2222-2222','2222-2222-222é'):
+		with pytest.raises(ValueError):
+			fast.textcode_to_int(code)
+	with pytest.raises(ValueError,match='no 0, 1, I or O'):
+		fast.textcode_to_int('2222-2222-2221')
+
+def test_bitarray_codec():
+	for value in VALUES[:20]:
+		code = fast.int_to_textcode(value)
+		assert aswreg_v2.textcode_to_bincode(code).uint == value
+		assert aswreg_v2.bincode_to_textcode(aswreg_v2.textcode_to_bincode(code)) == code
+
+def test_bulk_codec():
+	np = pytest.importorskip('numpy')
+	import aswreg_v2np as vec
+	codes = [fast.int_to_textcode(value) for value in VALUES]
+	assert vec.ints_to_textcodes(VALUES).tolist() == codes
+	mixed = [code if i % 2 else code.replace('-','').lower() for (i,code) in enumerate(codes)]
+	assert vec.textcodes_to_ints(mixed).tolist() == VALUES
+	assert vec.textcodes_to_ints(codes[:2] + ['bad','2222-2222-222é'],invalid=2 ** 64 - 1).tolist() == VALUES[:2] + [2 ** 64 - 1] * 2
+	with pytest.raises(ValueError,match='code 2'):
+		vec.textcodes_to_ints(codes[:2] + ['XXXX'])
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+import aswreg_v2
+import aswreg_v2int as fast
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LICENSE = ('Special [K]',200,'EV Nova')
+CODE = aswreg_v2.renew_calendar(aswreg_v2.generate_code(*LICENSE),*LICENSE)[100][2] # stamp 100
+NOW = datetime(2026,10,18)
+
+
+def record(**fields):
+	return dict(zip(('code','name','number','game'),(CODE,) + LICENSE),**fields)
+
+def dated(*records,now=NOW):
+	return list(aswreg_v2.date_records([(line_no,'jsonl',r) for (line_no,r) in enumerate(records,1)],now))
+
+
+def test_explicit_decade():
+	for decade in (0,1,'0','2'):
+		[(line_no,game,stamp,found,date,error)] = dated(record(decade=decade))
+		assert (stamp,found,error) == (100,int(decade),None)
+		assert date == fast.fortnight_to_datetime(100 + 256 * int(decade))
+
+def test_decade_from_issue_date():
+	issued = fast.fortnight_to_datetime(100 + 256 + 3).date().isoformat()
+	assert dated(record(issued=issued))[0][3] == 1
+	assert dated(record(issued='2002-01-01'))[0][3] == 0
+
+def test_decade_not_in_future():
+	# the last decade whose fortnight 100 isn't past now
+	[(line_no,game,stamp,decade,date,error)] = dated(record())
+	assert date <= NOW < fast.fortnight_to_datetime(100 + 256 * (decade + 1))
+
+def test_garendall_and_errors():
+	garendall = ('Other Name',5,'Garendall')
+	renewed = aswreg_v2.renew_code(aswreg_v2.generate_code(*garendall),*garendall)
+	results = dated(dict(zip(('code','name','number','game'),(renewed,) + garendall)),
+		record(code='not a code'),record(issued='someday'),'broken')
+	assert results[0][1:] == ('Garendall',0xff,None,None,None)
+	assert [line_no for (line_no,game,stamp,decade,date,error) in results if error] == [2,3,4]
+
+@pytest.mark.parametrize('numpy',[True,False])
+def test_timestamps(request,numpy):
+	if numpy:
+		pytest.importorskip('numpy')
+	else:
+		request.getfixturevalue('no_numpy')
+	codes = aswreg_v2.renew_calendar(aswreg_v2.generate_code(*LICENSE),*LICENSE)[::51]
+	chunk = [(i,'csv',record(code=code)) for (i,(stamp,date,code)) in enumerate(codes)]
+	chunk.append((len(chunk),'csv',record(code='bad')))
+	results = aswreg_v2.record_timestamps(chunk)
+	assert [stamp for (line_no,r,stamp,error) in results] == [stamp for (stamp,date,code) in codes] + [None]
+	assert results[-1][3].startswith('ValueError')
+
+def test_cli(tmp_path):
+	path = tmp_path / 'codes.jsonl'
+	path.write_text('\n'.join(json.dumps(record(decade=decade)) for decade in (0,0,1)) + '\n{"broken\n')
+	run = lambda *args: subprocess.run([sys.executable,os.path.join(ROOT,'aswreg_v2.py'),'date'] + list(args),capture_output=True,text=True)
+	result = run(str(path),'--bucket','year')
+	assert result.returncode == 1 # the broken line
+	assert result.stdout.splitlines()[:3] == ['EV Nova (3 codes)','  2004            2  ' + '#' * 40,'  2014            1  ' + '#' * 20]
+	assert result.stderr.startswith('line 4: ')
+	result = run(str(path),'--records')
+	assert '1\tEV Nova\t100\t0\t%s' % fast.fortnight_to_datetime(100).strftime('%Y-%m-%d') in result.stdout.splitlines()
+	# the single code form is unchanged
+	result = run(CODE,*[str(field) for field in LICENSE])
+	assert (result.returncode,result.stdout) == (0,'%s\n' % fast.timestamp_to_datetime(100))
+	assert run(str(path),'--bucket','week').returncode == 2
+
+def test_cli_stdin(tmp_path):
+	script = os.path.join(ROOT,'aswreg_v2.py')
+	result = subprocess.run([sys.executable,script,'date','-'],input=json.dumps(record(decade=1)) + '\n',capture_output=True,text=True,timeout=30)
+	assert (result.returncode,result.stdout.splitlines()[0]) == (0,'EV Nova (1 codes)')
+	# no file: the usage, not a wait for stdin
+	for args in ([],['--records']):
+		result = subprocess.run([sys.executable,script,'date'] + args,stdin=subprocess.PIPE,capture_output=True,text=True,timeout=30)
+		assert (result.returncode,result.stdout) == (2,'')
+		assert result.stderr.startswith('Usage')
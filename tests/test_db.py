@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import aswreg_db
+import aswreg_v2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LICENSES = [('Special [K]',200,'EV Nova'),('Special [K]',201,'EV Nova'),('Other Name',5,'EV Nova'),('Other Name',5,'Garendall')]
+
+
+def make_db(tmp_path,licenses=LICENSES):
+	path = str(tmp_path / 'licenses.db')
+	lines = ['%s,%s,%d,%s' % (aswreg_v2.generate_code(*license),*license) for license in licenses]
+	(count,errors) = aswreg_db.import_records(path,lines,chunk_size=2) # several runs
+	assert (count,errors) == (len(licenses),[])
+	return path
+
+def lookup(path,*key):
+	with aswreg_db.LicenseDB(path) as db:
+		return db.lookup(*key)
+
+
+def test_import_and_lookup(tmp_path):
+	path = make_db(tmp_path)
+	results = lookup(path,'SPECIAL[K]') # normalized like hash1
+	assert [(number,game) for (number,game,timestamp,code) in results] == [(200,'EV Nova'),(201,'EV Nova')]
+	for (number,game,timestamp,code) in results:
+		assert aswreg_v2.verify_code(code,'Special [K]',number,game)[0]
+	assert len(lookup(path,'Other Name',5)) == 2
+	assert [r[1] for r in lookup(path,'Other Name',5,'Garendall')] == ['Garendall']
+	assert lookup(path,'Nobody') == []
+
+def test_import_replaces(tmp_path):
+	path = make_db(tmp_path)
+	renewed = aswreg_v2.renew_calendar(aswreg_v2.generate_code(*LICENSES[0]),*LICENSES[0])[7][2]
+	(count,errors) = aswreg_db.import_records(path,['%s,%s,%d,%s' % ((renewed,) + LICENSES[0])])
+	assert (count,errors) == (len(LICENSES),[])
+	assert lookup(path,*LICENSES[0]) == [(200,'EV Nova',7,renewed)]
+
+def test_import_bad_rows(tmp_path):
+	path = str(tmp_path / 'licenses.db')
+	code = aswreg_v2.generate_code(*LICENSES[0])
+	lines = ['%s,Special [K],200,EV Nova' % code,
+		'%s,Special [K],200,Nowhere' % code,
+		'%s,Special [K],%d,EV Nova' % (code,1 << 32),
+		'%s,Special [K],-1,EV Nova' % code,
+		'%s,Special [K],many,EV Nova' % code,
+		'not a code,Special [K],200,EV Nova',
+		'{"broken json']
+	(count,errors) = aswreg_db.import_records(path,lines)
+	assert count == 1
+	assert [line_no for (line_no,error) in errors] == [2,3,4,5,6,7]
+	assert 'number out of range' in errors[1][1]
+
+@pytest.mark.parametrize('numpy',[True,False])
+def test_renew(tmp_path,request,numpy):
+	if numpy:
+		pytest.importorskip('numpy')
+	else:
+		request.getfixturevalue('no_numpy')
+	path = make_db(tmp_path)
+	with aswreg_db.LicenseDB(path,writable=True) as db:
+		assert db.renew(42) == len(LICENSES)
+		db.flush()
+	for license in LICENSES:
+		[(number,game,timestamp,code)] = lookup(path,*license)
+		assert aswreg_v2.verify_code(code,*license)[0]
+		if game == 'Garendall':
+			assert timestamp == 0xff
+		else:
+			assert (timestamp,code) == (42,aswreg_v2.renew_calendar(aswreg_v2.generate_code(*license),*license)[42][2])
+
+def test_renew_one_game(tmp_path):
+	path = make_db(tmp_path)
+	before = lookup(path,'Special [K]')
+	with aswreg_db.LicenseDB(path,writable=True) as db:
+		assert db.renew(42,game='Garendall') == 1
+	assert lookup(path,'Special [K]') == before
+
+def test_bad_arguments(tmp_path):
+	path = make_db(tmp_path)
+	with aswreg_db.LicenseDB(path,writable=True) as db:
+		for timestamp in (-1,256):
+			with pytest.raises(ValueError):
+				db.renew(timestamp)
+		with pytest.raises(ValueError):
+			db.renew(1,game='Nowhere')
+		with pytest.raises(ValueError,match='unknown game'):
+			db.lookup('Special [K]',200,'Nowhere')
+		with pytest.raises(ValueError,match='out of range'):
+			db.lookup('Special [K]',1 << 32)
+
+def test_cli(tmp_path):
+	path = make_db(tmp_path)
+	run = lambda *args: subprocess.run([sys.executable,os.path.join(ROOT,'aswreg_db.py')] + [str(arg) for arg in args],capture_output=True,text=True)
+	result = run('lookup',path,'Special [K]',200)
+	assert result.returncode == 0 and result.stdout.startswith('200\tEV Nova\t')
+	assert run('lookup',path,'Nobody').returncode == 1
+	result = run('lookup',path,'Special [K]',200,'Nowhere')
+	assert (result.returncode,result.stderr) == (2,'error: unknown game: Nowhere\n')
+	result = run('renew',path,'--timestamp',300)
+	assert result.returncode == 2 and 'out of range' in result.stderr
+	assert run('renew',path,'--timestamp',3).stdout == 'renewed %d licenses\n' % len(LICENSES)
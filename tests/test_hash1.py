@@ -0,0 +1,24 @@
+import aswreg_v2core as core
+import aswreg_v2int as fast
+
+
+# hash1 without the cached game pass: both passes from a zero state
+def uncached_hash1(name,number,game):
+	(key_lower,key_upper) = fast.get_hash1_game(game,number,0,0)
+	(key_lower,key_upper) = fast.get_hash1_name(name.upper().replace(' ',''),number,key_lower,key_upper)
+	return ((key_upper & 0x0FFFFFFF) << 32) | key_lower
+
+def test_cached_game_pass():
+	fast.get_hash1_game_state.cache_clear()
+	for number in (1,2,200,65535):
+		for name in ('Special [K]','a b c','Another Name'):
+			assert fast.get_hash1(name,number,'EV Nova') == uncached_hash1(name,number,'EV Nova')
+	info = fast.get_hash1_game_state.cache_info()
+	assert (info.misses,info.hits) == (4,8)
+
+def test_prewarm():
+	fast.get_hash1_game_state.cache_clear()
+	core.prewarm_hash1_games(['EV Nova','Garendall'],range(1,11),backend='int')
+	assert fast.get_hash1_game_state.cache_info().currsize == 20
+	assert fast.get_hash1('Special [K]',5,'Garendall') == uncached_hash1('Special [K]',5,'Garendall')
+	assert core.get_hash1('Special [K]',5,'Garendall',backend='bitarray').uint == uncached_hash1('Special [K]',5,'Garendall')
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import aswreg_v2
+import aswreg_v2int as fast
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code):
+	env = dict(os.environ,ASWREG_BACKEND='int')
+	return subprocess.run([sys.executable,'-c',code],capture_output=True,text=True,cwd=ROOT,env=env)
+
+def test_single_shot_commands_skip_slow_imports():
+	proc = run_python('import sys, aswreg_v2\n'
+		'aswreg_v2.renew_code("6RHG-NTFP-M889","Special [K]",200,"EV Nova")\n'
+		'aswreg_v2.date_code("6RHG-NTFP-M889","Special [K]",200,"EV Nova")\n'
+		'aswreg_v2.generate_code("Special [K]",200,"EV Nova")\n'
+		'print(" ".join(m for m in aswreg_v2.SLOW_IMPORTS if m in sys.modules))')
+	assert proc.returncode == 0,proc.stderr
+	assert proc.stdout.strip() == ''
+
+def test_importtime_reports_without_budget():
+	proc = subprocess.run([sys.executable,os.path.join(ROOT,'aswreg_v2.py'),'importtime','renew','6RHG-NTFP-M889','Special [K]','200','EV Nova'],
+		capture_output=True,text=True,cwd=ROOT)
+	assert proc.returncode == 0
+	assert 'renew: imports' in proc.stdout and 'budget none' in proc.stdout
+
+def test_importtime_budget(capsys):
+	assert not aswreg_v2.import_report([],budget=0.001)
+	assert 'budget 0.001 ms' in capsys.readouterr().out
+
+def test_lazy_kernel_compiles_once(monkeypatch):
+	loads = []
+	def load_kernel(program_name):
+		loads.append(program_name)
+		return lambda name,number,game: (name,number,game)
+	monkeypatch.setattr(fast,'load_kernel',load_kernel)
+	stub = fast.lazy_kernel('f1')
+	assert stub('a',1,'EV Nova') == ('a',1,'EV Nova')
+	assert stub('b',2,'EV Nova') == ('b',2,'EV Nova')
+	assert loads == ['f1']
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+import aswreg_ir
+import aswreg_v2core as core
+
+CASES = [('Special [K]',200,'EV Nova'),('a',1,'EV Nova'),('Some One',65535,'EV Nova'),('x' * 33,7,'EV Nova')]
+
+
+@pytest.mark.parametrize('program_name',sorted(aswreg_ir.PROGRAMS))
+def test_interpreter_matches_reference(program_name):
+	reference = {'f1': core.make_hash2_f1,'f2': core.make_hash2_f2}[program_name]
+	for (name,number,game) in CASES:
+		assert aswreg_ir.run(aswreg_ir.PROGRAMS[program_name],name,number,game) == reference(name,number,game).uint
+
+@pytest.mark.parametrize('program_name',sorted(aswreg_ir.PROGRAMS))
+def test_compiled_matches_interpreter(program_name,tmp_path,monkeypatch):
+	monkeypatch.setattr(aswreg_ir,'CACHE_DIR',str(tmp_path))
+	kernel = aswreg_ir.load(program_name,'int')
+	for number in range(0,400,3):
+		for name in ('Special [K]','abc','Q'):
+			assert kernel(name,number,'EV Nova') == aswreg_ir.run(aswreg_ir.PROGRAMS[program_name],name,number,'EV Nova')
+
+def test_source_cache(tmp_path,monkeypatch):
+	monkeypatch.setattr(aswreg_ir,'CACHE_DIR',str(tmp_path))
+	aswreg_ir.load('f1','int')
+	files = os.listdir(str(tmp_path))
+	assert len(files) == 1 and files[0].startswith('aswreg_ir_f1_int_')
+	with open(os.path.join(str(tmp_path),files[0])) as f:
+		assert f.read() == aswreg_ir.generate_source('f1','int')
+	aswreg_ir.load('f1','int')
+	assert os.listdir(str(tmp_path)) == files
+
+def test_byte_tables():
+	# byte-only subexpressions are folded into 256-entry tables
+	source = aswreg_ir.generate_source('f1','int')
+	assert 'T0 = (' in source
+	assert all(len(line.split(',')) == 256 for line in source.splitlines() if line.startswith('T'))
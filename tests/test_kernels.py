@@ -0,0 +1,33 @@
+import pytest
+
+import aswreg_v2int as fast
+
+np = pytest.importorskip('numpy')
+import aswreg_v2np as vec
+
+NAMES = ['Special [K]','a','Some One','x' * 40,'lower case name','Zz Top']
+
+
+def lanes(count):
+	names = [NAMES[i % len(NAMES)] for i in range(count)]
+	numbers = np.arange(1,count + 1,dtype=np.uint32) * 7
+	return (names,numbers)
+
+def test_factors_many():
+	(names,numbers) = lanes(300)
+	assert vec.make_hash2_f1_many(names,numbers,'EV Nova').tolist() == [fast.make_hash2_f1(n,int(k),'EV Nova') for (n,k) in zip(names,numbers)]
+	assert vec.make_hash2_f2_many(names,numbers,'EV Nova').tolist() == [fast.make_hash2_f2(n,int(k),'EV Nova') for (n,k) in zip(names,numbers)]
+
+def test_generate_bincodes_many():
+	(names,numbers) = lanes(50)
+	stamp = 0x5a
+	expected = []
+	for (name,number) in zip(names,numbers):
+		hash2 = fast.set_hash2_f2(fast.set_hash2_f1(0,fast.make_hash2_f1(name,int(number),'EV Nova')),fast.make_hash2_f2(name,int(number),'EV Nova'))
+		hash2 = fast.make_hash2_valid(fast.set_hash2_time(hash2,stamp))
+		expected.append(fast.get_hash1(name,int(number),'EV Nova') ^ hash2)
+	assert vec.generate_bincodes_many(names,numbers,'EV Nova',stamp).tolist() == expected
+
+def test_make_hash2_valid_many():
+	values = [0,1,7,0x0123456789abcdef,0x0fffffffffffffff,0x0800000000000000]
+	assert vec.make_hash2_valid_many(np.array(values,dtype=np.uint64)).tolist() == [fast.make_hash2_valid(v) for v in values]
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+from bitstring import BitArray
+
+import aswreg_v2core as core
+import aswreg_v2int as fast
+
+RANDOM = random.Random(16)
+VALUES = [0,(1 << 64) - 1,0x0123456789abcdef] + [RANDOM.getrandbits(64) for i in range(100)]
+
+
+def bits(value,length=64):
+	return BitArray(uint=value,length=length)
+
+def test_getters_match_reference():
+	for value in VALUES:
+		assert fast.get_hash2_f1(value) == core.get_hash2_f1(bits(value)).uint
+		assert fast.get_hash2_f2(value) == core.get_hash2_f2(bits(value)).uint
+		assert fast.get_hash2_f3(value) == core.get_hash2_f3(bits(value)).uint
+		assert fast.get_hash2_topbit(value) == int(core.get_hash2_topbit(bits(value)))
+		assert fast.get_hash2_time(value) == core.get_hash2_time(bits(value)).uint
+
+def test_setters_match_reference():
+	for value in VALUES:
+		field = value >> 48
+		assert fast.set_hash2_f1(value,field) == core.set_hash2_f1(bits(value),bits(field,16)).uint
+		assert fast.set_hash2_f2(value,field) == core.set_hash2_f2(bits(value),bits(field,16)).uint
+		assert fast.set_hash2_time(value,field & 0xff) == core.set_hash2_time(bits(value),bits(field & 0xff,8)).uint
+		assert fast.clear_hash2_unused(value) == core.clear_hash2_unused(bits(value)).uint
+
+def test_fields_round_trip():
+	for value in VALUES:
+		assert fast.set_hash2_f1(value,fast.get_hash2_f1(value)) == value
+		assert fast.set_hash2_checksum(value,fast.get_hash2_checksum(value)) == value
+		assert fast.get_hash2_f2(fast.set_hash2_f2(value,0xbeef)) == 0xbeef
+
+def test_numpy_accessors():
+	np = pytest.importorskip('numpy')
+	import aswreg_v2np as vec
+	array = np.array(VALUES,dtype=np.uint64)
+	fields = array >> np.uint64(48)
+	assert vec.get_hash2_f1_many(array).tolist() == [fast.get_hash2_f1(v) for v in VALUES]
+	assert vec.get_hash2_time_many(array).tolist() == [fast.get_hash2_time(v) for v in VALUES]
+	assert vec.set_hash2_f2_many(array,fields).tolist() == [fast.set_hash2_f2(v,v >> 48) for v in VALUES]
+	assert vec.clear_hash2_unused_many(array).tolist() == [fast.clear_hash2_unused(v) for v in VALUES]
+
+
+def reference_checksum(value):
+	return core.check_hash2_valid(bits(value))[1].uint
+
+def test_hash2_checksum():
+	for value in VALUES:
+		assert fast.hash2_checksum(value) == reference_checksum(value)
+		assert fast.check_hash2_valid(fast.make_hash2_valid(value))[0]
+		assert core.check_hash2_valid(bits(fast.make_hash2_valid(value)))[0]
+
+@pytest.mark.parametrize('field,width',[('time',8),('f1',16),('f2',16)])
+def test_valid_setters(field,width):
+	(set_valid,set_plain) = (getattr(fast,'set_hash2_%s_valid' % field),getattr(fast,'set_hash2_%s' % field))
+	for value in VALUES:
+		valid = fast.make_hash2_valid(value)
+		new = value >> (64 - width)
+		assert set_valid(valid,new) == fast.make_hash2_valid(set_plain(valid,new))
+
+def test_numpy_checksum_setters():
+	np = pytest.importorskip('numpy')
+	import aswreg_v2np as vec
+	valid = np.array([fast.make_hash2_valid(v) for v in VALUES],dtype=np.uint64)
+	stamps = np.array([v & 0xff for v in VALUES],dtype=np.uint64)
+	assert vec.hash2_checksum_many(np.array(VALUES,dtype=np.uint64)).tolist() == [reference_checksum(v) for v in VALUES]
+	assert vec.set_hash2_time_valid_many(valid,stamps).tolist() == [fast.set_hash2_time_valid(int(v),int(s)) for (v,s) in zip(valid,stamps)]
+	assert vec.set_hash2_f1_valid_many(valid,stamps).tolist() == [fast.make_hash2_valid(fast.set_hash2_f1(int(v),int(s))) for (v,s) in zip(valid,stamps)]
+	assert vec.set_hash2_checksum_many(valid,np.uint64(0)).tolist() == [int(v) & ~7 for v in valid]
@@ -0,0 +1,94 @@
+import pytest
+
+import aswreg_memo
+import aswreg_v2core as core
+import aswreg_v2int as fast
+
+
+@pytest.fixture(autouse=True)
+def clean_memo():
+	aswreg_memo.disable()
+	yield
+	aswreg_memo.disable()
+
+
+def test_disabled_by_default():
+	assert aswreg_memo.stats() == {}
+	assert fast.get_hash1('Special [K]',200,'EV Nova') == fast.get_hash1('Special [K]',200,'EV Nova')
+	assert aswreg_memo.stats() == {}
+
+def test_hits_and_normalized_names():
+	expected = fast.get_hash1('Special [K]',200,'EV Nova')
+	aswreg_memo.enable(16)
+	assert fast.get_hash1('Special [K]',200,'EV Nova') == expected
+	assert fast.get_hash1('SPECIAL[K]',200,'EV Nova') == expected # same normalized key
+	stats = aswreg_memo.stats()['hash1']
+	assert (stats['hits'],stats['misses'],stats['size']) == (1,1,1)
+
+def test_lru_bound():
+	aswreg_memo.enable(4)
+	for number in range(1,11):
+		fast.make_hash2_f1('a',number,'EV Nova')
+	stats = aswreg_memo.stats()['f1']
+	assert (stats['size'],stats['evictions']) == (4,6)
+	assert fast.make_hash2_f1('a',3,'EV Nova') == core.make_hash2_f1('a',3,'EV Nova').uint
+
+def test_invalidate():
+	aswreg_memo.enable(16)
+	fast.make_hash2_f2('a',1,'EV Nova')
+	fast.make_hash2_f2('b',1,'EV Nova')
+	aswreg_memo.invalidate('a',1,'EV Nova')
+	assert aswreg_memo.stats()['f2']['size'] == 1
+	aswreg_memo.invalidate()
+	assert aswreg_memo.stats()['f2']['size'] == 0
+
+def test_bitarray_hits_are_copies():
+	aswreg_memo.enable(16)
+	first = core.get_hash1('Special [K]',200,'EV Nova',backend='bitarray')
+	first.invert() # a caller changing its result in place
+	second = core.get_hash1('Special [K]',200,'EV Nova',backend='bitarray')
+	assert second.uint == fast.get_hash1('Special [K]',200,'EV Nova')
+
+def test_backends_do_not_share_entries():
+	aswreg_memo.enable(16)
+	core.get_hash1('Special [K]',200,'EV Nova',backend='bitarray')
+	fast.get_hash1('Special [K]',200,'EV Nova')
+	stats = aswreg_memo.stats()['hash1']
+	assert (stats['hits'],stats['misses'],stats['size']) == (0,2,2)
+	aswreg_memo.invalidate('Special [K]',200,'EV Nova') # drops both
+	assert aswreg_memo.stats()['hash1']['size'] == 0
+
+def test_disk_tier(tmp_path):
+	expected = fast.get_hash1('Special [K]',200,'EV Nova')
+	aswreg_memo.enable_disk(str(tmp_path))
+	assert fast.get_hash1('Special [K]',200,'EV Nova') == expected
+	aswreg_memo.disable()
+	aswreg_memo.enable_disk(str(tmp_path)) # fresh memory tier, same file
+	assert fast.get_hash1('Special [K]',200,'EV Nova') == expected
+	assert aswreg_memo.stats()['hash1']['disk']['hits'] == 1
+	# a bitarray call does not get the int engine's row
+	assert core.get_hash1('Special [K]',200,'EV Nova',backend='bitarray').uint == expected
+	assert aswreg_memo.disk.stats()['entries'] == {'hash1[bitarray] v%d' % aswreg_memo.VERSION: 1,'hash1[int] v%d' % aswreg_memo.VERSION: 1}
+
+def test_disk_discard_keeps_other_versions(tmp_path,monkeypatch):
+	disk = aswreg_memo.DiskCache(str(tmp_path))
+	key = ('int',) + aswreg_memo.normalize('a',1,'EV Nova')
+	monkeypatch.setattr(aswreg_memo,'VERSION',aswreg_memo.VERSION + 1)
+	disk.put('f1',key,7)
+	monkeypatch.undo()
+	disk.put('f1',key,5)
+	disk.discard('f1',key)
+	assert disk.get('f1',key) is None
+	monkeypatch.setattr(aswreg_memo,'VERSION',aswreg_memo.VERSION + 1)
+	assert disk.get('f1',key) == 7
+
+def test_disk_old_layout_is_replaced(tmp_path):
+	import sqlite3
+	connection = sqlite3.connect(str(tmp_path / aswreg_memo.CACHE_FILE))
+	connection.execute('CREATE TABLE results (kind TEXT, version INTEGER, name TEXT, number INTEGER, game TEXT, value INTEGER, used REAL)')
+	connection.commit()
+	connection.close()
+	disk = aswreg_memo.DiskCache(str(tmp_path))
+	key = ('int',) + aswreg_memo.normalize('a',1,'EV Nova')
+	disk.put('f1',key,5)
+	assert disk.get('f1',key) == 5
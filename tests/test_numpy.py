@@ -0,0 +1,22 @@
+import pytest
+
+import aswreg_v2int as fast
+
+NAMES = ['Special [K]','a','Some One','x' * 40,'lower case name']
+
+
+def test_hash1_many():
+	np = pytest.importorskip('numpy')
+	import aswreg_v2np as vec
+	numbers = np.arange(1,200,dtype=np.uint32)
+	names = [NAMES[i % len(NAMES)] for i in range(len(numbers))]
+	for game in ('EV Nova','Garendall'):
+		expected = [fast.get_hash1(name,int(number),game) for (name,number) in zip(names,numbers)]
+		assert vec.get_hash1_many(names,numbers,game).tolist() == expected
+		assert vec.get_hash1_many(names,numbers,[game] * len(names)).tolist() == expected
+
+def test_no_numpy_fixture(no_numpy):
+	with pytest.raises(ImportError):
+		import numpy
+	with pytest.raises(ImportError):
+		import aswreg_v2np
@@ -0,0 +1,64 @@
+import pytest
+
+import aswreg_profile
+import aswreg_v2
+import aswreg_v2core as core
+import aswreg_v2int as fast
+
+
+def stages(profile):
+	return profile.summary()['stages']
+
+def test_stages_nest_under_the_operation():
+	with aswreg_profile.profiled() as profile:
+		aswreg_v2.generate_code('Special [K]',4243,'EV Nova') # a number no other test hashes
+	summary = profile.summary()
+	for stage in ('generate','hash1','hash1.game','hash1.name','hash2','factors','f1','f2','checksum','timestamp','text.encode'):
+		assert stage in summary['stages'],stage
+	assert ['generate','hash2','factors','f1'] in [path['stack'][:4] for path in summary['paths']]
+	assert summary['stages']['generate']['calls'] == 1
+
+def test_off_means_unwrapped():
+	original = fast.get_hash1
+	with aswreg_profile.profiled():
+		assert hasattr(fast.get_hash1,'profile_stage')
+		assert hasattr(aswreg_v2.renew_code,'profile_stage')
+	assert fast.get_hash1 is original
+	assert aswreg_profile.active is None
+	assert not any(hasattr(fn,'profile_stage') for fn in vars(fast).values())
+
+def test_valid_setters():
+	with aswreg_profile.profiled() as profile:
+		hash2 = fast.make_hash2_valid(0x0123456789abcdef)
+		fast.set_hash2_f1_valid(fast.set_hash2_time_valid(hash2,9),0x1234)
+	assert stages(profile)['checksum.incremental']['calls'] == 2
+
+def test_specialized_pairs():
+	before = fast.specialize('EV Nova',77) # made before profiling started
+	with aswreg_profile.profiled() as profile:
+		fast.specialize('EV Nova',77)('abc')
+		fast.specialize('EV Nova',78)('abc') # made while profiling
+	assert stages(profile)['factors.specialized']['calls'] == 2
+	assert fast.specialize('EV Nova',77) is before
+	assert not hasattr(fast.specialize('EV Nova',78),'profile_stage')
+
+def test_numpy_kernels():
+	np = pytest.importorskip('numpy')
+	import aswreg_v2np as vec
+	with aswreg_profile.profiled() as profile:
+		vec.make_hash2_f1_many(['a','b'],np.array([1,2],dtype=np.uint32),'EV Nova')
+		vec.set_hash2_time_valid_many(np.zeros(2,dtype=np.uint64),np.uint64(3))
+	assert stages(profile)['f1']['calls'] == 1
+	assert stages(profile)['checksum.incremental']['calls'] == 1
+
+def test_bitarray_allocations():
+	with aswreg_profile.profiled() as profile:
+		core.get_hash1('Special [K]',200,'EV Nova',backend='bitarray')
+	assert profile.allocs > 0
+	assert stages(profile)['hash1']['allocs'] == profile.allocs
+
+def test_collapsed():
+	with aswreg_profile.profiled() as profile:
+		aswreg_v2.renew_code('6RHG-NTFP-M889','Special [K]',200,'EV Nova')
+	lines = profile.collapsed().splitlines()
+	assert lines and all(line.startswith('renew') for line in lines)
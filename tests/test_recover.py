@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import aswreg_v2
+import aswreg_v2int as fast
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LICENSE = ('Special [K]',200,'EV Nova')
+CODE = aswreg_v2.generate_code(*LICENSE)
+README_CODE = '6RHH-PTHR-M443' # renewed by run.sh from the license's original code
+ORIGINAL_CODE = '6RHG-NTFP-M889'
+
+
+def checksum_matches(code,first,last):
+	bincode = fast.textcode_to_int(code)
+	return [number for number in range(first,last + 1) if fast.check_hash2_valid(bincode ^ fast.get_hash1('Special [K]',number,'EV Nova'))[0]]
+
+
+@pytest.mark.parametrize('numpy',[True,False])
+def test_recover(request,numpy):
+	if numpy:
+		pytest.importorskip('numpy')
+	else:
+		request.getfixturevalue('no_numpy')
+	assert aswreg_v2.recover_number(CODE,'Special [K]','EV Nova',first=1,last=1000) == [(200,'ok')]
+	# no full match: every checksum match, none of them 200
+	found = aswreg_v2.recover_number(CODE,'Special [K]','EV Nova',first=201,last=1000)
+	assert found == [(number,'not_generated') for number in checksum_matches(CODE,201,1000)]
+
+@pytest.mark.parametrize('code',[README_CODE,aswreg_v2.renew_code(ORIGINAL_CODE,*LICENSE)])
+def test_real_codes(code):
+	found = aswreg_v2.recover_number(code,'Special [K]','EV Nova',last=400)
+	assert found == [(number,'not_generated') for number in checksum_matches(code,1,400)]
+	assert (200,'not_generated') in found
+
+def test_full_matches_rank_first(monkeypatch):
+	# a generated code for 200, but searched with matches=2: 200 first, then the checksum matches
+	found = aswreg_v2.recover_number(CODE,'Special [K]','EV Nova',first=150,last=250,matches=2)
+	assert found[0] == (200,'ok')
+	assert found[1:] == [(number,'not_generated') for number in checksum_matches(CODE,150,250) if number != 200]
+
+def test_candidates_match_without_numpy(monkeypatch):
+	pytest.importorskip('numpy')
+	bincode = aswreg_v2.textcode_to_int(README_CODE)
+	with_numpy = aswreg_v2.recover_candidates(bincode,'Special [K]','EV Nova',150,250)
+	monkeypatch.setitem(sys.modules,'numpy',None)
+	monkeypatch.setitem(sys.modules,'aswreg_v2np',None)
+	assert aswreg_v2.recover_candidates(bincode,'Special [K]','EV Nova',150,250) == with_numpy
+	assert [number for (number,hash2) in with_numpy] == checksum_matches(README_CODE,150,250)
+
+def test_recover_workers(monkeypatch):
+	monkeypatch.setattr(aswreg_v2,'RECOVER_BLOCK',64) # several blocks per worker
+	assert aswreg_v2.recover_number(CODE,'Special [K]','EV Nova',first=1,last=1000,workers=2) == [(200,'ok')]
+	assert aswreg_v2.recover_number(README_CODE,'Special [K]','EV Nova',first=1,last=400,workers=2) == \
+		aswreg_v2.recover_number(README_CODE,'Special [K]','EV Nova',first=1,last=400)
+
+def test_recover_renewed_code():
+	renewed = aswreg_v2.renew_calendar(CODE,*LICENSE)[99][2]
+	assert aswreg_v2.recover_number(renewed,'Special [K]','EV Nova',first=190,last=210) == [(200,'ok')]
+
+def test_cli():
+	run = lambda *args: subprocess.run([sys.executable,os.path.join(ROOT,'aswreg_v2.py'),'recover-number'] + list(args),capture_output=True,text=True)
+	result = run(CODE,'Special [K]','EV Nova','--last','300')
+	assert (result.returncode,result.stdout) == (0,'200\n')
+	result = run(README_CODE,'Special [K]','EV Nova','--last','400')
+	assert result.returncode == 0
+	assert '200\tnot generated by this tool (checksum only)' in result.stdout.splitlines()
+	assert run(README_CODE,'Special [K]','EV Nova','--first','201','--last','201').returncode == 1
+	assert run(CODE,'Special [K]').returncode == 2
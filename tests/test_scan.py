@@ -0,0 +1,80 @@
+import json
+import os
+from collections import Counter
+
+import pytest
+
+import aswreg_scan
+import aswreg_v2int as fast
+
+NAMES = ['Special [K]','special[k]','Someone Else','A','B C','Third Person','']
+
+
+@pytest.fixture
+def names_file(tmp_path):
+	path = tmp_path / 'names.txt'
+	path.write_text('\n'.join(NAMES) + '\n')
+	return str(path)
+
+def brute_force(names,game,first,last,bits=60):
+	counts = Counter(fast.get_hash1(name,number,game) & ((1 << bits) - 1) for name in names for number in range(first,last + 1))
+	return sum(count for count in counts.values() if count > 1)
+
+
+def test_load_names(names_file):
+	assert aswreg_scan.load_names(names_file) == ['Special [K]','Someone Else','A','B C','Third Person']
+
+def test_make_shards_cover_range():
+	shards = aswreg_scan.make_shards(5,1,23,7)
+	pairs = [(number,name) for (first,last,start,end) in shards for number in range(first,last + 1) for name in range(start,end)]
+	assert sorted(pairs) == [(number,name) for number in range(1,24) for name in range(0,5)]
+	assert max((last - first + 1) * (end - start) for (first,last,start,end) in shards) <= 7
+
+def test_shard_matches_hash1(tmp_path):
+	aswreg_scan.init_worker(['Special [K]','A'])
+	shard = (198,201,0,2)
+	assert aswreg_scan.scan_shard(str(tmp_path),'EV Nova',shard) == 8
+	records = [aswreg_scan.RUN_RECORD.unpack(record) for record in aswreg_scan.read_run(aswreg_scan.run_path(str(tmp_path),shard))]
+	expected = sorted((fast.get_hash1(name,number,'EV Nova') & ((1 << 60) - 1),index,number)
+		for (index,name) in enumerate(['Special [K]','A']) for number in range(198,202))
+	assert records == expected
+
+def test_collisions_groups():
+	records = [b'\x00' * 8 + b'a',b'\x00' * 8 + b'b',b'\x01' * 8 + b'c',b'\x02' * 8 + b'd',b'\x02' * 8 + b'e',b'\x02' * 8 + b'f']
+	assert [len(group) for group in aswreg_scan.collisions(iter(records))] == [2,3]
+
+def test_merge_in_passes(tmp_path,monkeypatch):
+	monkeypatch.setattr(aswreg_scan,'MERGE_FANIN',2)
+	paths = []
+	for k in range(5):
+		path = str(tmp_path / ('run%d.bin' % k))
+		with open(path,'wb') as f:
+			f.write(b''.join(aswreg_scan.RUN_RECORD.pack(value,k,0) for value in range(k,40,5)))
+		paths.append(path)
+	merged = [aswreg_scan.RUN_RECORD.unpack(record)[0] for record in aswreg_scan.merge_runs(paths,str(tmp_path))]
+	assert merged == list(range(0,40))
+	assert not [name for name in os.listdir(str(tmp_path)) if name.endswith('.tmp')]
+
+def test_scan_and_resume(names_file,tmp_path):
+	workdir = str(tmp_path / 'scan')
+	(workdir,summary) = aswreg_scan.scan(names_file,first=1,last=40,workdir=workdir,workers=2,shard_records=30)
+	names = aswreg_scan.load_names(names_file)
+	assert summary['pairs'] == 40 * len(names)
+	assert summary['colliding_pairs'] == brute_force(names,'EV Nova',1,40)
+	with open(os.path.join(workdir,'summary.json')) as f:
+		assert json.load(f) == summary
+
+	# a run that's gone is redone, the others are reused as they are
+	runs = sorted(name for name in os.listdir(workdir) if name.startswith('run_'))
+	kept = os.path.join(workdir,runs[1])
+	mtime = os.stat(kept).st_mtime_ns
+	os.remove(os.path.join(workdir,runs[0]))
+	assert aswreg_scan.scan(names_file,first=1,last=40,workdir=workdir,workers=2,shard_records=30)[1] == summary
+	assert os.path.exists(os.path.join(workdir,runs[0]))
+	assert os.stat(kept).st_mtime_ns == mtime
+
+def test_scan_rejects_other_workdir(names_file,tmp_path):
+	workdir = str(tmp_path / 'scan')
+	aswreg_scan.scan(names_file,first=1,last=5,workdir=workdir)
+	with pytest.raises(ValueError,match='different scan'):
+		aswreg_scan.scan(names_file,first=1,last=6,workdir=workdir)
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+import aswreg_server
+import aswreg_v2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORD = {'code': '6RHG-NTFP-M889','name': 'Special [K]','number': 200,'game': 'EV Nova'}
+
+
+async def exchange(requests,max_batch=8):
+	with tempfile.TemporaryDirectory() as directory, ProcessPoolExecutor(2) as pool:
+		path = os.path.join(directory,'aswreg.sock')
+		batcher = aswreg_server.MicroBatcher(pool,2,max_batch,0.01)
+		runner = asyncio.ensure_future(batcher.run())
+		server = await asyncio.start_unix_server(lambda r,w: aswreg_server.handle(r,w,batcher),path=path)
+		try:
+			async def client(op,record):
+				(reader,writer) = await asyncio.open_unix_connection(path)
+				try:
+					return await aswreg_server.request(reader,writer,op,record)
+				finally:
+					writer.close()
+			return (await asyncio.gather(*[client(op,record) for (op,record) in requests]),batcher.stats())
+		finally:
+			server.close()
+			runner.cancel()
+
+
+def test_requests_are_batched():
+	requests = [('generate',dict(RECORD,name='Customer %d' % i)) for i in range(20)]
+	(responses,stats) = asyncio.run(exchange(requests))
+	for ((op,record),(status,payload)) in zip(requests,responses):
+		assert status == 200 and payload['error'] is None
+		assert aswreg_v2.verify_code(payload['result'],record['name'],record['number'],record['game'])[0]
+	assert stats['records'] == 20 and stats['batches'] < 20
+
+def test_renew_and_date():
+	(responses,stats) = asyncio.run(exchange([('renew',RECORD),('date',RECORD)]))
+	assert responses[0] == (200,{'result': aswreg_v2.renew_code(**RECORD),'error': None})
+	assert responses[1][1]['result'] == aswreg_v2.date_code(**RECORD)
+
+def test_verify():
+	(responses,stats) = asyncio.run(exchange([('verify',RECORD),('verify',dict(RECORD,code='XXXX'))]))
+	assert responses[0] == (200,{'result': aswreg_v2.format_verification(aswreg_v2.verify_code(**RECORD)),'error': None})
+	assert responses[1][1]['result'].startswith('invalid: format')
+
+def test_errors():
+	(responses,stats) = asyncio.run(exchange([('renew',dict(RECORD,code='nope')),('fly',RECORD)]))
+	assert responses[0][0] == 400 and responses[0][1]['error'].startswith('ValueError')
+	assert responses[1][0] == 404
+
+def test_dispatch_tasks_are_kept(monkeypatch):
+	release = threading.Event()
+	def process_batch_chunk(records):
+		release.wait(5)
+		return [(i,'jsonl',record,'done',None) for (i,fmt,record) in records]
+	monkeypatch.setattr(aswreg_v2,'process_batch_chunk',process_batch_chunk)
+	async def exercise():
+		with ThreadPoolExecutor(1) as pool:
+			batcher = aswreg_server.MicroBatcher(pool,1,4,0.001)
+			runner = asyncio.ensure_future(batcher.run())
+			try:
+				submitted = asyncio.ensure_future(batcher.submit(RECORD))
+				while not batcher.dispatching:
+					await asyncio.sleep(0.001)
+				running = len(batcher.dispatching)
+				release.set()
+				return (running,await submitted,batcher.dispatching)
+			finally:
+				runner.cancel()
+	assert asyncio.run(exercise()) == (1,('done',None),set())
+
+# every script's command line: a bad flag prints the usage to stderr, exit 2
+@pytest.mark.parametrize('argv',[['aswreg_server.py','serve','--port'],['aswreg_server.py','bench','--requests','many'],
+	['aswreg_server.py','fly'],['aswreg_db.py','lookup','x','--game'],['aswreg_scan.py','scan','--first','x'],
+	['aswreg_bench.py','compare','--threshold']])
+def test_cli_usage_errors(argv):
+	result = subprocess.run([sys.executable,os.path.join(ROOT,argv[0])] + argv[1:],capture_output=True,text=True)
+	assert (result.returncode,result.stdout) == (2,'')
+	assert result.stderr.startswith('Usage')
+
+@pytest.mark.parametrize('script',['aswreg_server.py','aswreg_db.py','aswreg_scan.py','aswreg_bench.py'])
+def test_cli_no_command(script):
+	result = subprocess.run([sys.executable,os.path.join(ROOT,script)],capture_output=True,text=True)
+	assert (result.returncode,result.stderr) == (0,'')
+	assert result.stdout.startswith('Usage')
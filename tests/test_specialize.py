@@ -0,0 +1,78 @@
+import os
+import random
+
+import pytest
+
+import aswreg_ir
+import aswreg_memo
+import aswreg_profile
+import aswreg_v2int as fast
+
+NAMES = ['Special [K]','special k','a','Zz Top 99','élan','x' * 40]
+
+
+@pytest.fixture(autouse=True)
+def clean(monkeypatch):
+	aswreg_memo.disable()
+	monkeypatch.setattr(fast,'pair_calls',{})
+	yield
+	aswreg_memo.disable()
+
+
+@pytest.mark.parametrize('game,number',[('EV Nova',1),('EV Nova',200),('EV Nova',65535),('EV Nova',(1 << 32) + 7),('Garendall',5)])
+def test_matches_generic_kernels(game,number):
+	make_factors = fast.specialize(game,number)
+	for name in NAMES:
+		assert make_factors(name) == (fast.make_hash2_f1(name,number,game),fast.make_hash2_f2(name,number,game)),name
+
+def test_random_sweep():
+	rng = random.Random(25)
+	for _ in range(6): # a compile per pair
+		(game,number) = (rng.choice(['EV Nova','EV Override','Garendall']),rng.randrange(1 << 32))
+		make_factors = fast.specialize(game,number)
+		for _ in range(10):
+			name = ''.join(rng.choice('ABCdef [K]0189') for _ in range(rng.randrange(1,20)))
+			assert make_factors(name) == (fast.make_hash2_f1(name,number,game),fast.make_hash2_f2(name,number,game))
+
+def test_no_files_written(tmp_path,monkeypatch):
+	monkeypatch.setattr(aswreg_ir,'CACHE_DIR',str(tmp_path))
+	for number in range(900001,900004): # pairs no other test makes
+		fast.specialize('EV Nova',number)('abc')
+	assert os.listdir(str(tmp_path)) == []
+
+def test_bounded(monkeypatch):
+	monkeypatch.setattr(fast,'SPECIALIZED_MAX',2)
+	for number in range(800001,800004):
+		fast.specialize('EV Nova',number)
+	assert list(fast.specialized) == [('EV Nova',800002),('EV Nova',800003)]
+
+def test_switch_off_by_default(monkeypatch):
+	if 'ASWREG_SPECIALIZE' not in os.environ:
+		assert fast.SPECIALIZE_AFTER == 0
+	monkeypatch.setattr(fast,'SPECIALIZE_AFTER',0)
+	for _ in range(5):
+		fast.make_hash2_factors('abc',700001,'EV Nova')
+	assert fast.pair_calls == {}
+	assert ('EV Nova',700001) not in fast.specialized
+
+def test_switch_opt_in(monkeypatch):
+	monkeypatch.setattr(fast,'SPECIALIZE_AFTER',2)
+	expected = (fast.make_hash2_f1('abc',700002,'EV Nova'),fast.make_hash2_f2('abc',700002,'EV Nova'))
+	assert [fast.make_hash2_factors('abc',700002,'EV Nova') for _ in range(4)] == [expected] * 4
+	assert ('EV Nova',700002) in fast.specialized
+
+def test_shares_memo_entries():
+	aswreg_memo.enable(16)
+	factors = fast.specialize('EV Nova',700003)('abc')
+	assert fast.make_hash2_f1('ABC',700003,'EV Nova') == factors[0]
+	assert fast.make_hash2_f2('abc',700003,'EV Nova') == factors[1]
+	for kind in ('f1','f2'):
+		stats = aswreg_memo.stats()[kind]
+		assert (stats['hits'],stats['misses']) == (1,1)
+
+def test_profiled_when_switched(monkeypatch):
+	monkeypatch.setattr(fast,'SPECIALIZE_AFTER',1)
+	with aswreg_profile.profiled() as profile:
+		for _ in range(3):
+			fast.get_hash2('abc',700004,'EV Nova')
+	assert profile.summary()['stages']['factors.specialized']['calls'] == 2
@@ -0,0 +1,13 @@
+import aswreg_v1
+
+
+def test_generate_all():
+	for (name,number) in (('Special [K]',200),('a',1),('Some One',65535)):
+		codes = aswreg_v1.generate_all(name,number)
+		assert sorted(codes) == sorted(aswreg_v1.earlier_games + aswreg_v1.later_games)
+		for (game,code) in codes.items():
+			assert code == aswreg_v1.generate_code(name,number,game,backend='bitarray')
+
+def test_registration_letters():
+	assert aswreg_v1.int_to_registration(0) == 'AAAAAAAA'
+	assert aswreg_v1.int_to_registration(0xfedcba98) == 'IJKLMNOP'
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import aswreg_v2
+import aswreg_v2int as fast
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LICENSE = ('Special [K]',200,'EV Nova')
+CODE = aswreg_v2.generate_code(*LICENSE)
+README_CODE = '6RHH-PTHR-M443' # renewed by run.sh from the license's original code
+
+
+def with_hash2(change):
+	# the code after change(hash2), checksum fixed up again
+	hash2 = fast.textcode_to_int(CODE) ^ fast.get_hash1(*LICENSE)
+	return fast.int_to_textcode(fast.make_hash2_valid(change(hash2)) ^ fast.get_hash1(*LICENSE))
+
+def reason(code,license=LICENSE):
+	return aswreg_v2.verify_code(code,*license)[1]
+
+
+def test_valid():
+	assert aswreg_v2.verify_code(CODE,*LICENSE) == (True,'ok','')
+	assert aswreg_v2.verify_code(CODE.lower().replace('-',''),*LICENSE)[0]
+	assert aswreg_v2.verify_code(aswreg_v2.renew_code(CODE,*LICENSE),*LICENSE)[0]
+
+def test_readme_code():
+	# a real code: f3 is set and the factors aren't this tool's, still valid
+	hash2 = fast.textcode_to_int(README_CODE) ^ fast.get_hash1(*LICENSE)
+	assert fast.get_hash2_f3(hash2) != 0
+	assert aswreg_v2.verify_code(README_CODE,*LICENSE) == (True,'not_generated','f1 0x8445 is not a multiple of 0x008a')
+	assert aswreg_v2.verify_code(aswreg_v2.renew_code(README_CODE,*LICENSE),*LICENSE)[:2] == (True,'not_generated')
+	assert reason(README_CODE,('Special [K]',201,'EV Nova')) == 'checksum'
+
+def test_reasons():
+	assert reason('XXXX') == 'format'
+	assert reason('0000-0000-0000') == 'format'
+	assert reason(fast.int_to_textcode(fast.textcode_to_int(CODE) ^ 1)) == 'checksum'
+	assert reason(with_hash2(lambda h: fast.set_hash2_f1(h,fast.get_hash2_f1(h) ^ 1))) == 'not_generated'
+	assert reason(with_hash2(lambda h: fast.set_hash2_f2(h,fast.get_hash2_f2(h) ^ 1))) == 'not_generated'
+	assert aswreg_v2.verify_code(with_hash2(lambda h: fast.set_hash2_f2(h,fast.get_hash2_f2(h) ^ 1)),*LICENSE)[2].startswith('f2 ')
+
+def test_unused_fields_not_checked():
+	assert reason(with_hash2(lambda h: h | (1 << 59))) == 'ok' # the top bit
+	# the README code's f3 with this tool's factors
+	hash2 = fast.textcode_to_int(README_CODE) ^ fast.get_hash1(*LICENSE)
+	hash2 = fast.set_hash2_f2(fast.set_hash2_f1(hash2,fast.make_hash2_f1(*LICENSE)),fast.make_hash2_f2(*LICENSE))
+	assert fast.get_hash2_f3(hash2) != 0
+	assert reason(fast.int_to_textcode(fast.make_hash2_valid(hash2) ^ fast.get_hash1(*LICENSE))) == 'ok'
+	assert reason(CODE,('Someone Else',200,'EV Nova')) != 'ok'
+
+def test_multiples_are_valid():
+	base = fast.make_hash2_f1(*LICENSE)
+	assert base * 3 <= 0xffff
+	assert reason(with_hash2(lambda h: fast.set_hash2_f1(h,base * 3))) == 'ok'
+	assert aswreg_v2.is_factor_multiple(6,3) and not aswreg_v2.is_factor_multiple(0,3) and not aswreg_v2.is_factor_multiple(7,3)
+	assert aswreg_v2.is_factor_multiple(0,0) and not aswreg_v2.is_factor_multiple(1,0)
+
+def test_cheap_checks_come_first(monkeypatch):
+	def expensive(name,number,game):
+		raise AssertionError('f1/f2 recomputed')
+	monkeypatch.setattr(fast,'make_hash2_f1',expensive)
+	monkeypatch.setattr(fast,'make_hash2_f2',expensive)
+	assert reason('XXXX') == 'format'
+	assert reason(fast.int_to_textcode(fast.textcode_to_int(CODE) ^ 1)) == 'checksum'
+	with pytest.raises(AssertionError):
+		reason(CODE)
+
+def test_batch_op():
+	records = list(aswreg_v2.read_batch(['%s,Special [K],200,EV Nova,verify' % CODE,'XXXX,Special [K],200,EV Nova,verify']))
+	results = [r[3] for r in aswreg_v2.process_batch(records)]
+	assert results[0] == 'valid' and results[1].startswith('invalid: format')
+
+def test_command():
+	script = os.path.join(ROOT,'aswreg_v2.py')
+	proc = subprocess.run([sys.executable,script,'verify',CODE] + [str(field) for field in LICENSE],capture_output=True,text=True)
+	assert (proc.returncode,proc.stdout.strip()) == (0,'valid')
+	proc = subprocess.run([sys.executable,script,'verify','XXXX'] + [str(field) for field in LICENSE],capture_output=True,text=True)
+	assert proc.returncode == 1 and proc.stdout.startswith('invalid: format')
+	proc = subprocess.run([sys.executable,script,'verify',README_CODE] + [str(field) for field in LICENSE],capture_output=True,text=True)
+	assert (proc.returncode,proc.stdout.strip()) == (0,'valid, not generated by this tool (f1 0x8445 is not a multiple of 0x008a)')